@@ -103,7 +103,7 @@ class WebSocketClient(Connection):
         :return: the envelope received, if present.  # noqa: DAR202
         """
         if self._new_messages:
-            new_msg = self._new_messages.pop()
+            new_msg = self._new_messages.pop(0)
             self.logger.debug(f"Received message from wss connection: {new_msg}")
             return self._from_wss_msg_to_envelope(new_msg)
 
@@ -20,28 +20,26 @@
 """This package contains a scaffold of a behaviour."""
 
 from aea.mail.base import Envelope
-from aea.skills.behaviours import OneShotBehaviour
+from aea.skills.behaviours import TickerBehaviour
 
 from packages.eightballer.connections.websocket_client.connection import CONNECTION_ID
 from packages.fetchai.protocols.default.message import DefaultMessage
 
-subscription_msg_template = '{"jsonrpc":  "2.0",  "id":  1,  "method":  "eth_subscribe",  "params":  ["logs", {"address": "0xf25212e676d1f7f89cd72ffee66158f541246445"}]}'
 
-
-class SubscriptionBehaviour(OneShotBehaviour):
-    """This class scaffolds a behaviour."""
+class SubscriptionBehaviour(TickerBehaviour):
+    """Keep the subscriptions of the websocket up to date."""
 
     def setup(self) -> None:
         """Implement the setup."""
 
     def act(self) -> None:
         """Implement the act."""
-        self.context.logger.info("SubscriptionBehaviour: act called.")
-        self.context.logger.info(
-            "Sending subscription message: {}".format(subscription_msg_template)
-        )
-        self._create_subscription(bytes(subscription_msg_template, "utf-8"))
-        self.context.logger.info("Act completed.")
+        strategy = self.context.subscription_strategy
+        for subscription_msg in strategy.subscription_messages():
+            self.context.logger.info(
+                "Sending subscription message: {}".format(subscription_msg)
+            )
+            self._create_subscription(subscription_msg)
 
     def teardown(self) -> None:
         """Implement the task teardown."""
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the decoding of the events which change the borrower positions."""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from eth_abi.codec import ABICodec
+from eth_abi.exceptions import DecodingError
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from web3 import Web3
+
+from packages.eightballer.skills.contract_subscription.position_store import (
+    AccountEvent,
+    MarketEvent,
+)
+from packages.zarathustra.contracts.unitroller import contract as unitroller_contract
+
+UNITROLLER_ABI_PATH = (
+    Path(unitroller_contract.__file__).parent / "build" / "unitroller.json"
+)
+UNITROLLER_ABI = json.loads(UNITROLLER_ABI_PATH.read_text())["abi"]
+
+
+def _unitroller_event_abi(name: str) -> Dict[str, Any]:
+    """Get the abi of an event from the build of the unitroller."""
+    return next(
+        abi for abi in UNITROLLER_ABI if abi["type"] == "event" and abi["name"] == name
+    )
+
+
+def _event_abi(name: str, *inputs: Tuple[str, str, bool]) -> Dict[str, Any]:
+    """Build the abi of an event from its (name, type, indexed) inputs."""
+    return {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": indexed, "internalType": type_, "name": name_, "type": type_}
+            for name_, type_, indexed in inputs
+        ],
+        "name": name,
+        "type": "event",
+    }
+
+
+# emitted by the unitroller
+MARKET_ENTERED_ABI = _unitroller_event_abi("MarketEntered")
+MARKET_EXITED_ABI = _unitroller_event_abi("MarketExited")
+# emitted by the oTokens, which have no contract package to take the abi from
+BORROW_ABI = _event_abi(
+    "Borrow",
+    ("borrower", "address", False),
+    ("borrowAmount", "uint256", False),
+    ("accountBorrows", "uint256", False),
+    ("totalBorrows", "uint256", False),
+)
+REPAY_BORROW_ABI = _event_abi(
+    "RepayBorrow",
+    ("payer", "address", False),
+    ("borrower", "address", False),
+    ("repayAmount", "uint256", False),
+    ("accountBorrows", "uint256", False),
+    ("totalBorrows", "uint256", False),
+)
+LIQUIDATE_BORROW_ABI = _event_abi(
+    "LiquidateBorrow",
+    ("liquidator", "address", False),
+    ("borrower", "address", False),
+    ("repayAmount", "uint256", False),
+    ("oTokenCollateral", "address", False),
+    ("seizeTokens", "uint256", False),
+)
+
+MARKET_EVENT_ABIS = (MARKET_ENTERED_ABI, MARKET_EXITED_ABI)
+ACCOUNT_EVENT_ABIS = (BORROW_ABI, REPAY_BORROW_ABI, LIQUIDATE_BORROW_ABI)
+MARKET_EVENT_TOPICS = [
+    Web3.to_hex(event_abi_to_log_topic(abi)) for abi in MARKET_EVENT_ABIS
+]
+
+PositionEvent = Union[MarketEvent, AccountEvent]
+
+WORD_SIZE = 32
+
+
+@lru_cache(maxsize=65536)
+def _checksum(address: bytes) -> str:
+    """Get the checksum address of 20 raw bytes, cached as borrowers repeat."""
+    return to_checksum_address(address)
+
+
+def _to_bytes(value: Union[bytes, str]) -> bytes:
+    """Convert a hex string, or HexBytes, to bytes."""
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value)
+
+
+def _to_int(value: Union[int, str]) -> int:
+    """Convert a quantity which may be hex encoded to an int."""
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def _decode_word(type_: str, word: bytes) -> Any:
+    """Decode a static abi word."""
+    if type_ == "address":
+        return _checksum(word[12:])
+    if type_ == "bool":
+        return word[-1] == 1
+    if type_.startswith("uint"):
+        return int.from_bytes(word, "big")
+    return int.from_bytes(word, "big", signed=True)
+
+
+def _is_word(type_: str) -> bool:
+    """Whether a type is encoded in a single word which `_decode_word` handles."""
+    return type_ in ("address", "bool") or (
+        type_.startswith(("uint", "int")) and "[" not in type_
+    )
+
+
+class CompiledEvent:
+    """
+    An event abi prepared for decoding.
+
+    Events whose arguments are all single static words, which is the case of
+    all the unitroller and oToken events, are decoded by slicing the data,
+    the others through the abi codec.
+    """
+
+    def __init__(self, abi: Dict[str, Any], codec: ABICodec) -> None:
+        """Initialize the event."""
+        self.abi = abi
+        self.name = abi["name"]
+        self.topic = event_abi_to_log_topic(abi)
+        self.codec = codec
+        self.indexed = [(i["name"], i["type"]) for i in abi["inputs"] if i["indexed"]]
+        self.data = [(i["name"], i["type"]) for i in abi["inputs"] if not i["indexed"]]
+        self.data_types = [type_ for _, type_ in self.data]
+        self.static = all(_is_word(type_) for type_ in self.data_types)
+
+    def decode_args(self, topics: List[bytes], data: bytes) -> Dict[str, Any]:
+        """
+        Decode the arguments of a log.
+
+        :param topics: the topics of the log, topic0 included.
+        :param data: the data of the log.
+        :return: the arguments by name.
+        """
+        if len(topics) != len(self.indexed) + 1:
+            raise ValueError(f"Expected {len(self.indexed) + 1} topics for {self.name}")
+        args = {
+            name: _decode_word(type_, topic) if _is_word(type_) else topic
+            for (name, type_), topic in zip(self.indexed, topics[1:])
+        }
+        if self.static:
+            if len(data) < WORD_SIZE * len(self.data):
+                raise ValueError(f"Not enough data to decode {self.name}")
+            for position, (name, type_) in enumerate(self.data):
+                word = data[position * WORD_SIZE : (position + 1) * WORD_SIZE]
+                args[name] = _decode_word(type_, word)
+        else:
+            values = self.codec.decode(self.data_types, data)
+            args.update(zip((name for name, _ in self.data), values))
+        return args
+
+
+class EventRegistry:
+    """Decoders of events keyed by topic0, so unknown logs are skipped undecoded."""
+
+    def __init__(self, abis: Iterable[Dict[str, Any]] = ()) -> None:
+        """Initialize the registry."""
+        self.codec = Web3().codec
+        self.events: Dict[bytes, CompiledEvent] = {}
+        for abi in abis:
+            self.register(abi)
+
+    def register(self, abi: Dict[str, Any]) -> CompiledEvent:
+        """Add an event."""
+        event = CompiledEvent(abi, self.codec)
+        self.events[event.topic] = event
+        return event
+
+    @property
+    def topics(self) -> List[str]:
+        """The topic0 of every registered event."""
+        return [Web3.to_hex(topic) for topic in self.events]
+
+    def match(self, log: Dict[str, Any]) -> Optional[CompiledEvent]:
+        """Get the event of a log, if registered."""
+        if not log["topics"]:
+            return None
+        return self.events.get(_to_bytes(log["topics"][0]))
+
+    def decode(
+        self, log: Dict[str, Any]
+    ) -> Optional[Tuple[CompiledEvent, Dict[str, Any]]]:
+        """
+        Decode a log.
+
+        :param log: the log, either as returned by web3 or by a json rpc call.
+        :return: the event and its arguments, or None if the event is unknown.
+        """
+        event = self.match(log)
+        if event is None:
+            return None
+        topics = [_to_bytes(topic) for topic in log["topics"]]
+        return event, event.decode_args(topics, _to_bytes(log["data"]))
+
+
+class PositionEventDecoder(EventRegistry):
+    """Decode the logs which change the markets or the balances of a borrower."""
+
+    def __init__(self) -> None:
+        """Initialize the decoder."""
+        super().__init__(MARKET_EVENT_ABIS + ACCOUNT_EVENT_ABIS)
+        self.market_entered = MARKET_ENTERED_ABI["name"]
+        self.market_events = {abi["name"] for abi in MARKET_EVENT_ABIS}
+
+    def decode(self, log: Dict[str, Any]) -> Optional[PositionEvent]:  # type: ignore
+        """
+        Decode a log.
+
+        :param log: the log, either as returned by web3 or by a json rpc call.
+        :return: the event, or None if the log is not a position event.
+        """
+        decoded = super().decode(log)
+        if decoded is None:
+            return None
+        event, args = decoded
+        block_number, log_index = _to_int(log["blockNumber"]), _to_int(log["logIndex"])
+        if event.name in self.market_events:
+            return MarketEvent(
+                account=args["account"],
+                market=args["oToken"],
+                entered=event.name == self.market_entered,
+                block_number=block_number,
+                log_index=log_index,
+            )
+        return AccountEvent(
+            account=args["borrower"],
+            block_number=block_number,
+            log_index=log_index,
+        )
+
+    def decode_batch(
+        self,
+        logs: Iterable[Dict[str, Any]],
+        on_error: Optional[Callable[[Dict[str, Any], Exception], None]] = None,
+    ) -> List[PositionEvent]:
+        """
+        Decode the position events out of logs.
+
+        :param logs: the logs.
+        :param on_error: called with each log which cannot be decoded and is skipped.
+        :return: the events, in the order of the logs.
+        """
+        events = []
+        for log in logs:
+            try:
+                event = self.decode(log)
+            except (DecodingError, ValueError, TypeError) as e:
+                if on_error is not None:
+                    on_error(log, e)
+                continue
+            if event is not None:
+                events.append(event)
+        return events
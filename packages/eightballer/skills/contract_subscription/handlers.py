@@ -20,6 +20,8 @@
 """This package contains a scaffold of a handler."""
 
 
+import json
+
 from aea.protocols.base import Message
 from aea.skills.base import Handler
 
@@ -40,7 +42,33 @@ class WebSocketHandler(Handler):
 
         :param message: the message
         """
-        self.context.logger.info(f"Received message: {message}")
+        try:
+            data = json.loads(message.content)
+        except ValueError:
+            self.context.logger.error(f"Received invalid message: {message}")
+            return
+
+        if data.get("method") != "eth_subscription":
+            self.context.logger.info(f"Received message: {data}")
+            if "result" in data:
+                self.context.subscription_strategy.handle_response(data)
+            return
+
+        result = data["params"]["result"]
+        if "topics" not in result:
+            # a header of the newHeads subscription
+            block_number = self.context.subscription_strategy.handle_head(result)
+            if block_number is not None:
+                self.context.logger.debug(f"New head {block_number}")
+            return
+
+        try:
+            event = self.context.subscription_strategy.handle_log(result)
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Could not apply log {result}: {e}")
+            return
+        if event is not None:
+            self.context.logger.info(f"Applied {event}")
 
     def teardown(self) -> None:
         """Implement the handler teardown."""
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the tracker of the chain head announced on the websocket."""
+
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# the key of the head tracker in the shared state of the agent
+HEAD_TRACKER = "head_tracker"
+
+Clock = Callable[[], float]
+
+
+class HeadTracker:
+    """
+    Track the chain head announced on the newHeads subscription.
+
+    The tracker lives in the shared state of the agent, so that the
+    contract_subscription skill updates it and the liquidation_station skill
+    reads it. It also records the blocks the current subscription covers:
+    from the block after the first head it announced, to the block its
+    market events are confirmed to, so that the logs only have to be polled
+    for the blocks outside of it.
+    """
+
+    def __init__(self, clock: Clock = time.monotonic) -> None:
+        """Initialize the tracker."""
+        self.clock = clock
+        self.head: Optional[int] = None
+        self.received_at: Optional[float] = None
+        self.stream_from: Optional[int] = None
+        self.confirmed_block: Optional[int] = None
+
+    @classmethod
+    def from_shared_state(cls, shared_state: Dict[str, Any]) -> "HeadTracker":
+        """Get the tracker of the agent, creating it on first use."""
+        return shared_state.setdefault(HEAD_TRACKER, cls())
+
+    def update(self, block_number: int) -> bool:
+        """
+        Record a new head.
+
+        :param block_number: the number of the head.
+        :return: whether the head is newer than the one already seen.
+        """
+        if self.head is not None and block_number <= self.head:
+            return False
+        self.head = block_number
+        self.received_at = self.clock()
+        if self.stream_from is None:
+            # the logs of the first head may predate the subscription
+            self.stream_from = block_number + 1
+        return True
+
+    def restart_stream(self) -> None:
+        """Forget the blocks covered by the subscription, as it is made again."""
+        self.stream_from = None
+        self.confirmed_block = None
+
+    def confirm(self, block_number: int) -> None:
+        """Record that the market events of the stream are applied up to a block."""
+        self.confirmed_block = max(self.confirmed_block or block_number, block_number)
+
+    def streamed_blocks(self, max_head_age: float) -> Optional[Tuple[int, int]]:
+        """
+        The blocks whose market events the subscription has applied.
+
+        :param max_head_age: the seconds without a head after which the stream is down.
+        :return: the inclusive range of blocks, if the stream is healthy.
+        """
+        head_age = self.head_age
+        if (
+            head_age is None
+            or head_age > max_head_age
+            or self.stream_from is None
+            or self.confirmed_block is None
+            or self.confirmed_block < self.stream_from
+        ):
+            return None
+        return self.stream_from, self.confirmed_block
+
+    @property
+    def head_age(self) -> Optional[float]:
+        """The seconds since the latest head was received."""
+        if self.received_at is None:
+            return None
+        return self.clock() - self.received_at
@@ -19,10 +19,31 @@
 
 """This package contains a scaffold of a model."""
 
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
 from aea.skills.base import Model
 
+from packages.eightballer.skills.contract_subscription.events import (
+    PositionEvent,
+    PositionEventDecoder,
+)
+from packages.eightballer.skills.contract_subscription.head_tracker import HeadTracker
+from packages.eightballer.skills.contract_subscription.position_store import (
+    MarketEvent,
+    PositionStore,
+    UnconfirmedEvents,
+)
 from packages.fetchai.protocols.default.dialogues import DefaultDialogue
 
+UNITROLLER_ADDRESS = "0x8849f1a0cB6b5D6076aB150546EddEe193754F1C"
+
+# the json-rpc ids of the requests, to match the responses with
+LOGS_REQUEST_ID = 1
+HEADS_REQUEST_ID = 2
+UNSUBSCRIBE_REQUEST_ID = 3
+
 
 def get_role(*args, **kwargs) -> DefaultDialogue.Role:
     """Get the role of the agent for the dialogue."""
@@ -36,3 +57,172 @@ class MyModel(Model):
     def setup(self) -> None:
         """Set up the model."""
         self.context.logger.info("MyModel: setup method called.")
+
+
+class SubscriptionStrategy(Model):
+    """
+    Stream the position events of the lending markets into the position store.
+
+    The account events are applied as they are received, as they only have
+    the balances of the account read again, which is harmless if their
+    block is then reorganised. The market events are held until their block
+    has `confirmations` blocks on top of it, and dropped if a reorg removes
+    their log before, so that the memberships never hold a phantom entry or
+    exit. Out of order delivery is fine as the store only keeps the latest
+    event per account and market. The new heads are recorded in the head
+    tracker which schedules its periods, along with the blocks the stream
+    covers, so that the log indexer of the liquidation_station skill only
+    polls the blocks missed while the websocket was down.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the strategy."""
+        self.addresses = kwargs.pop("addresses", [UNITROLLER_ADDRESS])
+        database_file = kwargs.pop("database_file", "positions.db")
+        confirmations = kwargs.pop("confirmations", 12)
+        self.max_head_age = kwargs.pop("max_head_age", 60)
+        super().__init__(**kwargs)
+        self.position_store = PositionStore(Path(database_file))
+        self.unconfirmed = UnconfirmedEvents(confirmations=confirmations)
+        self.decoder = PositionEventDecoder()
+        self.subscribed_addresses: Optional[List[str]] = None
+        self.subscribed_at: Optional[float] = None
+        self.subscription_ids: Dict[int, str] = {}
+
+    def setup(self) -> None:
+        """Open the position store."""
+        if not self.position_store.path.is_absolute():
+            self.position_store.path = (
+                Path(self.context.data_dir) / self.position_store.path
+            )
+        self.context.logger.info(
+            f"Streaming position events into {self.position_store.path}"
+        )
+
+    def teardown(self) -> None:
+        """Close the position store."""
+        self.position_store.close()
+
+    @property
+    def log_addresses(self) -> List[str]:
+        """The addresses to stream the logs of."""
+        # the oTokens emit the borrow events, the unitroller the market ones
+        markets = self.position_store.markets()
+        return list(dict.fromkeys(self.addresses + markets))
+
+    @property
+    def subscription_message(self) -> bytes:
+        """The eth_subscribe request for the position events."""
+        request = {
+            "jsonrpc": "2.0",
+            "id": LOGS_REQUEST_ID,
+            "method": "eth_subscribe",
+            "params": [
+                "logs",
+                {"address": self.log_addresses, "topics": [self.decoder.topics]},
+            ],
+        }
+        return json.dumps(request).encode("utf-8")
+
+    @property
+    def heads_subscription_message(self) -> bytes:
+        """The eth_subscribe request for the new chain heads."""
+        request = {
+            "jsonrpc": "2.0",
+            "id": HEADS_REQUEST_ID,
+            "method": "eth_subscribe",
+            "params": ["newHeads"],
+        }
+        return json.dumps(request).encode("utf-8")
+
+    def unsubscribe_message(self, subscription_id: str) -> bytes:
+        """The eth_unsubscribe request of a subscription."""
+        request = {
+            "jsonrpc": "2.0",
+            "id": UNSUBSCRIBE_REQUEST_ID,
+            "method": "eth_unsubscribe",
+            "params": [subscription_id],
+        }
+        return json.dumps(request).encode("utf-8")
+
+    def subscription_messages(self) -> List[bytes]:
+        """
+        Get the requests which bring the subscriptions up to date.
+
+        Both subscriptions are made again when no head was received for
+        `max_head_age` seconds, as the websocket reconnects without them, and
+        the events waiting for confirmations are dropped, as their removal
+        may have been missed. The subscription to the logs is replaced when
+        new markets are listed.
+
+        :return: the requests to send, none if the subscriptions are current.
+        """
+        tracker = HeadTracker.from_shared_state(self.context.shared_state)
+        now = tracker.clock()
+        last_seen = max(tracker.received_at or 0.0, self.subscribed_at or 0.0)
+        addresses = self.log_addresses
+        if self.subscribed_at is None or now - last_seen > self.max_head_age:
+            tracker.restart_stream()
+            self.unconfirmed = UnconfirmedEvents(self.unconfirmed.confirmations)
+            self.subscription_ids.clear()
+            messages = [self.subscription_message, self.heads_subscription_message]
+        elif addresses != self.subscribed_addresses:
+            messages = []
+            subscription_id = self.subscription_ids.pop(LOGS_REQUEST_ID, None)
+            if subscription_id is not None:
+                messages.append(self.unsubscribe_message(subscription_id))
+            messages.append(self.subscription_message)
+        else:
+            return []
+        self.subscribed_addresses = addresses
+        self.subscribed_at = now
+        return messages
+
+    def handle_response(self, response: Dict[str, Any]) -> None:
+        """
+        Record the id of a subscription the node made.
+
+        :param response: the json-rpc response to an eth_subscribe request.
+        """
+        if response.get("id") in (LOGS_REQUEST_ID, HEADS_REQUEST_ID):
+            self.subscription_ids[response["id"]] = response["result"]
+
+    def handle_head(self, head: Dict[str, Any]) -> Optional[int]:
+        """
+        Record a new chain head, and apply the market events it confirms.
+
+        :param head: the header of an eth_subscription notification.
+        :return: the block number, if newer than the head already seen.
+        """
+        block_number = int(head["number"], 16)
+        tracker = HeadTracker.from_shared_state(self.context.shared_state)
+        if not tracker.update(block_number):
+            return None
+        confirmed = self.unconfirmed.pop_confirmed(block_number)
+        if confirmed:
+            self.position_store.apply(confirmed)
+            self.context.logger.info(f"Applied {len(confirmed)} confirmed events")
+        tracker.confirm(block_number - self.unconfirmed.confirmations)
+        return block_number
+
+    def handle_log(self, log: Dict[str, Any]) -> Optional[PositionEvent]:
+        """
+        Apply a streamed log to the position store.
+
+        :param log: the log of an eth_subscription notification.
+        :return: the event applied, if any.
+        """
+        key = (log["blockHash"], log["logIndex"])
+        if log.get("removed", False):
+            dropped = self.unconfirmed.remove(key)
+            if dropped is not None:
+                self.context.logger.info(f"Dropped {dropped} removed by a reorg")
+            return None
+        event = self.decoder.decode(log)
+        if event is None:
+            return None
+        if isinstance(event, MarketEvent):
+            self.unconfirmed.add(key, event)
+            return None
+        self.position_store.apply([], [event])
+        return event
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the on-disk store of the borrower positions."""
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS memberships (
+    account TEXT NOT NULL,
+    market TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (account, market)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS memberships_by_market
+    ON memberships (market, active, account);
+CREATE INDEX IF NOT EXISTS memberships_by_active
+    ON memberships (active, account);
+CREATE TABLE IF NOT EXISTS account_updates (
+    account TEXT NOT NULL PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS account_updates_by_block
+    ON account_updates (block_number);
+"""
+
+# an update is only applied when it happened after the one already stored,
+# so replaying or backfilling logs out of order leaves the store unchanged
+UPSERT = """
+INSERT INTO memberships (account, market, active, block_number, log_index)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (account, market) DO UPDATE SET
+    active = excluded.active,
+    block_number = excluded.block_number,
+    log_index = excluded.log_index
+WHERE (excluded.block_number, excluded.log_index)
+    > (memberships.block_number, memberships.log_index)
+"""
+
+TOUCH = """
+INSERT INTO account_updates (account, block_number, log_index)
+VALUES (?, ?, ?)
+ON CONFLICT (account) DO UPDATE SET
+    block_number = excluded.block_number,
+    log_index = excluded.log_index
+WHERE (excluded.block_number, excluded.log_index)
+    > (account_updates.block_number, account_updates.log_index)
+"""
+
+
+@dataclass(frozen=True)
+class MarketEvent:
+    """A MarketEntered or MarketExited log of the unitroller."""
+
+    account: str
+    market: str
+    entered: bool
+    block_number: int
+    log_index: int
+
+
+@dataclass(frozen=True)
+class AccountEvent:
+    """A Borrow, RepayBorrow or LiquidateBorrow log of an oToken."""
+
+    account: str
+    block_number: int
+    log_index: int
+
+
+# the hash of the block of a log and its index
+LogKey = Tuple[str, str]
+
+
+class UnconfirmedEvents:
+    """
+    Hold the market events of the blocks which a reorg can still remove.
+
+    The events are keyed by the hash of their block and their log index, so
+    that a log removed by a reorg drops the event it carried before the
+    event is ever applied to the store.
+    """
+
+    def __init__(self, confirmations: int = 12) -> None:
+        """
+        Initialize the buffer.
+
+        :param confirmations: the blocks on top of the block of an event
+            before it is applied.
+        """
+        self.confirmations = confirmations
+        self.events: Dict[LogKey, MarketEvent] = {}
+
+    def __len__(self) -> int:
+        """The number of events waiting for their confirmations."""
+        return len(self.events)
+
+    def add(self, key: LogKey, event: MarketEvent) -> None:
+        """Hold an event until its block is confirmed."""
+        self.events[key] = event
+
+    def remove(self, key: LogKey) -> Optional[MarketEvent]:
+        """Drop the event of a log removed by a reorg."""
+        return self.events.pop(key, None)
+
+    def pop_confirmed(self, head: int) -> List[MarketEvent]:
+        """Take the events with enough confirmations at a head, in log order."""
+        confirmed = {
+            key: event
+            for key, event in self.events.items()
+            if event.block_number <= head - self.confirmations
+        }
+        for key in confirmed:
+            del self.events[key]
+        return sorted(
+            confirmed.values(), key=lambda event: (event.block_number, event.log_index)
+        )
+
+
+class PositionStore:
+    """
+    SQLite backed store of the markets each borrower has entered.
+
+    Accounts are only kept once per market, and every query is answered
+    from an index, so its cost is proportional to the size of the result.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the store."""
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the connection, opening the database if needed."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path))
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def apply(
+        self,
+        events: Iterable[MarketEvent],
+        account_events: Iterable[AccountEvent] = (),
+    ) -> None:
+        """
+        Apply market and account events in a single transaction.
+
+        Every account in an event is also recorded as updated, so that its
+        balances are read again.
+        """
+        events = list(events)
+        rows = [
+            (
+                event.account,
+                event.market,
+                int(event.entered),
+                event.block_number,
+                event.log_index,
+            )
+            for event in events
+        ]
+        updates = [
+            (event.account, event.block_number, event.log_index)
+            for event in [*events, *account_events]
+        ]
+        with self.connection:
+            self.connection.executemany(UPSERT, rows)
+            self.connection.executemany(TOUCH, updates)
+
+    def accounts(self) -> List[str]:
+        """Get the accounts which are in at least one market."""
+        cursor = self.connection.execute(
+            "SELECT DISTINCT account FROM memberships WHERE active = 1 ORDER BY account"
+        )
+        return [account for (account,) in cursor]
+
+    def accounts_in_market(self, market: str) -> List[str]:
+        """Get the accounts which are in a market."""
+        cursor = self.connection.execute(
+            "SELECT account FROM memberships WHERE market = ? AND active = 1 "
+            "ORDER BY account",
+            (market,),
+        )
+        return [account for (account,) in cursor]
+
+    def markets_of(self, account: str) -> List[str]:
+        """Get the markets an account is in."""
+        cursor = self.connection.execute(
+            "SELECT market FROM memberships WHERE account = ? AND active = 1 "
+            "ORDER BY market",
+            (account,),
+        )
+        return [market for (market,) in cursor]
+
+    def markets(self) -> List[str]:
+        """Get the markets with at least one account in them."""
+        cursor = self.connection.execute(
+            "SELECT DISTINCT market FROM memberships WHERE active = 1 ORDER BY market"
+        )
+        return [market for (market,) in cursor]
+
+    def positions(self, accounts: Iterable[str]) -> Dict[str, List[str]]:
+        """Get the markets each of the accounts is in."""
+        return {account: self.markets_of(account) for account in accounts}
+
+    def updated_since(self, block_number: int) -> Dict[str, int]:
+        """Get the accounts with an event after a block, and the block of their last one."""
+        cursor = self.connection.execute(
+            "SELECT account, block_number FROM account_updates WHERE block_number > ?",
+            (block_number,),
+        )
+        return dict(cursor.fetchall())
+
+    def __len__(self) -> int:
+        """Get the number of accounts which are in at least one market."""
+        cursor = self.connection.execute(
+            "SELECT COUNT(DISTINCT account) FROM memberships WHERE active = 1"
+        )
+        return cursor.fetchone()[0]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the events.py module of the ContractSubscription."""
+
+from eth_abi import encode
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+from web3._utils.events import get_event_data
+
+from packages.eightballer.skills.contract_subscription.events import (
+    BORROW_ABI,
+    EventRegistry,
+    MARKET_ENTERED_ABI,
+    PositionEventDecoder,
+)
+from packages.eightballer.skills.contract_subscription.position_store import (
+    AccountEvent,
+    MarketEvent,
+)
+
+O_TOKEN = "0xEBb865Bf286e6eA8aBf5ac97e1b56A76530F3fBe"
+ACCOUNT = "0x3C1A3A39B0D45d9b1d4A1F14D6B5c7B9f0A0e1a2"
+
+
+def make_log(event_abi: dict, types: list, values: list, block: int, index: int):
+    """Create a log as received from an eth_subscription notification."""
+    return {
+        "address": O_TOKEN,
+        "topics": [Web3.to_hex(event_abi_to_log_topic(event_abi))],
+        "data": Web3.to_hex(encode(types, values)),
+        "blockNumber": hex(block),
+        "logIndex": hex(index),
+        "transactionIndex": "0x0",
+        "transactionHash": "0x" + "00" * 32,
+        "blockHash": "0x" + "00" * 32,
+        "removed": False,
+    }
+
+
+def test_decode_market_event() -> None:
+    """Test that a streamed MarketEntered log is decoded."""
+    log = make_log(
+        MARKET_ENTERED_ABI, ["address", "address"], [O_TOKEN, ACCOUNT], 100, 3
+    )
+    assert PositionEventDecoder().decode(log) == MarketEvent(
+        account=ACCOUNT, market=O_TOKEN, entered=True, block_number=100, log_index=3
+    )
+
+
+def test_decode_account_event() -> None:
+    """Test that a streamed Borrow log is decoded."""
+    log = make_log(
+        BORROW_ABI,
+        ["address", "uint256", "uint256", "uint256"],
+        [ACCOUNT, 10, 20, 30],
+        101,
+        0,
+    )
+    assert PositionEventDecoder().decode(log) == AccountEvent(
+        account=ACCOUNT, block_number=101, log_index=0
+    )
+
+
+def test_unknown_topics_are_skipped() -> None:
+    """Test that logs of other events are not decoded."""
+    decoder = PositionEventDecoder()
+    assert len(decoder.topics) == 5
+    assert decoder.decode({"topics": []}) is None
+    log = make_log(BORROW_ABI, [], [], 1, 0)
+    assert decoder.decode({**log, "topics": ["0x" + "11" * 32]}) is None
+
+
+def test_decode_batch() -> None:
+    """Test that a batch keeps the log order and reports undecodable logs."""
+    entered = make_log(
+        MARKET_ENTERED_ABI, ["address", "address"], [O_TOKEN, ACCOUNT], 5, 1
+    )
+    borrow = make_log(
+        BORROW_ABI,
+        ["address", "uint256", "uint256", "uint256"],
+        [ACCOUNT, 1, 2, 3],
+        5,
+        2,
+    )
+    truncated = {**borrow, "data": borrow["data"][:-64]}
+    errors = []
+    events = PositionEventDecoder().decode_batch(
+        [borrow, truncated, entered], on_error=lambda log, e: errors.append(log)
+    )
+    assert events == [
+        AccountEvent(ACCOUNT, 5, 2),
+        MarketEvent(ACCOUNT, O_TOKEN, True, 5, 1),
+    ]
+    assert errors == [truncated]
+
+
+def test_registry_matches_web3() -> None:
+    """Test that indexed and dynamic arguments are decoded like web3 does."""
+    abi = {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "account", "type": "address"},
+            {"indexed": False, "name": "action", "type": "string"},
+            {"indexed": False, "name": "amount", "type": "int256"},
+        ],
+        "name": "ActionDone",
+        "type": "event",
+    }
+    log = {
+        "address": O_TOKEN,
+        "topics": [
+            event_abi_to_log_topic(abi),
+            bytes(12) + bytes.fromhex(ACCOUNT[2:]),
+        ],
+        "data": encode(["string", "int256"], ["Mint", -5]),
+        "blockNumber": 1,
+        "logIndex": 0,
+        "transactionIndex": 0,
+        "transactionHash": bytes(32),
+        "blockHash": bytes(32),
+    }
+    registry = EventRegistry([abi])
+    event, args = registry.decode(log)
+    assert event.name == "ActionDone"
+    assert not event.static
+    assert args == dict(get_event_data(registry.codec, abi, log)["args"])
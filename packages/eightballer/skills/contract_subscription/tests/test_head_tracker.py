@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the head_tracker.py module of the ContractSubscription."""
+
+from packages.eightballer.skills.contract_subscription.head_tracker import (
+    HEAD_TRACKER,
+    HeadTracker,
+)
+
+
+class FakeClock:
+    """A clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Initialize the clock."""
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        """Get the time."""
+        return self.now
+
+
+def test_head_tracker() -> None:
+    """Test that only newer heads are recorded."""
+    clock = FakeClock()
+    tracker = HeadTracker(clock=clock)
+    assert tracker.head is None and tracker.head_age is None
+    assert tracker.update(10)
+    clock.now += 1.5
+    assert not tracker.update(10)
+    assert not tracker.update(9)
+    assert tracker.head == 10
+    assert tracker.head_age == 1.5
+
+    shared_state = {}
+    shared = HeadTracker.from_shared_state(shared_state)
+    assert shared_state[HEAD_TRACKER] is shared
+    assert HeadTracker.from_shared_state(shared_state) is shared
+
+
+def test_streamed_blocks() -> None:
+    """Test the blocks covered by a healthy stream."""
+    clock = FakeClock()
+    tracker = HeadTracker(clock=clock)
+    assert tracker.streamed_blocks(60) is None
+    tracker.update(100)
+    tracker.confirm(100)
+    assert tracker.streamed_blocks(60) is None
+    tracker.update(113)
+    tracker.confirm(101)
+    assert tracker.streamed_blocks(60) == (101, 101)
+    clock.now += 61
+    assert tracker.streamed_blocks(60) is None
+
+    tracker.restart_stream()
+    tracker.update(150)
+    tracker.confirm(138)
+    assert tracker.stream_from == 151
+    assert tracker.streamed_blocks(60) is None
+    tracker.update(163)
+    tracker.confirm(151)
+    assert tracker.streamed_blocks(60) == (151, 151)
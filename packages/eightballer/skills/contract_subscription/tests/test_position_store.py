@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the position_store.py module of the ContractSubscription."""
+
+from pathlib import Path
+
+from packages.eightballer.skills.contract_subscription.position_store import (
+    AccountEvent,
+    MarketEvent,
+    PositionStore,
+    UnconfirmedEvents,
+)
+
+ALICE, BOB = "0xa11ce", "0xb0b"
+WETH, USDC = "0xweth", "0xusdc"
+
+
+def test_accounts_are_deduplicated(tmp_path: Path) -> None:
+    """Test that an account entering several markets is listed once."""
+    store = PositionStore(tmp_path / "positions.db")
+    store.apply(
+        [
+            MarketEvent(ALICE, WETH, True, 1, 0),
+            MarketEvent(ALICE, USDC, True, 1, 1),
+            MarketEvent(ALICE, WETH, True, 2, 0),
+            MarketEvent(BOB, USDC, True, 3, 0),
+        ]
+    )
+    assert store.accounts() == [ALICE, BOB]
+    assert len(store) == 2
+    assert store.markets_of(ALICE) == [USDC, WETH]
+    assert store.accounts_in_market(USDC) == [ALICE, BOB]
+    assert store.accounts_in_market(WETH) == [ALICE]
+
+
+def test_exit_removes_membership(tmp_path: Path) -> None:
+    """Test that exiting a market is tracked."""
+    store = PositionStore(tmp_path / "positions.db")
+    store.apply([MarketEvent(ALICE, WETH, True, 1, 0)])
+    store.apply([MarketEvent(ALICE, WETH, False, 5, 2)])
+    assert store.accounts() == []
+    assert store.accounts_in_market(WETH) == []
+
+
+def test_older_events_do_not_override(tmp_path: Path) -> None:
+    """Test that backfilled history does not undo newer events."""
+    store = PositionStore(tmp_path / "positions.db")
+    store.apply([MarketEvent(ALICE, WETH, False, 10, 0)])
+    store.apply([MarketEvent(ALICE, WETH, True, 4, 0)])
+    assert store.markets_of(ALICE) == []
+
+    store.apply([MarketEvent(ALICE, WETH, True, 10, 1)])
+    assert store.markets_of(ALICE) == [WETH]
+
+
+def test_updated_accounts(tmp_path: Path) -> None:
+    """Test that the last event of every account is recorded."""
+    store = PositionStore(tmp_path / "positions.db")
+    store.apply([MarketEvent(ALICE, WETH, True, 1, 0)])
+    store.apply([], [AccountEvent(BOB, 7, 0), AccountEvent(ALICE, 5, 1)])
+    store.apply([], [AccountEvent(BOB, 3, 0)])
+    assert store.updated_since(0) == {ALICE: 5, BOB: 7}
+    assert store.updated_since(5) == {BOB: 7}
+
+
+def test_store_survives_restart(tmp_path: Path) -> None:
+    """Test that the positions are read back from disk."""
+    store = PositionStore(tmp_path / "positions.db")
+    store.apply([MarketEvent(ALICE, WETH, True, 1, 0)])
+    store.close()
+
+    restored = PositionStore(tmp_path / "positions.db")
+    assert restored.accounts_in_market(WETH) == [ALICE]
+
+
+def test_removed_events_are_never_applied() -> None:
+    """Test that the events are released once confirmed, unless removed."""
+    unconfirmed = UnconfirmedEvents(confirmations=2)
+    entered = MarketEvent(ALICE, WETH, True, 10, 1)
+    exited = MarketEvent(ALICE, WETH, False, 10, 0)
+    phantom = MarketEvent(BOB, USDC, True, 11, 0)
+    unconfirmed.add(("0xa", "0x1"), entered)
+    unconfirmed.add(("0xa", "0x0"), exited)
+    unconfirmed.add(("0xb", "0x0"), phantom)
+    assert unconfirmed.pop_confirmed(11) == []
+
+    # the block of bob entering is reorganised away
+    assert unconfirmed.remove(("0xb", "0x0")) == phantom
+    assert unconfirmed.remove(("0xb", "0x0")) is None
+    assert unconfirmed.pop_confirmed(12) == [exited, entered]
+    assert unconfirmed.pop_confirmed(13) == []
+    assert len(unconfirmed) == 0
@@ -19,16 +19,51 @@
 
 """This package contains round behaviours of LiquidationStationAbciApp."""
 
+import heapq
 import json
+import os
 from abc import ABC
-from functools import cached_property
-from pathlib import Path
-from typing import Generator, List, Set, Type, cast
-
-from web3 import Web3
-from web3._utils.events import get_event_data
-
-from packages.eightballer.skills.liquidation_station.models import Params
+from dataclasses import asdict
+from typing import Any, Callable, Generator, List, Optional, Set, Type, cast
+
+from packages.eightballer.skills.contract_subscription.events import MARKET_EVENT_TOPICS
+from packages.eightballer.skills.contract_subscription.head_tracker import HeadTracker
+from packages.eightballer.skills.contract_subscription.position_store import MarketEvent
+from packages.eightballer.skills.liquidation_station.fees import Fee
+from packages.eightballer.skills.liquidation_station.health import (
+    AccountLiquidity,
+    MANTISSA,
+    rank_by_shortfall,
+)
+from packages.eightballer.skills.liquidation_station.indexer import BlockRange
+from packages.eightballer.skills.liquidation_station.models import (
+    Params,
+    UNITROLLER_ADDRESS,
+)
+from packages.eightballer.skills.liquidation_station.multisend import (
+    LiquidationBundle,
+    MULTISEND_ADDRESS,
+    Operation,
+    SAFE_NONCE_SELECTOR,
+    aggregate_simulations_calldata,
+    aggregated_simulations_succeeded,
+    multisend_calldata,
+    plan_bundles,
+    simulate_bundles,
+    simulate_calldata,
+    simulation_succeeded,
+)
+from packages.eightballer.skills.liquidation_station.position_set import (
+    EMPTY_ROOT,
+    PositionSetDelta,
+    make_delta,
+    merkle_root,
+    resolve_positions,
+    sorted_accounts,
+)
+from packages.eightballer.skills.liquidation_station.profitability import (
+    LiquidationCandidate,
+)
 from packages.eightballer.skills.liquidation_station.rounds import (
     CalculatePositionHealthPayload,
     CalculatePositionHealthRound,
@@ -41,16 +76,27 @@ from packages.eightballer.skills.liquidation_station.rounds import (
     RegistrationRound,
     ResetAndPausePayload,
     ResetAndPauseRound,
+    SelectBlockPayload,
+    SelectBlockRound,
     SubmitPositionLiquidationTransactionsPayload,
     SubmitPositionLiquidationTransactionsRound,
     SynchronizedData,
 )
+from packages.eightballer.skills.liquidation_station.timings import (
+    SkipRate,
+    period_timings,
+)
+from packages.eightballer.skills.liquidation_station.tx_cache import PreparedLiquidation
+from packages.eightballer.skills.read_cache.read_cache import cached_read
+from packages.valory.protocols.contract_api import ContractApiMessage
 from packages.valory.protocols.ledger_api.message import LedgerApiMessage
 from packages.valory.skills.abstract_round_abci.base import AbstractRound
 from packages.valory.skills.abstract_round_abci.behaviours import (
     AbstractRoundBehaviour,
     BaseBehaviour,
 )
+from packages.valory.skills.abstract_round_abci.io_.store import SupportedFiletype
+from packages.zarathustra.contracts.unitroller.contract import Unitroller
 
 
 class LiquidationStationBaseBehaviour(BaseBehaviour, ABC):
@@ -67,7 +113,15 @@ class LiquidationStationBaseBehaviour(BaseBehaviour, ABC):
         return cast(Params, super().params)
 
     def update_shared_state(
-        self, accounts=None, pending_liquidations=None, done_txs=None
+        self,
+        accounts=None,
+        pending_liquidations=None,
+        done_txs=None,
+        liquidation_candidates=None,
+        timings=None,
+        skip_rate=None,
+        lag=None,
+        read_cache=None,
     ):
         """function to update the internal shared state with the current round, allowing this data to be displayed."""
         self.context.shared_state["state"]["round"] = self.behaviour_id
@@ -79,28 +133,285 @@ class LiquidationStationBaseBehaviour(BaseBehaviour, ABC):
             ] = pending_liquidations
         if done_txs is not None:
             self.context.shared_state["state"]["done_txs"] = done_txs
+        if liquidation_candidates is not None:
+            self.context.shared_state["state"][
+                "liquidation_candidates"
+            ] = liquidation_candidates
+        if timings is not None:
+            self.context.shared_state["state"]["timings"] = timings
+        if skip_rate is not None:
+            self.context.shared_state["state"]["skip_rate"] = skip_rate
+        if lag is not None:
+            self.context.shared_state["state"]["lag"] = lag
+        if read_cache is not None:
+            self.context.shared_state["state"]["read_cache"] = read_cache
+
+    def get_unitroller_state(
+        self, contract_callable: str, **kwargs
+    ) -> Generator[None, None, Optional[dict]]:
+        """
+        Read state through the unitroller contract package, at the block of the period.
 
-    @cached_property
-    def unitroller_contract(self):
-        """
-        Returns the unitroller contract object
-        """
-        infura_api_key = self.context.params.config["infura_api_key"]
-        provider = f"https://polygon-mainnet.infura.io/v3/{infura_api_key}"
-        unitroller_address = "0x8849f1a0cB6b5D6076aB150546EddEe193754F1C"
-        path = (
-            Path.cwd()
-            / "vendor"
-            / "zarathustra"
-            / "contracts"
-            / "unitroller"
-            / "build"
-            / "unitroller.json"
+        The identical reads of a block are served by the read cache.
+        """
+        block_number = self.synchronized_data.period_block
+        body = yield from self.get_cached_contract_state(
+            block_number,
+            block_identifier=block_number,
+            contract_address=UNITROLLER_ADDRESS,
+            contract_id=str(Unitroller.contract_id),
+            contract_callable=contract_callable,
+            **kwargs,
         )
-        abi = json.loads(path.read_text())["abi"]
-        web3 = Web3(Web3.HTTPProvider(provider))
-        contract = web3.eth.contract(address=unitroller_address, abi=abi)
-        return contract
+        if body is None:
+            self.context.logger.error(
+                f"Could not get {contract_callable} from the unitroller."
+            )
+        self.update_shared_state(read_cache=self.context.read_cache.as_dict())
+        return body
+
+    def get_cached_contract_state(
+        self, block_number: int, **kwargs: Any
+    ) -> Generator[None, None, Optional[dict]]:
+        """
+        Make a contract api GET_STATE request, at most once per block.
+
+        A request identical to one in flight waits for its response.
+
+        :param block_number: the block the read is made at.
+        :param kwargs: the arguments of the request.
+        :return: the body of the state, or None if the read failed.
+        """
+        read_cache = self.context.read_cache
+
+        def read() -> Generator[None, None, Optional[dict]]:
+            """Make the request."""
+            contract_api_msg = yield from self.get_contract_api_response(
+                performative=ContractApiMessage.Performative.GET_STATE,  # type: ignore
+                **kwargs,
+            )
+            if contract_api_msg.performative != ContractApiMessage.Performative.STATE:
+                self.context.logger.error(f"Contract api error: {contract_api_msg}")
+                return None
+            return contract_api_msg.state.body
+
+        body = yield from cached_read(
+            read_cache,
+            block_number,
+            read_cache.key(**kwargs),
+            read,
+            self.wait_for_condition,
+        )
+        return body
+
+    def run_in_executor(
+        self, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Generator[None, None, Any]:
+        """
+        Run a blocking call on the chain client threads, yielding until it is done.
+
+        The agent loop keeps handling messages meanwhile.
+
+        :param func: the blocking function.
+        :param args: its positional arguments.
+        :param kwargs: its keyword arguments.
+        :return: the result of the function.
+        :raises Exception: the exception raised by the function.
+        """
+        future = self.context.chain_client.executor.submit(func, *args, **kwargs)
+        yield from self.wait_for_condition(future.done)
+        return future.result()
+
+    def refresh_liquidation_params(self) -> Generator[None, None, bool]:
+        """
+        Read the close factor and liquidation incentive once they are stale.
+
+        :return: whether the profitability engine has liquidation params.
+        """
+        profitability_engine = self.context.profitability_engine
+        block_number = self.synchronized_data.period_block
+        if (
+            profitability_engine.has_params
+            and block_number - profitability_engine.params_block
+            <= profitability_engine.params_max_age
+        ):
+            return True
+        body = yield from self.get_unitroller_state("get_liquidation_params")
+        if body is not None:
+            profitability_engine.update_params(
+                body["close_factor"], body["liquidation_incentive"], block_number
+            )
+        return profitability_engine.has_params
+
+    def get_base_fee(self) -> Generator[None, None, Optional[int]]:
+        """Get the base fee of the block of the period."""
+        web3 = self.context.chain_client.web3
+        block_number = self.synchronized_data.period_block
+        try:
+            block = yield from self.run_in_executor(web3.eth.get_block, block_number)
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Could not get block {block_number}: {e}")
+            return None
+        return block["baseFeePerGas"]
+
+    def get_liquidation_gas_cost(self) -> Generator[None, None, Optional[float]]:
+        """
+        Get the gas cost of a liquidation, in USD, if the native token is priced.
+
+        The gas is priced at the base fee of the block of the period, so that
+        all the agents value the liquidations the same.
+        """
+        health_engine = self.context.health_engine
+        native_market = self.context.params.config["native_market"]
+        if native_market not in health_engine.markets:
+            self.context.logger.error(
+                f"The native market {native_market} is not priced, "
+                "liquidations are skipped until it is."
+            )
+            return None
+        native_price = health_engine.prices[health_engine.markets.index(native_market)]
+        base_fee = yield from self.get_base_fee()
+        if base_fee is None:
+            return None
+        gas = self.context.params.config["liquidation_gas"]
+        return gas * base_fee * native_price / MANTISSA
+
+    def to_native(self, value: float) -> Optional[int]:
+        """Convert a value in USD to wei of the native token, if it is priced."""
+        health_engine = self.context.health_engine
+        native_market = self.context.params.config["native_market"]
+        if native_market not in health_engine.markets:
+            return None
+        native_price = health_engine.prices[health_engine.markets.index(native_market)]
+        if native_price <= 0:
+            return None
+        return int(value * MANTISSA / native_price)
+
+    def get_safe_nonce(self) -> Optional[int]:
+        """Get the nonce of the Safe at the block of the period, blocking, to run on the executor."""
+        try:
+            data = self.context.chain_client.web3.eth.call(
+                {
+                    "to": self.synchronized_data.safe_contract_address,
+                    "data": SAFE_NONCE_SELECTOR,
+                },
+                self.synchronized_data.period_block,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Could not get the nonce of the Safe: {e}")
+            return None
+        return int.from_bytes(data, "big")
+
+    def simulate_multisend(self, calldata: bytes, block_number: int) -> bool:
+        """
+        Whether a multiSend call executes successfully from the Safe, blocking.
+
+        The eth_call is made on the provider directly, as web3 drops the
+        revert data which holds the result of the simulation.
+
+        :param calldata: the calldata of the multiSend call.
+        :param block_number: the block the call is simulated at.
+        :return: whether the call succeeded.
+        """
+        provider = self.context.chain_client.web3.provider
+        call = {
+            "to": self.synchronized_data.safe_contract_address,
+            "data": "0x" + simulate_calldata(MULTISEND_ADDRESS, calldata).hex(),
+        }
+        try:
+            response = provider.make_request("eth_call", [call, hex(block_number)])
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Could not simulate multisend: {e}")
+            return False
+        return simulation_succeeded(response)
+
+    def simulate_multisends(
+        self, calldatas: List[bytes], block_number: int
+    ) -> List[bool]:
+        """
+        Whether each multiSend call executes successfully from the Safe, blocking.
+
+        The simulations are batched in a Multicall3 aggregate3 eth_call which
+        lets each one fail, returning its revert data.
+
+        :param calldatas: the calldata of each multiSend call.
+        :param block_number: the block the calls are simulated at.
+        :return: whether each call succeeded, in order.
+        """
+        web3 = self.context.chain_client.web3
+        call = {
+            "to": self.context.params.config["multicall_address"],
+            "data": aggregate_simulations_calldata(
+                self.synchronized_data.safe_contract_address, calldatas
+            ),
+        }
+        try:
+            data = web3.eth.call(call, block_number)
+            return aggregated_simulations_succeeded(bytes(data))
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Could not simulate multisends: {e}")
+            return [False] * len(calldatas)
+
+    def update_account_snapshots(
+        self, accounts: List[str]
+    ) -> Generator[None, None, bool]:
+        """
+        Read the balances of accounts into the health engine.
+
+        :param accounts: the accounts.
+        :return: whether the balances were read.
+        """
+        body = yield from self.get_unitroller_state(
+            "get_account_snapshots",
+            positions=self.context.position_store.positions(accounts),
+            batch_size=self.context.params.config["liquidity_batch_size"],
+            multicall_address=self.context.params.config["multicall_address"],
+        )
+        if body is None:
+            return False
+        self.context.health_engine.update_snapshots(
+            body["snapshots"], body["block_number"]
+        )
+        return True
+
+    def get_agreed_positions(self) -> Generator[None, None, Optional[List[str]]]:
+        """
+        Get the agreed accounts.
+
+        They are rebuilt from the previous accounts and the agreed delta when
+        the previous accounts are known locally, and read from ipfs otherwise.
+        """
+        root = self.synchronized_data.positions_root
+        if root == EMPTY_ROOT:
+            return []
+        position_sets = self.context.shared_state.setdefault("position_sets", {})
+        if root in position_sets:
+            return position_sets[root]
+        previous_root = self.synchronized_data.previous_positions_root
+        delta = self.synchronized_data.positions_delta
+        if delta is not None and previous_root in position_sets:
+            try:
+                accounts = resolve_positions(
+                    position_sets[previous_root],
+                    PositionSetDelta.deserialize(delta),
+                    root,
+                )
+            except ValueError as e:
+                self.context.logger.error(f"Could not apply the delta: {e}")
+            else:
+                position_sets[root] = accounts
+                return accounts
+        ipfs_hash = self.synchronized_data.positions_ipfs_hash
+        if ipfs_hash is None:
+            return None
+        data = yield from self.get_from_ipfs(ipfs_hash, filetype=SupportedFiletype.JSON)
+        if data is None or merkle_root(data["accounts"]) != root:
+            self.context.logger.error(
+                f"Could not get the accounts of root {root} from {ipfs_hash}."
+            )
+            return None
+        position_sets[root] = sorted_accounts(data["accounts"])
+        return position_sets[root]
 
 
 class CalculatePositionHealthBehaviour(LiquidationStationBaseBehaviour):
@@ -114,17 +425,190 @@ class CalculatePositionHealthBehaviour(LiquidationStationBaseBehaviour):
         self.context.logger.info("CalculatePositionHealthBehaviour: In the behaviour")
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            underwater = yield from self.calculate_position_health()
+            prepared: List[PreparedLiquidation] = []
+            if underwater is not None:
+                self.update_shared_state(
+                    pending_liquidations=[asdict(x) for x in underwater]
+                )
+                prepared = yield from self.prepare_liquidation_txs(underwater)
+            accounts = sorted(x.account for x in underwater or [])
             sender = self.context.agent_address
             payload = CalculatePositionHealthPayload(
                 sender=sender,
+                underwater_accounts=json.dumps(accounts),
             )
 
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
             yield from self.send_a2a_transaction(payload)
+            yield from self.simulate_prepared_liquidations(prepared)
             yield from self.wait_until_round_end()
 
         self.set_done()
 
+    def calculate_position_health(
+        self,
+    ) -> Generator[None, None, Optional[List[AccountLiquidity]]]:
+        """
+        Get the accounts in shortfall, largest shortfall first.
+
+        Every position is valued locally by the health engine with fresh market
+        prices, only the accounts close to shortfall are checked on chain.
+        The accounts are the ones agreed in the CollectPositionsRound, which
+        may differ from the local ones when this agent diverged.
+        """
+        position_store = self.context.position_store
+        health_engine = self.context.health_engine
+        accounts = yield from self.get_agreed_positions()
+        if accounts is None:
+            self.context.logger.warning(
+                "Could not get the agreed accounts, using the local ones."
+            )
+            accounts = position_store.accounts()
+
+        body = yield from self.get_unitroller_state(
+            "get_markets_state",
+            markets=position_store.markets(),
+            multicall_address=self.context.params.config["multicall_address"],
+        )
+        if body is None:
+            return None
+        block_number = body["block_number"]
+        prices = {
+            market: state["price"]
+            for market, state in body["markets"].items()
+            if state is not None
+        }
+        shocked = health_engine.trigger_index.price_shock(prices)
+        health_engine.update_markets(body["markets"])
+        self.context.profitability_engine.update_markets(body["markets"])
+        health_engine.drop(set(health_engine.accounts) - set(accounts))
+
+        updated = position_store.updated_since(
+            block_number - health_engine.snapshot_max_age
+        )
+        stale = health_engine.stale_accounts(accounts, block_number, updated)
+        if stale:
+            refreshed = yield from self.update_account_snapshots(stale)
+            if not refreshed:
+                return None
+
+        health_engine.trigger_index = health_engine.trigger_price_index()
+        # the accounts pushed into shortfall by the price update are confirmed first
+        candidates = list(dict.fromkeys(shocked + health_engine.near_threshold()))
+        self.context.logger.info(
+            f"Valued {len(accounts)} accounts locally, refreshed {len(stale)}, "
+            f"{len(shocked)} past a trigger price, {len(candidates)} close to shortfall."
+        )
+        underwater = yield from self.get_underwater_accounts(candidates)
+        return underwater
+
+    def get_underwater_accounts(
+        self, accounts: List[str]
+    ) -> Generator[None, None, Optional[List[AccountLiquidity]]]:
+        """
+        Get the accounts in shortfall, largest shortfall first.
+
+        The liquidity of all the accounts is read in multicall batches at a
+        single block, instead of one getAccountLiquidity call per account.
+        """
+        if not accounts:
+            return []
+
+        body = yield from self.get_unitroller_state(
+            "get_accounts_liquidity",
+            accounts=accounts,
+            batch_size=self.context.params.config["liquidity_batch_size"],
+            multicall_address=self.context.params.config["multicall_address"],
+        )
+        if body is None:
+            return None
+
+        underwater = rank_by_shortfall(body["accounts_liquidity"])
+        self.context.logger.info(
+            f"Checked {len(accounts)} accounts at block {body['block_number']}, "
+            f"{len(underwater)} in shortfall."
+        )
+        return underwater
+
+    def prepare_liquidation_txs(
+        self, underwater: List[AccountLiquidity]
+    ) -> Generator[None, None, List[PreparedLiquidation]]:
+        """
+        Build in advance the liquidations of the accounts near shortfall.
+
+        The entries of accounts updated since they were built, or built at
+        another Safe nonce, are dropped first. Only the liquidations of the
+        accounts already in shortfall are left to simulate, the most
+        profitable first and at most `max_prepared_simulations` of them, so
+        the ones ready at submission go straight to the bundles.
+
+        :param underwater: the accounts in shortfall.
+        :return: the liquidations to simulate.
+        """
+        tx_cache = self.context.liquidation_tx_cache
+        health_engine = self.context.health_engine
+        has_params = yield from self.refresh_liquidation_params()
+        nonce = yield from self.run_in_executor(self.get_safe_nonce)
+        if not has_params or nonce is None:
+            return []
+        block_number = self.synchronized_data.period_block
+        if tx_cache.oldest_block is not None:
+            updated = self.context.position_store.updated_since(tx_cache.oldest_block)
+            tx_cache.invalidate(updated, nonce)
+
+        gas_cost = yield from self.get_liquidation_gas_cost()
+        if gas_cost is None:
+            return []
+        near = health_engine.near_threshold()
+        candidates = self.context.profitability_engine.candidates(
+            health_engine, near, gas_cost=gas_cost
+        )
+        tx_cache.retain(near)
+        entries = [
+            tx_cache.prepare(candidate, block_number, nonce) for candidate in candidates
+        ]
+        shortfall = {x.account for x in underwater}
+        to_simulate = heapq.nsmallest(
+            self.context.params.config["max_prepared_simulations"],
+            (
+                x
+                for x in entries
+                if x.candidate.account in shortfall
+                and x.simulated_block != block_number
+            ),
+            key=lambda x: x.candidate.priority,
+        )
+        self.context.logger.info(
+            f"{len(tx_cache)} liquidations prepared for {len(near)} accounts close "
+            f"to shortfall, {len(to_simulate)} to simulate, {tx_cache.hits} hits "
+            f"and {tx_cache.misses} misses."
+        )
+        return to_simulate
+
+    def simulate_prepared_liquidations(
+        self, entries: List[PreparedLiquidation]
+    ) -> Generator:
+        """
+        Simulate prepared liquidations at the block of the period, in a single call.
+
+        It runs while the round collects the payloads, so that submission
+        finds the liquidations already simulated.
+
+        :param entries: the liquidations to simulate.
+        """
+        if not entries:
+            return
+        block_number = self.synchronized_data.period_block
+        results = yield from self.run_in_executor(
+            lambda: self.simulate_multisends(
+                [multisend_calldata([x.tx]) for x in entries], block_number
+            )
+        )
+        tx_cache = self.context.liquidation_tx_cache
+        for entry, success in zip(entries, results):
+            tx_cache.record_simulation(entry.candidate.account, block_number, success)
+
 
 class CollectPositionsBehaviour(LiquidationStationBaseBehaviour):
     """CollectPositionsBehaviour"""
@@ -136,28 +620,13 @@ class CollectPositionsBehaviour(LiquidationStationBaseBehaviour):
 
         self.context.logger.info("CollectPositionsBehaviour: In the behaviour")
 
-        ledger_api_response = yield from self.get_ledger_api_response(
-            performative=LedgerApiMessage.Performative.GET_STATE,
-            ledger_callable="get_block",
-            block_identifier="latest",
+        accounts = yield from self.get_open_positions(
+            self.synchronized_data.period_block
         )
-        correct_performative = (
-            ledger_api_response.performative == LedgerApiMessage.Performative.STATE
-        )
-        if not correct_performative or "number" not in ledger_api_response.state.body:
-            self.context.logger.error(f"Could not extract block: {ledger_api_response}")
-            return
-
-        latest_block = ledger_api_response.state.body["number"]  # 41584895
-
-        accounts = self.get_open_positions(latest_block)
         self.update_shared_state(accounts=accounts)
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
-            sender = self.context.agent_address
-            payload = CollectPositionsPayload(
-                sender=sender,
-            )
+            payload = yield from self.get_positions_payload(accounts)
 
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
             yield from self.send_a2a_transaction(payload)
@@ -165,50 +634,103 @@ class CollectPositionsBehaviour(LiquidationStationBaseBehaviour):
 
         self.set_done()
 
-    def get_open_positions(self, latest_block: int) -> List[str]:
+    def get_open_positions(self, latest_block: int) -> Generator[None, None, List[str]]:
         """
         Returns a list of accounts with open positions
-        """
-
-        contract = self.unitroller_contract
-        event_template = contract.events.MarketEntered
-        start_block = latest_block - 10_000
-        INFURA_API_KEY = self.context.params.config["infura_api_key"]
-        provider = f"https://polygon-mainnet.infura.io/v3/{INFURA_API_KEY}"
-        unitroller_address = "0x8849f1a0cB6b5D6076aB150546EddEe193754F1C"
 
-        web3 = Web3(Web3.HTTPProvider(provider))
-        events = web3.eth.get_logs(
-            {
-                "fromBlock": start_block,
-                "toBlock": latest_block,
-                "address": unitroller_address,
-            }
-        )
+        Only the blocks which have not been indexed yet, nor applied from a
+        healthy websocket stream, are fetched, the market memberships they
+        contain are written to the position store before the progress is
+        checkpointed. The logs are fetched and decoded on the chain client
+        threads, the store is only written from the agent loop.
+        """
 
-        def handle_event(event, event_template):
-            return get_event_data(
-                event_template.web3.codec,
-                event_template._get_event_abi(),
-                event,  # pylint: disable=protected-access
+        indexer = self.context.log_indexer
+        position_store = self.context.position_store
+        decoder = self.context.chain_client.decoder
+        log_fetcher = self.context.chain_client.log_fetcher
+
+        def on_error(log: dict, error: Exception) -> None:
+            """Log the logs which could not be decoded."""
+            self.context.logger.error(f"could not parse event data for {log}: {error}")
+
+        def fetch_events(block_range: BlockRange) -> List[MarketEvent]:
+            """Fetch and decode the market events of a block range."""
+            logs = log_fetcher.fetch(
+                block_range,
+                address=[UNITROLLER_ADDRESS],
+                topics=[MARKET_EVENT_TOPICS],
             )
-
-        accounts = []
-        for event in events:
+            return [
+                event
+                for event in decoder.decode_batch(logs, on_error=on_error)
+                if isinstance(event, MarketEvent)
+            ]
+
+        tracker = HeadTracker.from_shared_state(self.context.shared_state)
+        streamed = tracker.streamed_blocks(indexer.max_head_age)
+        for from_block, to_block in indexer.get_block_ranges(latest_block, streamed):
             try:
-                get_event_data(
-                    event_template.web3.codec,
-                    event_template._get_event_abi(),
-                    event,  # pylint: disable=protected-access
+                events = yield from self.run_in_executor(
+                    fetch_events, (from_block, to_block)
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                self.context.logger.error(
+                    f"Could not fetch logs for blocks {from_block}-{to_block}: {e}"
                 )
-                result = handle_event(event=event, event_template=event_template)
-                accounts.append(result["account"])
-            except:
-                # note this fails due to time contraints with streaming events
-                self.context.logger.error(f"could not parse event data for {event}")
+                break
+
+            position_store.apply(events)
+            indexer.update((from_block, to_block))
+            indexer.save()
+        if indexer.skip_streamed(latest_block, streamed):
+            indexer.save()
 
+        accounts = position_store.accounts()
+        self.context.logger.info(
+            f"Indexed blocks {indexer.checkpoint.tail_block}-{indexer.checkpoint.head_block}, "
+            f"found {len(accounts)} accounts."
+        )
         return accounts
 
+    def get_positions_payload(
+        self, accounts: List[str]
+    ) -> Generator[None, None, CollectPositionsPayload]:
+        """
+        Get the payload agreeing on the accounts with positions.
+
+        The payload is of constant size whatever the number of accounts: their
+        merkle root, and the delta against the previously agreed accounts when
+        no more than `positions_max_delta` changed. The full set is published
+        to ipfs, so that an agent missing the previous set can catch up, unless
+        it is the agreed set whose hash is already known.
+        """
+        accounts = sorted_accounts(accounts)
+        root = merkle_root(accounts)
+        previous_root = self.synchronized_data.positions_root
+        previous = yield from self.get_agreed_positions()
+        delta = make_delta(
+            previous, accounts, self.context.params.config["positions_max_delta"]
+        )
+        ipfs_hash = self.synchronized_data.positions_ipfs_hash
+        if root != previous_root or ipfs_hash is None:
+            ipfs_hash = yield from self.send_to_ipfs(
+                os.path.join(self.context.data_dir, f"positions_{root}.json"),
+                {"root": root, "accounts": accounts},
+                filetype=SupportedFiletype.JSON,
+            )
+        position_sets = {root: accounts}
+        if previous is not None:
+            position_sets[previous_root] = previous
+        self.context.shared_state["position_sets"] = position_sets
+        return CollectPositionsPayload(
+            sender=self.context.agent_address,
+            positions_root=root,
+            previous_root=previous_root,
+            positions_delta=delta.serialize() if delta is not None else None,
+            positions_ipfs_hash=ipfs_hash,
+        )
+
 
 class PrepareLiquidationTransactionsBehaviour(LiquidationStationBaseBehaviour):
     """PrepareLiquidationTransactionsBehaviour"""
@@ -223,9 +745,19 @@ class PrepareLiquidationTransactionsBehaviour(LiquidationStationBaseBehaviour):
         self.update_shared_state()
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            candidates = yield from self.get_liquidation_candidates()
+            self.update_shared_state(
+                liquidation_candidates=[asdict(x) for x in candidates]
+            )
             sender = self.context.agent_address
+            # ties in cents are broken by account, whatever the local float order
+            agreed = sorted(
+                (x.quantize() for x in candidates),
+                key=lambda x: (-x["profit"], x["account"]),
+            )
             payload = PrepareLiquidationTransactionsPayload(
                 sender=sender,
+                liquidation_candidates=json.dumps(agreed, sort_keys=True),
             )
 
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
@@ -234,6 +766,43 @@ class PrepareLiquidationTransactionsBehaviour(LiquidationStationBaseBehaviour):
 
         self.set_done()
 
+    def get_liquidation_candidates(
+        self,
+    ) -> Generator[None, None, List[LiquidationCandidate]]:
+        """
+        Get the profitable liquidations, most profitable first.
+
+        The close factor and liquidation incentive are read again once they
+        are older than `params_max_age` blocks, the market state is the one
+        read at the block of the period when the health of the positions was
+        calculated. The balances of the accounts in shortfall are read again at
+        that block, so that every agent sizes their liquidations the same.
+        """
+        profitability_engine = self.context.profitability_engine
+        pending = self.synchronized_data.underwater_accounts
+        if not pending:
+            return []
+        has_params = yield from self.refresh_liquidation_params()
+        if not has_params:
+            return []
+        refreshed = yield from self.update_account_snapshots(pending)
+        if not refreshed:
+            return []
+
+        gas_cost = yield from self.get_liquidation_gas_cost()
+        if gas_cost is None:
+            return []
+        heap = profitability_engine.candidates(
+            self.context.health_engine,
+            pending,
+            gas_cost=gas_cost,
+        )
+        candidates = [heapq.heappop(heap) for _ in range(len(heap))]
+        self.context.logger.info(
+            f"{len(candidates)} of {len(pending)} liquidations are profitable."
+        )
+        return candidates
+
 
 class RegistrationBehaviour(LiquidationStationBaseBehaviour):
     """RegistrationBehaviour"""
@@ -249,6 +818,7 @@ class RegistrationBehaviour(LiquidationStationBaseBehaviour):
             sender = self.context.agent_address
             payload = RegistrationPayload(
                 sender=sender,
+                safe_contract_address=self.synchronized_data.safe_contract_address,
             )
 
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
@@ -267,11 +837,96 @@ class ResetAndPauseBehaviour(LiquidationStationBaseBehaviour):
         """Do the act, supporting asynchronous execution."""
         self.context.logger.info("ResetAndPauseBehaviour: In the behaviour")
         self.update_shared_state()
+        period_count = self.synchronized_data.period_count
+        self.publish_timings(period_count)
+        self.publish_skip_rate()
+        yield from self.wait_for_next_period()
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
             sender = self.context.agent_address
             payload = ResetAndPausePayload(
                 sender=sender,
+                period_count=period_count,
+            )
+
+        with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
+            yield from self.send_a2a_transaction(payload)
+            yield from self.wait_until_round_end()
+
+        self.set_done()
+
+    def publish_timings(self, period_count: int) -> None:
+        """Publish how long the period spent collecting payloads and in consensus."""
+        timings = period_timings(self.context.benchmark_tool.data)
+        self.update_shared_state(timings=timings)
+        self.context.logger.info(
+            f"Period {period_count} spent {timings['collect']:.3f}s collecting "
+            f"and {timings['consensus']:.3f}s in consensus."
+        )
+        self.context.benchmark_tool.save(period_count)
+
+    def wait_for_next_period(self) -> Generator:
+        """
+        Wait for a head newer than the block of the period, or the fallback timer.
+
+        The heads are announced by the newHeads subscription of the
+        contract_subscription skill, so a period starts as soon as a block is
+        produced instead of after a fixed pause.
+        """
+        scheduler = self.context.period_scheduler
+        tracker = HeadTracker.from_shared_state(self.context.shared_state)
+        yield from self.wait_for_condition(lambda: scheduler.is_due(tracker))
+        lag = scheduler.lag(tracker)
+        self.update_shared_state(lag=lag)
+        self.context.logger.info(
+            f"Starting the next period at head {lag['head']}, the period took "
+            f"{lag['period_duration']}s and started {lag['blocks_behind']} "
+            f"blocks behind the head."
+        )
+
+    def publish_skip_rate(self) -> None:
+        """Publish the fraction of the periods which skipped to the reset."""
+        skip_rate = self.context.shared_state.setdefault("skip_rate", SkipRate())
+        skip_rate.record(self.synchronized_data.skipped_round)
+        self.update_shared_state(skip_rate=skip_rate.as_dict())
+        self.context.logger.info(
+            f"{skip_rate.rate:.1%} of {skip_rate.periods} periods skipped: "
+            f"{skip_rate.skipped}"
+        )
+
+
+class SelectBlockBehaviour(LiquidationStationBaseBehaviour):
+    """SelectBlockBehaviour"""
+
+    matching_round: Type[AbstractRound] = SelectBlockRound
+
+    def async_act(self) -> Generator:
+        """Do the act, supporting asynchronous execution."""
+        self.context.logger.info("SelectBlockBehaviour: In the behaviour")
+        self.update_shared_state()
+
+        with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            ledger_api_response = yield from self.get_ledger_api_response(
+                performative=LedgerApiMessage.Performative.GET_STATE,
+                ledger_callable="get_block",
+                block_identifier="latest",
+            )
+            correct_performative = (
+                ledger_api_response.performative == LedgerApiMessage.Performative.STATE
+            )
+            body = ledger_api_response.state.body if correct_performative else {}
+            if "number" not in body:
+                self.context.logger.error(
+                    f"Could not extract block: {ledger_api_response}"
+                )
+                return
+
+            latest_block = body["number"]
+            tracker = HeadTracker.from_shared_state(self.context.shared_state)
+            self.context.period_scheduler.start_period(latest_block, tracker.head)
+            payload = SelectBlockPayload(
+                sender=self.context.agent_address,
+                block_number=latest_block,
             )
 
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
@@ -282,7 +937,12 @@ class ResetAndPauseBehaviour(LiquidationStationBaseBehaviour):
 
 
 class SubmitPositionLiquidationTransactionsBehaviour(LiquidationStationBaseBehaviour):
-    """SubmitPositionLiquidationTransactionsBehaviour"""
+    """
+    SubmitPositionLiquidationTransactionsBehaviour
+
+    Agrees on the signed-off liquidation transactions only: the transaction
+    settlement skill is not composed into this app, so nothing is broadcast.
+    """
 
     matching_round: Type[AbstractRound] = SubmitPositionLiquidationTransactionsRound
 
@@ -294,9 +954,12 @@ class SubmitPositionLiquidationTransactionsBehaviour(LiquidationStationBaseBehav
         self.update_shared_state()
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            bundles = yield from self.get_liquidation_bundles()
+            liquidation_txs = yield from self.get_liquidation_txs(bundles)
             sender = self.context.agent_address
             payload = SubmitPositionLiquidationTransactionsPayload(
                 sender=sender,
+                liquidation_txs=json.dumps(liquidation_txs, sort_keys=True),
             )
 
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
@@ -305,6 +968,144 @@ class SubmitPositionLiquidationTransactionsBehaviour(LiquidationStationBaseBehav
 
         self.set_done()
 
+    def get_liquidation_bundles(
+        self,
+    ) -> Generator[None, None, List[LiquidationBundle]]:
+        """
+        Get the multisend bundles of the profitable liquidations.
+
+        The liquidations are packed in priority order under `max_bundle_gas`,
+        and every bundle is simulated from the Safe, a failing bundle is split
+        until the liquidations which revert are isolated and dropped.
+        """
+        candidates = [
+            LiquidationCandidate.from_quantized(candidate)
+            for candidate in self.synchronized_data.liquidation_candidates
+        ]
+        if not candidates:
+            return []
+        bundles = plan_bundles(
+            candidates,
+            gas_per_liquidation=self.context.params.config["liquidation_gas"],
+            max_bundle_gas=self.context.params.config["max_bundle_gas"],
+        )
+        block_number = self.synchronized_data.period_block
+        nonce = yield from self.run_in_executor(self.get_safe_nonce)
+        bundles, failed = yield from self.run_in_executor(
+            simulate_bundles,
+            bundles,
+            lambda bundle: self.simulate_bundle(bundle, block_number, nonce),
+        )
+        for candidate in failed:
+            self.context.logger.warning(
+                f"Dropping liquidation of {candidate.account}, its simulation failed."
+            )
+        self.context.logger.info(
+            f"Bundled {len(candidates) - len(failed)} liquidations "
+            f"in {len(bundles)} transactions."
+        )
+        return bundles
+
+    def get_liquidation_txs(
+        self, bundles: List[LiquidationBundle]
+    ) -> Generator[None, None, List[dict]]:
+        """
+        Get the multisend transactions of the bundles, with their EIP-1559 fees.
+
+        A bundle bids from its expected profit before gas. The agreed
+        transaction pending at a nonce for more than `stuck_blocks` blocks is
+        replaced with fees bumped by at least the minimum the nodes accept,
+        and the bundles which cannot pay the base fee within their budget are
+        dropped. The nonce, the fee history and the pending fees are all read
+        at the block of the period or from the agreed state, so that every
+        agent bids the same.
+        """
+        fee_oracle = self.context.fee_oracle
+        strategy = fee_oracle.strategy
+        block_number = self.synchronized_data.period_block
+        nonce = yield from self.run_in_executor(self.get_safe_nonce)
+        base_fee = yield from self.get_base_fee()
+        try:
+            yield from self.run_in_executor(fee_oracle.update, block_number)
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Could not update the fee history: {e}")
+        pending_fees = {
+            int(key): (
+                value["block"],
+                Fee(value["max_fee_per_gas"], value["max_priority_fee_per_gas"]),
+            )
+            for key, value in self.synchronized_data.pending_fees.items()
+        }
+        gas_per_liquidation = self.context.params.config["liquidation_gas"]
+
+        liquidation_txs = []
+        for bundle in bundles:
+            liquidation_tx = {
+                "to": MULTISEND_ADDRESS,
+                "data": bundle.calldata.hex(),
+                "operation": int(Operation.DELEGATE_CALL),
+                "gas": bundle.gas,
+                "accounts": [x.account for x in bundle.candidates],
+            }
+            profit = self.to_native(sum(x.profit for x in bundle.candidates))
+            if (
+                profit is None
+                or nonce is None
+                or base_fee is None
+                or fee_oracle.next_base_fee is None
+            ):
+                # without a fee, the settlement uses the node gas price
+                liquidation_txs.append(liquidation_tx)
+                continue
+            # the profits are net of the gas priced at the base fee, the budget is not
+            profit += len(bundle.candidates) * gas_per_liquidation * base_fee
+            tx_nonce = nonce + len(liquidation_txs)
+            next_fee = strategy.next_fee(
+                fee_oracle,
+                profit,
+                bundle.gas,
+                block_number,
+                pending_fees.get(tx_nonce),
+            )
+            if next_fee is None:
+                self.context.logger.warning(
+                    f"Dropping the liquidation of {liquidation_tx['accounts']}, "
+                    f"its fee would exceed its profit at base fee "
+                    f"{fee_oracle.next_base_fee}."
+                )
+                continue
+            fee_block, fee = next_fee
+            liquidation_tx.update(
+                nonce=tx_nonce,
+                fee_block=fee_block,
+                max_fee_per_gas=fee.max_fee_per_gas,
+                max_priority_fee_per_gas=fee.max_priority_fee_per_gas,
+            )
+            liquidation_txs.append(liquidation_tx)
+        return liquidation_txs
+
+    def simulate_bundle(
+        self, bundle: LiquidationBundle, block_number: int, nonce: Optional[int]
+    ) -> bool:
+        """
+        Whether a bundle executes successfully from the Safe, blocking.
+
+        A bundle of liquidations which were all simulated successfully in
+        advance, at the same block and nonce and on unchanged accounts, is not
+        simulated again.
+        """
+        tx_cache = self.context.liquidation_tx_cache
+        if nonce is not None and all(
+            tx_cache.is_ready(x, block_number, nonce, max_age=0)
+            for x in bundle.candidates
+        ):
+            return True
+        success = self.simulate_multisend(bundle.calldata, block_number)
+        if len(bundle.candidates) == 1:
+            account = bundle.candidates[0].account
+            tx_cache.record_simulation(account, block_number, success)
+        return success
+
 
 class LiquidationStationRoundBehaviour(AbstractRoundBehaviour):
     """LiquidationStationRoundBehaviour"""
@@ -317,5 +1118,6 @@ class LiquidationStationRoundBehaviour(AbstractRoundBehaviour):
         PrepareLiquidationTransactionsBehaviour,
         RegistrationBehaviour,
         ResetAndPauseBehaviour,
+        SelectBlockBehaviour,
         SubmitPositionLiquidationTransactionsBehaviour,
     ]
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the EIP-1559 fee oracle and bidding strategy."""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# geth and bor only accept a replacement paying 10% more on both fee fields
+MIN_REPLACEMENT_BUMP = 1.1
+# the shares are applied in basis points, profits in wei exceed float precision
+BASIS_POINTS = 10_000
+
+# (block_count, newest_block, reward_percentiles) -> an eth_feeHistory result
+GetFeeHistory = Callable[[int, Any, List[float]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Fee:
+    """The EIP-1559 fee fields of a transaction, in wei per gas."""
+
+    max_fee_per_gas: int
+    max_priority_fee_per_gas: int
+
+    def cost(self, gas: int, base_fee: int) -> int:
+        """The fee paid by a transaction using `gas` at a base fee, in wei."""
+        tip = min(self.max_priority_fee_per_gas, self.max_fee_per_gas - base_fee)
+        return gas * (base_fee + max(0, tip))
+
+
+def _to_int(value: Any) -> int:
+    """Convert a quantity which may be hex encoded to an int."""
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+class FeeOracle:
+    """
+    Track the base fee and the priority fee percentiles of the recent blocks.
+
+    The history is kept for the last `window` blocks and extended with
+    eth_feeHistory requests covering only the blocks not seen yet. The window
+    always ends at the block it was last updated to, so agents updating to
+    the same block hold the same history.
+    """
+
+    def __init__(
+        self,
+        get_fee_history: GetFeeHistory,
+        window: int = 20,
+        percentiles: Sequence[float] = (25.0, 50.0, 75.0, 90.0),
+    ) -> None:
+        """
+        Initialize the oracle.
+
+        :param get_fee_history: the function making an eth_feeHistory request.
+        :param window: the number of blocks in the rolling window.
+        :param percentiles: the priority fee percentiles requested per block.
+        """
+        if window <= 0:
+            raise ValueError("The window must hold at least one block.")
+        self.get_fee_history = get_fee_history
+        self.window = window
+        self.percentiles = list(percentiles)
+        self.blocks: Deque[Tuple[int, int, Tuple[int, ...]]] = deque(maxlen=window)
+        self.next_base_fee: Optional[int] = None
+
+    @property
+    def newest_block(self) -> Optional[int]:
+        """The newest block of the window."""
+        return self.blocks[-1][0] if self.blocks else None
+
+    def update(self, latest_block: int) -> int:
+        """
+        Add the blocks up to the latest one to the window.
+
+        :param latest_block: the number of the latest block.
+        :return: the number of blocks added.
+        """
+        newest = self.newest_block
+        if newest is not None and latest_block < newest:
+            self.blocks.clear()
+            newest = None
+        count = self.window
+        if newest is not None:
+            count = min(self.window, latest_block - newest)
+        if count <= 0:
+            return 0
+        history = self.get_fee_history(count, latest_block, self.percentiles)
+        oldest = _to_int(history["oldestBlock"])
+        base_fees = [_to_int(x) for x in history["baseFeePerGas"]]
+        rewards = history.get("reward") or [[]] * (len(base_fees) - 1)
+        for offset, reward in enumerate(rewards):
+            self.blocks.append(
+                (oldest + offset, base_fees[offset], tuple(_to_int(x) for x in reward))
+            )
+        # the last base fee is the one of the block after the newest
+        self.next_base_fee = base_fees[-1]
+        return len(rewards)
+
+    def base_fee(self, percentile: float = 50.0) -> int:
+        """A percentile of the base fee over the window."""
+        return int(np.percentile([block[1] for block in self.blocks], percentile))
+
+    def priority_fee(self, percentile: float = 50.0) -> int:
+        """
+        The median, over the window, of a priority fee percentile of the blocks.
+
+        :param percentile: one of the requested percentiles.
+        :return: the priority fee, in wei per gas.
+        """
+        column = self.percentiles.index(percentile)
+        rewards = [block[2][column] for block in self.blocks if block[2]]
+        return int(np.median(rewards)) if rewards else 0
+
+
+class FeeStrategy:
+    """
+    Bid for the inclusion of a liquidation from its expected profit.
+
+    At most `profit_share` of the profit is spent on fees. Of what is left
+    once the next base fee is paid, `tip_share` is bid as priority fee, or the
+    market priority fee when it is higher and affordable, since liquidations
+    race for the same block. The max fee leaves room for the base fee to
+    double, and stays under the budget divided by `bump`, so that a stuck
+    liquidation can always be replaced at least once.
+    """
+
+    def __init__(
+        self,
+        profit_share: float = 0.5,
+        tip_share: float = 0.5,
+        percentile: float = 75.0,
+        bump: float = 1.125,
+        stuck_blocks: int = 3,
+    ) -> None:
+        """
+        Initialize the strategy.
+
+        :param profit_share: the maximum share of the profit spent on fees.
+        :param tip_share: the share of the budget above the base fee bid as tip.
+        :param percentile: the market priority fee percentile to at least match.
+        :param bump: the factor the fees of a stuck transaction are raised by.
+        :param stuck_blocks: the blocks after which a pending transaction is stuck.
+        """
+        if bump < MIN_REPLACEMENT_BUMP:
+            raise ValueError(f"A replacement must bump fees by {MIN_REPLACEMENT_BUMP}.")
+        self.profit_share = profit_share
+        self.tip_share = tip_share
+        self.percentile = percentile
+        self.bump = bump
+        self.stuck_blocks = stuck_blocks
+
+    def budget(self, profit: int, gas: int) -> int:
+        """The most a transaction may pay per gas, from its profit in wei."""
+        share = round(self.profit_share * BASIS_POINTS)
+        return profit * share // BASIS_POINTS // gas
+
+    def bid(self, oracle: FeeOracle, profit: int, gas: int) -> Optional[Fee]:
+        """
+        Get the fee of a liquidation.
+
+        :param oracle: the fee oracle.
+        :param profit: the expected profit, in wei of the native token.
+        :param gas: the gas of the transaction.
+        :return: the fee, or None if the base fee alone exceeds the budget.
+        """
+        if oracle.next_base_fee is None:
+            return None
+        base_fee = oracle.next_base_fee
+        budget = self.budget(profit, gas)
+        budget = budget * BASIS_POINTS // round(self.bump * BASIS_POINTS)
+        headroom = budget - base_fee
+        if headroom <= 0:
+            return None
+        market_tip = oracle.priority_fee(self.percentile)
+        tip_share = round(self.tip_share * BASIS_POINTS)
+        tip = min(headroom, max(market_tip, headroom * tip_share // BASIS_POINTS))
+        max_fee = min(budget, 2 * base_fee + tip)
+        return Fee(max_fee_per_gas=max_fee, max_priority_fee_per_gas=tip)
+
+    def is_stuck(self, sent_block: int, current_block: int) -> bool:
+        """Whether a transaction sent at a block should be replaced."""
+        return current_block - sent_block >= self.stuck_blocks
+
+    def replace(
+        self, oracle: FeeOracle, previous: Fee, profit: int, gas: int
+    ) -> Optional[Fee]:
+        """
+        Get the fee replacing a stuck transaction.
+
+        Both fields are raised by at least `bump`, as the nodes require, or
+        to the current bid when it is higher.
+
+        :param oracle: the fee oracle.
+        :param previous: the fee of the stuck transaction.
+        :param profit: the expected profit, in wei of the native token.
+        :param gas: the gas of the transaction.
+        :return: the fee, or None if a valid replacement exceeds the budget.
+        """
+        bump = round(self.bump * BASIS_POINTS)
+        tip = -(-previous.max_priority_fee_per_gas * bump // BASIS_POINTS)
+        max_fee = -(-previous.max_fee_per_gas * bump // BASIS_POINTS)
+        current = self.bid(oracle, profit, gas)
+        if current is not None:
+            tip = max(tip, current.max_priority_fee_per_gas)
+            max_fee = max(max_fee, current.max_fee_per_gas)
+        max_fee = max(max_fee, tip)
+        if max_fee > self.budget(profit, gas):
+            return None
+        return Fee(max_fee_per_gas=max_fee, max_priority_fee_per_gas=tip)
+
+    def next_fee(
+        self,
+        oracle: FeeOracle,
+        profit: int,
+        gas: int,
+        block_number: int,
+        pending: Optional[Tuple[int, Fee]] = None,
+    ) -> Optional[Tuple[int, Fee]]:
+        """
+        Get the fee of the transaction at a nonce, and the block it was set at.
+
+        The transaction pending at the nonce keeps its fee until it is stuck,
+        when it is replaced, a new transaction bids from its profit.
+
+        :param oracle: the fee oracle.
+        :param profit: the expected profit, in wei of the native token.
+        :param gas: the gas of the transaction.
+        :param block_number: the current block.
+        :param pending: the block and fee of the transaction pending at the nonce.
+        :return: the block and fee, or None if the fee exceeds the budget.
+        """
+        if pending is not None and not self.is_stuck(pending[0], block_number):
+            return pending
+        if pending is not None:
+            fee = self.replace(oracle, pending[1], profit, gas)
+        else:
+            fee = self.bid(oracle, profit, gas)
+        return None if fee is None else (block_number, fee)
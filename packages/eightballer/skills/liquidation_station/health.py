@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the position health helpers of the liquidation_station skill."""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NO_ERROR = 0
+MANTISSA = 1e18
+
+
+@dataclass(frozen=True)
+class AccountLiquidity:
+    """The liquidity of an account as reported by the comptroller."""
+
+    account: str
+    liquidity: int
+    shortfall: int
+
+
+def rank_by_shortfall(
+    accounts_liquidity: Dict[str, Optional[Sequence[int]]]
+) -> List[AccountLiquidity]:
+    """
+    Get the accounts in shortfall, largest shortfall first.
+
+    :param accounts_liquidity: mapping of account to (error, liquidity, shortfall),
+        or None if the call failed.
+    :return: the accounts which can be liquidated.
+    """
+    underwater = []
+    for account, result in accounts_liquidity.items():
+        if result is None:
+            continue
+        error, liquidity, shortfall = result
+        if error == NO_ERROR and shortfall > 0:
+            underwater.append(AccountLiquidity(account, liquidity, shortfall))
+    return sorted(underwater, key=lambda x: (-x.shortfall, x.account))
+
+
+class HealthEngine:  # pylint: disable=too-many-instance-attributes
+    """
+    Local mirror of the book, to value every position without the comptroller.
+
+    The oToken and borrow balances are kept in (accounts x markets) matrices
+    and the market state in vectors, so that the health factor of every
+    account, its risk adjusted collateral over its borrows, is computed in a
+    single vectorized pass. An account with a health factor below one is in
+    shortfall.
+    """
+
+    def __init__(self, confirm_margin: float = 0.05, snapshot_max_age: int = 1800):
+        """
+        Initialize the engine.
+
+        :param confirm_margin: accounts with a health factor below 1 + margin are
+            returned to be confirmed on chain.
+        :param snapshot_max_age: the number of blocks after which the balances
+            of an account are read again.
+        """
+        self.confirm_margin = confirm_margin
+        self.snapshot_max_age = snapshot_max_age
+        self.accounts: List[str] = []
+        self.markets: List[str] = []
+        self._account_index: Dict[str, int] = {}
+        self._market_index: Dict[str, int] = {}
+        self._o_token_balances = np.zeros((0, 0))
+        self._borrow_balances = np.zeros((0, 0))
+        self._snapshot_blocks = np.zeros(0, dtype=np.int64)
+        self.collateral_factors = np.zeros(0)
+        self.exchange_rates = np.zeros(0)
+        self.prices = np.zeros(0)
+        self.trigger_index = TriggerPriceIndex(self.accounts)
+
+    @property
+    def o_token_balances(self) -> np.ndarray:
+        """The oToken balances, one row per account and one column per market."""
+        return self._o_token_balances[: len(self.accounts), : len(self.markets)]
+
+    @property
+    def borrow_balances(self) -> np.ndarray:
+        """The borrow balances, one row per account and one column per market."""
+        return self._borrow_balances[: len(self.accounts), : len(self.markets)]
+
+    def position(self, account: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the oToken and borrow balances of an account, one per market."""
+        row = self._account_index.get(account)
+        if row is None:
+            return np.zeros(len(self.markets)), np.zeros(len(self.markets))
+        return self.o_token_balances[row], self.borrow_balances[row]
+
+    def _grow(self, n_accounts: int, n_markets: int) -> None:
+        """Make room for at least that many accounts and markets."""
+        rows, cols = self._o_token_balances.shape
+        if n_accounts <= rows and n_markets <= cols:
+            return
+        # double the capacity, so that adding accounts is amortized O(markets)
+        new_rows = rows if n_accounts <= rows else max(n_accounts, 2 * rows)
+        new_cols = cols if n_markets <= cols else max(n_markets, 2 * cols)
+        for name in ("_o_token_balances", "_borrow_balances"):
+            grown = np.zeros((new_rows, new_cols))
+            grown[:rows, :cols] = getattr(self, name)
+            setattr(self, name, grown)
+        snapshot_blocks = np.full(new_rows, -1, dtype=np.int64)
+        snapshot_blocks[:rows] = self._snapshot_blocks
+        self._snapshot_blocks = snapshot_blocks
+        for name in ("collateral_factors", "exchange_rates", "prices"):
+            grown = np.zeros(new_cols)
+            grown[:cols] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def _account(self, account: str) -> int:
+        """Get the row of an account, adding it if needed."""
+        index = self._account_index.get(account)
+        if index is None:
+            index = len(self.accounts)
+            self._grow(index + 1, len(self.markets))
+            self.accounts.append(account)
+            self._account_index[account] = index
+        return index
+
+    def _market(self, market: str) -> int:
+        """Get the column of a market, adding it if needed."""
+        index = self._market_index.get(market)
+        if index is None:
+            index = len(self.markets)
+            self._grow(len(self.accounts), index + 1)
+            self.markets.append(market)
+            self._market_index[market] = index
+        return index
+
+    def update_markets(self, markets: Dict[str, Optional[Dict[str, int]]]) -> None:
+        """Set the collateral factor, exchange rate and price mantissas of markets."""
+        for market, state in markets.items():
+            if state is None:
+                continue
+            index = self._market(market)
+            self.collateral_factors[index] = state["collateral_factor"] / MANTISSA
+            self.exchange_rates[index] = state["exchange_rate"] / MANTISSA
+            self.prices[index] = state["price"] / MANTISSA
+
+    def update_prices(self, prices: Dict[str, int]) -> None:
+        """Set the oracle price mantissas of markets."""
+        for market, price in prices.items():
+            self.prices[self._market(market)] = price / MANTISSA
+
+    def update_snapshots(
+        self, snapshots: Dict[str, Dict[str, Sequence[int]]], block_number: int
+    ) -> None:
+        """
+        Replace the balances of accounts.
+
+        :param snapshots: mapping of account to market to (oToken balance, borrow balance).
+        :param block_number: the block the balances were read at.
+        """
+        for account, balances in snapshots.items():
+            row = self._account(account)
+            self._o_token_balances[row, :] = 0
+            self._borrow_balances[row, :] = 0
+            for market, (o_token_balance, borrow_balance) in balances.items():
+                col = self._market(market)
+                self._o_token_balances[row, col] = o_token_balance
+                self._borrow_balances[row, col] = borrow_balance
+            self._snapshot_blocks[row] = block_number
+
+    def drop(self, accounts: Iterable[str]) -> None:
+        """Clear the balances of accounts which no longer have positions."""
+        for account in accounts:
+            row = self._account_index.get(account)
+            if row is not None:
+                self._o_token_balances[row, :] = 0
+                self._borrow_balances[row, :] = 0
+
+    def stale_accounts(
+        self,
+        accounts: Iterable[str],
+        block_number: int,
+        updated: Optional[Dict[str, int]] = None,
+    ) -> List[str]:
+        """
+        Get the accounts whose balances are missing or too old.
+
+        :param accounts: the accounts to check.
+        :param block_number: the current block.
+        :param updated: mapping of account to the block of its last event, an
+            account with an event after its snapshot is stale.
+        :return: the stale accounts.
+        """
+        updated = updated or {}
+        stale = []
+        for account in accounts:
+            row = self._account_index.get(account)
+            if (
+                row is None
+                or self._snapshot_blocks[row] < 0
+                or block_number - self._snapshot_blocks[row] > self.snapshot_max_age
+                or updated.get(account, -1) > self._snapshot_blocks[row]
+            ):
+                stale.append(account)
+        return stale
+
+    def health_factors(self) -> np.ndarray:
+        """Get the health factor of every account, infinite without borrows."""
+        collateral_value = self.exchange_rates * self.collateral_factors * self.prices
+        collateral = self.o_token_balances @ collateral_value[: len(self.markets)]
+        borrows = self.borrow_balances @ self.prices[: len(self.markets)]
+        health = np.full(len(self.accounts), np.inf)
+        np.divide(collateral, borrows, out=health, where=borrows > 0)
+        return health
+
+    def below(self, threshold: float) -> List[str]:
+        """Get the accounts with a health factor below a threshold, lowest first."""
+        health = self.health_factors()
+        (rows,) = np.nonzero(health < threshold)
+        rows = rows[np.argsort(health[rows], kind="stable")]
+        return [self.accounts[row] for row in rows]
+
+    def near_threshold(self) -> List[str]:
+        """Get the accounts which are in, or close to, shortfall, lowest first."""
+        return self.below(1 + self.confirm_margin)
+
+    def trigger_price_index(self, threshold: float = 1.0) -> "TriggerPriceIndex":
+        """
+        Get the price of every market which would bring each account to a health factor.
+
+        Solving `(C - k p0 + k p) / (B - b p0 + b p) = threshold` for the price
+        `p` of one market, where C and B are the risk adjusted collateral and
+        the borrows of the account, and k and b its collateral and borrow per
+        unit of price in that market.
+
+        :param threshold: the health factor to compute the trigger prices for.
+        :return: the index of the trigger prices.
+        """
+        collateral_value = (self.exchange_rates * self.collateral_factors)[
+            : len(self.markets)
+        ]
+        prices = self.prices[: len(self.markets)]
+        o_token_balances, borrow_balances = self.o_token_balances, self.borrow_balances
+        collateral = o_token_balances @ (collateral_value * prices)
+        borrows = borrow_balances @ prices
+
+        index = TriggerPriceIndex(self.accounts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for col, market in enumerate(self.markets):
+                per_unit = o_token_balances[:, col] * collateral_value[col]
+                per_unit -= threshold * borrow_balances[:, col]
+                rest = threshold * borrows - collateral + per_unit * prices[col]
+                # the health is below threshold when per_unit * p < rest
+                triggers = rest / per_unit
+                falls = np.nonzero((per_unit > 0) & (triggers > 0))[0]
+                rises = np.nonzero(per_unit < 0)[0]
+                index.add_market(
+                    market,
+                    falls=(triggers[falls], falls),
+                    rises=(np.maximum(triggers[rises], 0), rises),
+                )
+        return index
+
+
+class TriggerPriceIndex:
+    """
+    The oracle prices at which accounts fall into shortfall, sorted per market.
+
+    An account whose collateral outweighs its borrows in a market becomes
+    liquidatable when the price of that market falls below its trigger, the
+    others when it rises above it. Each trigger assumes all the other prices
+    unchanged, so a price update is turned into the accounts it pushes into
+    shortfall with a binary search per market rather than a pass over the book.
+    """
+
+    def __init__(self, accounts: Sequence[str]) -> None:
+        """Initialize the index."""
+        self.accounts = list(accounts)
+        self._falls: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._rises: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def markets(self) -> List[str]:
+        """The markets in the index."""
+        return list(self._falls)
+
+    def add_market(
+        self,
+        market: str,
+        falls: Tuple[np.ndarray, np.ndarray],
+        rises: Tuple[np.ndarray, np.ndarray],
+    ) -> None:
+        """
+        Add the trigger prices of a market.
+
+        :param market: the market.
+        :param falls: the trigger prices and account rows of the accounts
+            liquidatable below their trigger.
+        :param rises: the trigger prices and account rows of the accounts
+            liquidatable above their trigger.
+        """
+        for side, (triggers, rows) in ((self._falls, falls), (self._rises, rises)):
+            order = np.argsort(triggers, kind="stable")
+            side[market] = (triggers[order], rows[order])
+
+    def liquidatable(self, market: str, price: int) -> List[str]:
+        """
+        Get the accounts in shortfall at a price of a market, furthest first.
+
+        :param market: the market.
+        :param price: the oracle price mantissa.
+        :return: the accounts past their trigger price.
+        """
+        if market not in self._falls:
+            return []
+        price = price / MANTISSA
+        triggers, rows = self._falls[market]
+        falls = rows[np.searchsorted(triggers, price, side="right") :][::-1]
+        triggers, rows = self._rises[market]
+        rises = rows[: np.searchsorted(triggers, price, side="left")]
+        return [self.accounts[row] for row in np.concatenate([falls, rises])]
+
+    def price_shock(self, prices: Dict[str, int]) -> List[str]:
+        """
+        Get the accounts in shortfall after a price update.
+
+        :param prices: mapping of market to its new oracle price mantissa.
+        :return: the accounts past a trigger price, without duplicates.
+        """
+        accounts: Dict[str, None] = {}
+        for market, price in prices.items():
+            accounts.update(dict.fromkeys(self.liquidatable(market, price)))
+        return list(accounts)
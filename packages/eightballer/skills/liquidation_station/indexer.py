@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the incremental log indexer of the liquidation_station skill."""
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+BlockRange = Tuple[int, int]
+
+
+@dataclass
+class IndexerCheckpoint:
+    """
+    The block window which has been fully indexed.
+
+    Both bounds are inclusive. `head_block` moves forward as new blocks are
+    confirmed, `tail_block` moves backwards as the history is backfilled.
+    """
+
+    head_block: Optional[int] = None
+    tail_block: Optional[int] = None
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether nothing has been indexed yet."""
+        return self.head_block is None or self.tail_block is None
+
+
+class BlockRangeIndexer:
+    """
+    Plan and record the block ranges to fetch logs for.
+
+    Only blocks which are `confirmations` deep are ever indexed so that the
+    results do not have to be unwound on a reorg. Every period the indexer
+    hands out the new confirmed blocks, in chunks of at most `chunk_size`,
+    followed by a single chunk of history below the tail, until
+    `start_block` is reached. The blocks whose events were applied from the
+    websocket stream are skipped, only the gap before the stream is fetched.
+    """
+
+    def __init__(
+        self,
+        checkpoint_path: Path,
+        start_block: int = 0,
+        chunk_size: int = 10_000,
+        backfill_chunk_size: int = 10_000,
+        confirmations: int = 12,
+    ) -> None:
+        """Initialize the indexer."""
+        if chunk_size <= 0 or backfill_chunk_size <= 0:
+            raise ValueError("Chunk sizes must be positive.")
+        if confirmations < 0:
+            raise ValueError("Confirmations cannot be negative.")
+        self.checkpoint_path = Path(checkpoint_path)
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.backfill_chunk_size = backfill_chunk_size
+        self.confirmations = confirmations
+        self.checkpoint = IndexerCheckpoint()
+
+    @property
+    def backfill_done(self) -> bool:
+        """Whether the whole history down to `start_block` has been indexed."""
+        tail = self.checkpoint.tail_block
+        return tail is not None and tail <= self.start_block
+
+    def load(self) -> None:
+        """Load the checkpoint from disk, if one exists."""
+        if not self.checkpoint_path.exists():
+            return
+        data = json.loads(self.checkpoint_path.read_text())
+        self.checkpoint = IndexerCheckpoint(**data)
+
+    def save(self) -> None:
+        """Atomically write the checkpoint to disk."""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(self.checkpoint)))
+        tmp_path.replace(self.checkpoint_path)
+
+    def safe_head(self, latest_block: int) -> int:
+        """The highest block considered final."""
+        return latest_block - self.confirmations
+
+    def rewind(self, latest_block: int) -> bool:
+        """
+        Move the head back if the chain is now shorter than what was indexed.
+
+        :param latest_block: the latest block reported by the provider.
+        :return: whether the checkpoint was rewound.
+        """
+        safe_head = self.safe_head(latest_block)
+        checkpoint = self.checkpoint
+        if checkpoint.is_empty or checkpoint.head_block <= safe_head:
+            return False
+        checkpoint.head_block = max(safe_head, checkpoint.tail_block - 1)
+        return True
+
+    def get_block_ranges(
+        self, latest_block: int, streamed: Optional[BlockRange] = None
+    ) -> List[BlockRange]:
+        """
+        Get the block ranges to fetch in the current period.
+
+        :param latest_block: the latest block reported by the provider.
+        :param streamed: the blocks applied from the stream, if it is healthy.
+        :return: the forward ranges, in ascending order, then the backfill range.
+        """
+        safe_head = self.safe_head(latest_block)
+        if safe_head < self.start_block:
+            return []
+        if self.checkpoint.is_empty:
+            # nothing indexed yet, history is picked up by the backfill
+            self.checkpoint.head_block = safe_head
+            self.checkpoint.tail_block = safe_head + 1
+        self.rewind(latest_block)
+        head = self.checkpoint.head_block
+        tail = self.checkpoint.tail_block
+
+        to_block = safe_head if streamed is None else min(safe_head, streamed[0] - 1)
+        ranges = list(split_block_range(head + 1, to_block, self.chunk_size))
+        if not self.backfill_done:
+            from_block = max(self.start_block, tail - self.backfill_chunk_size)
+            ranges.append((from_block, tail - 1))
+        return ranges
+
+    def skip_streamed(self, latest_block: int, streamed: Optional[BlockRange]) -> bool:
+        """
+        Move the head over the blocks applied from the stream.
+
+        The head only moves once the blocks before the stream are indexed,
+        so that the window never contains gaps.
+
+        :param latest_block: the latest block reported by the provider.
+        :param streamed: the blocks applied from the stream, if it is healthy.
+        :return: whether the head moved.
+        """
+        checkpoint = self.checkpoint
+        if streamed is None or checkpoint.is_empty:
+            return False
+        stream_from, confirmed_block = streamed
+        head = min(self.safe_head(latest_block), confirmed_block)
+        if checkpoint.head_block + 1 < stream_from or head <= checkpoint.head_block:
+            return False
+        checkpoint.head_block = head
+        return True
+
+    def update(self, block_range: BlockRange) -> None:
+        """
+        Record that a block range has been fetched.
+
+        Ranges which are not adjacent to the indexed window are ignored, so
+        that the window never contains gaps.
+
+        :param block_range: the inclusive block range that was fetched.
+        """
+        from_block, to_block = block_range
+        checkpoint = self.checkpoint
+        if from_block == checkpoint.head_block + 1:
+            checkpoint.head_block = to_block
+        elif to_block == checkpoint.tail_block - 1:
+            checkpoint.tail_block = from_block
+
+
+def split_block_range(
+    from_block: int, to_block: int, chunk_size: int
+) -> Iterable[BlockRange]:
+    """Split an inclusive block range in chunks of at most `chunk_size` blocks."""
+    for start in range(from_block, to_block + 1, chunk_size):
+        yield start, min(start + chunk_size - 1, to_block)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the concurrent log fetcher of the liquidation_station skill."""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from packages.eightballer.skills.liquidation_station.indexer import (
+    BlockRange,
+    split_block_range,
+)
+
+# the error messages of the providers when a query matches too many logs
+TOO_MANY_RESULTS = (
+    "query returned more than",
+    "log response size exceeded",
+    "response size exceeded",
+    "too many results",
+    "block range is too wide",
+)
+
+Log = Dict[str, Any]
+GetLogs = Callable[[Dict[str, Any]], Sequence[Log]]
+
+
+def is_too_many_results(error: Exception) -> bool:
+    """Whether an error means that the block range of a query must be reduced."""
+    message = str(error).lower()
+    return any(pattern in message for pattern in TOO_MANY_RESULTS)
+
+
+class LogFetcher:
+    """
+    Fetch the logs of a block range with concurrent eth_getLogs requests.
+
+    The range is split in chunks of `chunk_size` blocks, of which at most
+    `max_in_flight` are requested at once. A chunk rejected by the provider
+    for matching too many logs is split in two and retried, down to a single
+    block.
+    """
+
+    def __init__(
+        self, get_logs: GetLogs, chunk_size: int = 2_000, max_in_flight: int = 4
+    ) -> None:
+        """
+        Initialize the fetcher.
+
+        :param get_logs: the function making an eth_getLogs request from a filter.
+        :param chunk_size: the number of blocks requested at once.
+        :param max_in_flight: the maximum number of concurrent requests.
+        """
+        if chunk_size <= 0 or max_in_flight <= 0:
+            raise ValueError("Chunk size and requests in flight must be positive.")
+        self.get_logs = get_logs
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.splits = 0
+
+    def fetch(
+        self,
+        block_range: BlockRange,
+        address: Optional[Sequence[str]] = None,
+        topics: Optional[Sequence[Any]] = None,
+    ) -> List[Log]:
+        """
+        Fetch the logs of an inclusive block range.
+
+        :param block_range: the first and last block.
+        :param address: the contracts emitting the logs.
+        :param topics: the topic filter, per topic position.
+        :return: the logs, ordered by block number and log index.
+        :raises Exception: the first error which is not solved by splitting.
+        """
+        log_filter: Dict[str, Any] = {}
+        if address is not None:
+            log_filter["address"] = list(address)
+        if topics is not None:
+            log_filter["topics"] = list(topics)
+
+        pending = list(split_block_range(*block_range, self.chunk_size))
+        logs: List[Log] = []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight: Dict[Future, BlockRange] = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_in_flight:
+                    chunk = pending.pop(0)
+                    query = {**log_filter, "fromBlock": chunk[0], "toBlock": chunk[1]}
+                    in_flight[executor.submit(self.get_logs, query)] = chunk
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    from_block, to_block = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        logs.extend(future.result())
+                        continue
+                    if not is_too_many_results(error) or from_block == to_block:
+                        for other in in_flight:
+                            other.cancel()
+                        raise error
+                    middle = (from_block + to_block) // 2
+                    pending[:0] = [(from_block, middle), (middle + 1, to_block)]
+                    self.splits += 1
+        return sorted(logs, key=_log_position)
+
+
+def _log_position(log: Log) -> tuple:
+    """The position of a log in the chain."""
+    return log["blockNumber"], log["logIndex"]
@@ -19,9 +19,46 @@
 
 """This module contains the shared state for the abci skill of LiquidationStationAbciApp."""
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+from aea.exceptions import enforce
+from aea.skills.base import Model
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+from packages.eightballer.skills.contract_subscription.events import (
+    PositionEventDecoder,
+)
+from packages.eightballer.skills.contract_subscription.position_store import (
+    PositionStore as BasePositionStore,
+)
+from packages.eightballer.skills.liquidation_station.fees import (
+    FeeOracle as BaseFeeOracle,
+)
+from packages.eightballer.skills.liquidation_station.fees import FeeStrategy
+from packages.eightballer.skills.liquidation_station.health import (
+    HealthEngine as BaseHealthEngine,
+)
+from packages.eightballer.skills.liquidation_station.indexer import BlockRangeIndexer
+from packages.eightballer.skills.liquidation_station.log_fetcher import LogFetcher
+from packages.eightballer.skills.liquidation_station.profitability import (
+    ProfitabilityEngine as BaseProfitabilityEngine,
+)
 from packages.eightballer.skills.liquidation_station.rounds import (
+    Event,
     LiquidationStationAbciApp,
 )
+from packages.eightballer.skills.liquidation_station.scheduler import (
+    PeriodScheduler as BasePeriodScheduler,
+)
+from packages.eightballer.skills.liquidation_station.tx_cache import (
+    LiquidationTxCache as BaseLiquidationTxCache,
+)
+from packages.eightballer.skills.read_cache.models import ReadCache as BaseReadCache
 from packages.valory.skills.abstract_round_abci.models import BaseParams
 from packages.valory.skills.abstract_round_abci.models import (
     BenchmarkTool as BaseBenchmarkTool,
@@ -31,13 +68,241 @@ from packages.valory.skills.abstract_round_abci.models import (
     SharedState as BaseSharedState,
 )
 
+UNITROLLER_ADDRESS = "0x8849f1a0cB6b5D6076aB150546EddEe193754F1C"
+
 
 class SharedState(BaseSharedState):
     """Keep the current shared state of the skill."""
 
     abci_app_cls = LiquidationStationAbciApp
 
+    def setup(self) -> None:
+        """Set up."""
+        super().setup()
+        # the gas of the liquidations is priced in the native market
+        enforce(
+            self.context.params.config.get("native_market") is not None,
+            "`native_market` must be set in `models.params.args` of the "
+            "liquidation_station skill.",
+        )
+        LiquidationStationAbciApp.event_to_timeout[
+            Event.ROUND_TIMEOUT
+        ] = self.context.params.round_timeout_seconds
+        LiquidationStationAbciApp.event_to_timeout[
+            Event.RESET_TIMEOUT
+        ] = self.context.params.reset_pause_duration
+
+
+class LogIndexer(Model, BlockRangeIndexer):
+    """
+    Keep track of the unitroller logs which have been indexed across periods.
+
+    The stream counts as healthy while a head was received in the last
+    `max_head_age` seconds.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the indexer."""
+        checkpoint_file = kwargs.pop("checkpoint_file", "log_indexer.json")
+        start_block = kwargs.pop("start_block", 0)
+        chunk_size = kwargs.pop("chunk_size", 10_000)
+        backfill_chunk_size = kwargs.pop("backfill_chunk_size", 10_000)
+        confirmations = kwargs.pop("confirmations", 12)
+        self.max_head_age = kwargs.pop("max_head_age", 60)
+        Model.__init__(self, **kwargs)
+        BlockRangeIndexer.__init__(
+            self,
+            checkpoint_path=Path(checkpoint_file),
+            start_block=start_block,
+            chunk_size=chunk_size,
+            backfill_chunk_size=backfill_chunk_size,
+            confirmations=confirmations,
+        )
+
+    def setup(self) -> None:
+        """Resume from the last checkpoint."""
+        if not self.checkpoint_path.is_absolute():
+            self.checkpoint_path = Path(self.context.data_dir) / self.checkpoint_path
+        self.load()
+        self.context.logger.info(
+            f"Log indexer resumed with head={self.checkpoint.head_block} "
+            f"tail={self.checkpoint.tail_block}"
+        )
+
+
+class PositionStore(Model, BasePositionStore):
+    """Keep the market memberships of the borrowers on disk across restarts."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the store."""
+        database_file = kwargs.pop("database_file", "positions.db")
+        Model.__init__(self, **kwargs)
+        BasePositionStore.__init__(self, path=Path(database_file))
+
+    def setup(self) -> None:
+        """Open the database."""
+        if not self.path.is_absolute():
+            self.path = Path(self.context.data_dir) / self.path
+        self.context.logger.info(
+            f"Position store opened at {self.path} with {len(self)} accounts"
+        )
+
+    def teardown(self) -> None:
+        """Close the database."""
+        self.close()
+
+
+class HealthEngine(Model, BaseHealthEngine):
+    """Keep the local mirror of the book used to value positions across periods."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the engine."""
+        confirm_margin = kwargs.pop("confirm_margin", 0.05)
+        snapshot_max_age = kwargs.pop("snapshot_max_age", 1800)
+        Model.__init__(self, **kwargs)
+        BaseHealthEngine.__init__(
+            self, confirm_margin=confirm_margin, snapshot_max_age=snapshot_max_age
+        )
+
+
+class ProfitabilityEngine(Model, BaseProfitabilityEngine):
+    """Keep the liquidation parameters and market state used to size liquidations."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the engine."""
+        slippage = kwargs.pop("slippage", 0.003)
+        market_depth = kwargs.pop("market_depth", 1_000_000)
+        min_profit = kwargs.pop("min_profit", 0.0)
+        self.params_max_age = kwargs.pop("params_max_age", 43_200)
+        Model.__init__(self, **kwargs)
+        BaseProfitabilityEngine.__init__(
+            self,
+            slippage=slippage,
+            market_depth=market_depth,
+            min_profit=min_profit,
+        )
+
+
+class PeriodScheduler(Model, BasePeriodScheduler):
+    """Start the periods on the new chain heads, with a fallback timer."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the scheduler."""
+        fallback_timeout = kwargs.pop("fallback_timeout", 10.0)
+        Model.__init__(self, **kwargs)
+        BasePeriodScheduler.__init__(self, fallback_timeout=fallback_timeout)
+
+
+class LiquidationTxCache(Model, BaseLiquidationTxCache):
+    """Keep the liquidations of the accounts close to shortfall ready across periods."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the cache."""
+        max_age = kwargs.pop("max_age", 2)
+        Model.__init__(self, **kwargs)
+        BaseLiquidationTxCache.__init__(self, max_age=max_age)
+
+
+class FeeOracle(Model, BaseFeeOracle):
+    """Track the recent fees of the chain and bid for the liquidations."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the oracle."""
+        window = kwargs.pop("window", 20)
+        percentiles = kwargs.pop("percentiles", [25.0, 50.0, 75.0, 90.0])
+        self.strategy = FeeStrategy(
+            profit_share=kwargs.pop("profit_share", 0.5),
+            tip_share=kwargs.pop("tip_share", 0.5),
+            percentile=kwargs.pop("percentile", 75.0),
+            bump=kwargs.pop("bump", 1.125),
+            stuck_blocks=kwargs.pop("stuck_blocks", 3),
+        )
+        Model.__init__(self, **kwargs)
+        BaseFeeOracle.__init__(
+            self,
+            get_fee_history=self._get_fee_history,
+            window=window,
+            percentiles=percentiles,
+        )
+
+    def _get_fee_history(
+        self, block_count: int, newest_block: Any, reward_percentiles: List[float]
+    ) -> Dict[str, Any]:
+        """Make an eth_feeHistory request through the shared client."""
+        return self.context.chain_client.web3.eth.fee_history(
+            block_count, newest_block, reward_percentiles
+        )
+
+
+class ChainClient(Model):
+    """
+    Share the connection to the chain between the behaviours.
+
+    The event decoders are built once, and all the requests go through a
+    single keep-alive session, so the TLS handshake is only paid when a
+    pooled connection is opened. The blocking reads are run
+    on the executor, so that they never stall the agent loop.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the client."""
+        self.pool_size = kwargs.pop("pool_size", 10)
+        self.request_timeout = kwargs.pop("request_timeout", 30)
+        self.log_chunk_size = kwargs.pop("log_chunk_size", 2_000)
+        self.max_in_flight = kwargs.pop("max_in_flight", 4)
+        self.max_workers = kwargs.pop("max_workers", 4)
+        super().__init__(**kwargs)
+
+    @cached_property
+    def session(self) -> requests.Session:
+        """The keep-alive session, pooling up to `pool_size` connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @cached_property
+    def web3(self) -> Web3:
+        """The Web3 instance using the shared session."""
+        infura_api_key = self.context.params.config["infura_api_key"]
+        provider = Web3.HTTPProvider(
+            f"https://polygon-mainnet.infura.io/v3/{infura_api_key}",
+            request_kwargs={"timeout": self.request_timeout},
+            session=self.session,
+        )
+        return Web3(provider)
+
+    @cached_property
+    def log_fetcher(self) -> LogFetcher:
+        """The concurrent log fetcher, sharing the pooled connections."""
+        return LogFetcher(
+            self.web3.eth.get_logs,
+            chunk_size=self.log_chunk_size,
+            max_in_flight=self.max_in_flight,
+        )
+
+    @cached_property
+    def decoder(self) -> PositionEventDecoder:
+        """The decoder of the position events."""
+        return PositionEventDecoder()
+
+    @cached_property
+    def executor(self) -> ThreadPoolExecutor:
+        """The threads the blocking chain reads run on, off the agent loop."""
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="chain_client"
+        )
+
+    def teardown(self) -> None:
+        """Close the pooled connections and stop the threads."""
+        if "executor" in self.__dict__:
+            self.executor.shutdown(wait=False)
+        if "session" in self.__dict__:
+            self.session.close()
+
 
 Params = BaseParams
 Requests = BaseRequests
 BenchmarkTool = BaseBenchmarkTool
+ReadCache = BaseReadCache
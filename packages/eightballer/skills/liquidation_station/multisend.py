@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the bundling of liquidations in Safe multisend transactions."""
+
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, to_bytes
+
+from packages.eightballer.skills.liquidation_station.profitability import (
+    LiquidationCandidate,
+)
+
+# MultiSendCallOnly v1.3.0, deployed at the same address on every supported chain
+MULTISEND_ADDRESS = "0x40A2aCCbd92BCA938b02010E17A5b8929b49130D"
+
+MULTISEND_SELECTOR = function_signature_to_4byte_selector("multiSend(bytes)")
+LIQUIDATE_BORROW_SELECTOR = function_signature_to_4byte_selector(
+    "liquidateBorrow(address,uint256,address)"
+)
+SIMULATE_AND_REVERT_SELECTOR = function_signature_to_4byte_selector(
+    "simulateAndRevert(address,bytes)"
+)
+SAFE_NONCE_SELECTOR = function_signature_to_4byte_selector("nonce()")
+AGGREGATE3_SELECTOR = function_signature_to_4byte_selector(
+    "aggregate3((address,bool,bytes)[])"
+)
+
+
+class Operation(IntEnum):
+    """The operation of a multisend transaction."""
+
+    CALL = 0
+    DELEGATE_CALL = 1
+
+
+@dataclass(frozen=True)
+class MultiSendTx:
+    """A transaction of a multisend bundle."""
+
+    to: str
+    data: bytes
+    value: int = 0
+    operation: Operation = Operation.CALL
+
+    def encode(self) -> bytes:
+        """Pack the transaction the way MultiSend reads it."""
+        return (
+            self.operation.to_bytes(1, "big")
+            + to_bytes(hexstr=self.to)
+            + self.value.to_bytes(32, "big")
+            + len(self.data).to_bytes(32, "big")
+            + self.data
+        )
+
+
+def multisend_calldata(txs: Sequence[MultiSendTx]) -> bytes:
+    """Get the calldata of a multiSend call executing transactions in order."""
+    packed = b"".join(tx.encode() for tx in txs)
+    return MULTISEND_SELECTOR + encode(["bytes"], [packed])
+
+
+def simulate_calldata(target: str, calldata: bytes) -> bytes:
+    """Get the calldata of a Safe simulateAndRevert call of a delegatecall to target."""
+    return SIMULATE_AND_REVERT_SELECTOR + encode(
+        ["address", "bytes"], [target, calldata]
+    )
+
+
+def revert_succeeded(revert: bytes) -> bool:
+    """Whether the revert data of a simulateAndRevert call reports a success."""
+    return len(revert) >= 32 and int.from_bytes(revert[:32], "big") == 1
+
+
+def simulation_succeeded(response: Dict[str, Any]) -> bool:
+    """
+    Whether the json-rpc response of a simulateAndRevert eth_call reports a success.
+
+    simulateAndRevert always reverts, with the success of the delegatecall in
+    the first word of the revert data, which the nodes return as the data of
+    the error, some of them prefixed with "Reverted".
+
+    :param response: the raw response of the node to the eth_call.
+    :return: whether the simulated call succeeded.
+    """
+    error = response.get("error")
+    data = error.get("data") if isinstance(error, dict) else None
+    if isinstance(data, dict):
+        data = data.get("data")
+    if not isinstance(data, str):
+        return False
+    data = data.split()[-1] if data else data
+    try:
+        revert = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    except ValueError:
+        return False
+    return revert_succeeded(revert)
+
+
+def aggregate_simulations_calldata(safe: str, calldatas: Sequence[bytes]) -> bytes:
+    """
+    Get the calldata of a Multicall3 aggregate3 call simulating multiSend calls from a Safe.
+
+    Every simulation is allowed to fail, so that the revert data of each one
+    comes back as its return data in a single eth_call.
+
+    :param safe: the address of the Safe.
+    :param calldatas: the multiSend calldata of each simulation.
+    :return: the calldata of the aggregate3 call.
+    """
+    calls = [
+        (safe, True, simulate_calldata(MULTISEND_ADDRESS, calldata))
+        for calldata in calldatas
+    ]
+    return AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [calls])
+
+
+def aggregated_simulations_succeeded(data: bytes) -> List[bool]:
+    """
+    Whether each simulation of an aggregate3 call reports a success.
+
+    :param data: the return data of the aggregate3 call.
+    :return: whether each simulated call succeeded, in order.
+    """
+    (results,) = decode(["(bool,bytes)[]"], data)
+    return [not success and revert_succeeded(revert) for success, revert in results]
+
+
+def liquidation_tx(candidate: LiquidationCandidate) -> MultiSendTx:
+    """
+    Get the liquidateBorrow call of a liquidation.
+
+    The Safe is expected to hold a standing allowance of the borrowed
+    underlying for the borrowed oToken.
+    """
+    data = LIQUIDATE_BORROW_SELECTOR + encode(
+        ["address", "uint256", "address"],
+        [candidate.account, candidate.repay_amount, candidate.collateral_market],
+    )
+    return MultiSendTx(to=candidate.borrowed_market, data=data)
+
+
+@dataclass(frozen=True)
+class LiquidationBundle:
+    """Liquidations executed in a single multisend transaction."""
+
+    candidates: Tuple[LiquidationCandidate, ...]
+    gas: int
+
+    @property
+    def calldata(self) -> bytes:
+        """The multiSend calldata of the bundle."""
+        return multisend_calldata([liquidation_tx(x) for x in self.candidates])
+
+    def split(self) -> Tuple["LiquidationBundle", "LiquidationBundle"]:
+        """Split the bundle in two halves."""
+        middle = len(self.candidates) // 2
+        gas_per_liquidation = self.gas // len(self.candidates)
+        first, second = self.candidates[:middle], self.candidates[middle:]
+        return (
+            LiquidationBundle(first, gas_per_liquidation * len(first)),
+            LiquidationBundle(second, gas_per_liquidation * len(second)),
+        )
+
+
+def plan_bundles(
+    candidates: Sequence[LiquidationCandidate],
+    gas_per_liquidation: int,
+    max_bundle_gas: int,
+) -> List[LiquidationBundle]:
+    """
+    Pack liquidations in bundles, in priority order, without exceeding the gas limit.
+
+    :param candidates: the liquidations, most profitable first.
+    :param gas_per_liquidation: the gas used by a liquidation.
+    :param max_bundle_gas: the maximum gas of a bundle.
+    :return: the bundles, the one holding the most profitable liquidation first.
+    """
+    per_bundle = max(1, max_bundle_gas // gas_per_liquidation)
+    return [
+        LiquidationBundle(
+            tuple(candidates[start : start + per_bundle]),
+            gas_per_liquidation * len(candidates[start : start + per_bundle]),
+        )
+        for start in range(0, len(candidates), per_bundle)
+    ]
+
+
+def simulate_bundles(
+    bundles: Sequence[LiquidationBundle],
+    simulate: Callable[[LiquidationBundle], bool],
+) -> Tuple[List[LiquidationBundle], List[LiquidationCandidate]]:
+    """
+    Keep the bundles which simulate, splitting the ones which fail.
+
+    A failing bundle is split in halves which are simulated on their own,
+    down to single liquidations, so that one bad liquidation does not drop
+    the others.
+
+    :param bundles: the bundles.
+    :param simulate: whether a bundle executes successfully.
+    :return: the bundles to submit, and the liquidations which failed alone.
+    """
+    valid: List[LiquidationBundle] = []
+    failed: List[LiquidationCandidate] = []
+    pending = list(bundles)
+    while pending:
+        bundle = pending.pop(0)
+        if simulate(bundle):
+            valid.append(bundle)
+        elif len(bundle.candidates) == 1:
+            failed.extend(bundle.candidates)
+        else:
+            pending[:0] = bundle.split()
+    return valid, failed
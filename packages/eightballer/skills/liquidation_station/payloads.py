@@ -20,6 +20,7 @@
 """This module contains the transaction payloads of the LiquidationStationAbciApp."""
 
 from dataclasses import dataclass
+from typing import Optional
 
 from packages.valory.skills.abstract_round_abci.base import BaseTxPayload
 
@@ -28,27 +29,55 @@ from packages.valory.skills.abstract_round_abci.base import BaseTxPayload
 class CalculatePositionHealthPayload(BaseTxPayload):
     """Represent a transaction payload for the CalculatePositionHealthRound."""
 
+    underwater_accounts: str
+
 
 @dataclass(frozen=True)
 class CollectPositionsPayload(BaseTxPayload):
-    """Represent a transaction payload for the CollectPositionsRound."""
+    """
+    Represent a transaction payload for the CollectPositionsRound.
+
+    The accounts are agreed on by their merkle root, the payload carries the
+    delta against the previous root when it is small, the full set is read
+    from ipfs otherwise.
+    """
+
+    positions_root: str
+    previous_root: str
+    positions_delta: Optional[str]
+    positions_ipfs_hash: Optional[str]
 
 
 @dataclass(frozen=True)
 class PrepareLiquidationTransactionsPayload(BaseTxPayload):
     """Represent a transaction payload for the PrepareLiquidationTransactionsRound."""
 
+    liquidation_candidates: str
+
 
 @dataclass(frozen=True)
 class RegistrationPayload(BaseTxPayload):
     """Represent a transaction payload for the RegistrationRound."""
 
+    safe_contract_address: str
+
 
 @dataclass(frozen=True)
 class ResetAndPausePayload(BaseTxPayload):
     """Represent a transaction payload for the ResetAndPauseRound."""
 
+    period_count: int
+
+
+@dataclass(frozen=True)
+class SelectBlockPayload(BaseTxPayload):
+    """Represent a transaction payload for the SelectBlockRound."""
+
+    block_number: int
+
 
 @dataclass(frozen=True)
 class SubmitPositionLiquidationTransactionsPayload(BaseTxPayload):
     """Represent a transaction payload for the SubmitPositionLiquidationTransactionsRound."""
+
+    liquidation_txs: str
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the hash-addressed form of the sets of accounts with positions."""
+
+import json
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from eth_utils import keccak, to_checksum_address
+
+EMPTY_ROOT = "0x" + keccak(b"").hex()
+
+
+def sorted_accounts(accounts: Iterable[str]) -> List[str]:
+    """Get the distinct accounts, checksummed, ordered by address whatever their case."""
+    return sorted({to_checksum_address(x) for x in accounts}, key=str.lower)
+
+
+def merkle_root(accounts: Iterable[str]) -> str:
+    """
+    Get the merkle root of a set of accounts.
+
+    The leaves are the hashes of the 20 address bytes in address order, a
+    node is the hash of its two children concatenated, and a node without
+    a sibling is carried to the next level.
+
+    :param accounts: the accounts, in any order and case.
+    :return: the hex root, EMPTY_ROOT for no accounts.
+    """
+    level = [
+        keccak(bytes.fromhex(account[2:].lower()))
+        for account in sorted_accounts(accounts)
+    ]
+    if not level:
+        return EMPTY_ROOT
+    while len(level) > 1:
+        paired = [keccak(level[i] + level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return "0x" + level[0].hex()
+
+
+@dataclass(frozen=True)
+class PositionSetDelta:
+    """The accounts added to and removed from a set of accounts."""
+
+    added: Tuple[str, ...] = ()
+    removed: Tuple[str, ...] = ()
+
+    @classmethod
+    def between(
+        cls, previous: Iterable[str], current: Iterable[str]
+    ) -> "PositionSetDelta":
+        """Get the delta turning the previous set into the current one."""
+        previous, current = set(sorted_accounts(previous)), set(
+            sorted_accounts(current)
+        )
+        return cls(
+            added=tuple(sorted_accounts(current - previous)),
+            removed=tuple(sorted_accounts(previous - current)),
+        )
+
+    def __len__(self) -> int:
+        """The number of accounts changed."""
+        return len(self.added) + len(self.removed)
+
+    def apply(self, previous: Iterable[str]) -> List[str]:
+        """Get the set of accounts after the delta."""
+        removed = set(sorted_accounts(self.removed))
+        return sorted_accounts(
+            (set(sorted_accounts(previous)) - removed) | set(self.added)
+        )
+
+    def serialize(self) -> str:
+        """Serialize the delta, deterministically so payloads compare equal."""
+        return json.dumps([self.added, self.removed], separators=(",", ":"))
+
+    @classmethod
+    def deserialize(cls, data: str) -> "PositionSetDelta":
+        """Deserialize a delta."""
+        added, removed = json.loads(data)
+        return cls(added=tuple(added), removed=tuple(removed))
+
+
+def make_delta(
+    previous: Optional[Sequence[str]],
+    current: Sequence[str],
+    max_delta_size: int,
+) -> Optional[PositionSetDelta]:
+    """
+    Get the delta to put in a payload, if it is small enough.
+
+    :param previous: the previously agreed accounts, None if not known locally.
+    :param current: the current accounts.
+    :param max_delta_size: the maximum number of accounts changed in a payload.
+    :return: the delta, or None when the full set must be read from ipfs.
+    """
+    if previous is None:
+        return None
+    delta = PositionSetDelta.between(previous, current)
+    if len(delta) > max_delta_size:
+        return None
+    return delta
+
+
+def resolve_positions(
+    previous: Sequence[str], delta: PositionSetDelta, root: str
+) -> List[str]:
+    """
+    Rebuild an agreed set of accounts from the previous one.
+
+    :param previous: the accounts of the previous period.
+    :param delta: the delta of the payload.
+    :param root: the merkle root of the payload.
+    :return: the accounts.
+    :raises ValueError: if the accounts do not match the root.
+    """
+    accounts = delta.apply(previous)
+    if merkle_root(accounts) != root:
+        raise ValueError(f"The accounts do not match the merkle root {root}.")
+    return accounts
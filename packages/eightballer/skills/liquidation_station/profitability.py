@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the liquidation profitability engine of the liquidation_station skill."""
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from packages.eightballer.skills.liquidation_station.health import (
+    HealthEngine,
+    MANTISSA,
+)
+
+# the repay amount is rounded down by this fraction, so that the float
+# valuation never asks for more than the close factor allows
+REPAY_BUFFER = 1e-6
+
+# the profits are agreed on in whole cents, so that no float is part of a payload
+PROFIT_SCALE = 100
+
+
+def calculate_seize_tokens(  # pylint: disable=too-many-arguments
+    repay_amount: int,
+    price_borrowed: int,
+    price_collateral: int,
+    exchange_rate: int,
+    liquidation_incentive: int,
+) -> int:
+    """
+    Get the oTokens seized for a repay amount, as liquidateCalculateSeizeTokens does.
+
+    seizeTokens = repayAmount * liquidationIncentive * priceBorrowed
+        / (priceCollateral * exchangeRate), truncated like the comptroller.
+
+    :param repay_amount: the amount of the borrowed underlying repaid.
+    :param price_borrowed: the oracle price mantissa of the borrowed market.
+    :param price_collateral: the oracle price mantissa of the collateral market.
+    :param exchange_rate: the exchange rate mantissa of the collateral market.
+    :param liquidation_incentive: the liquidation incentive mantissa.
+    :return: the number of collateral oTokens seized.
+    """
+    scale = int(MANTISSA)
+    numerator = liquidation_incentive * price_borrowed // scale
+    denominator = price_collateral * exchange_rate // scale
+    ratio = numerator * scale // denominator
+    return ratio * repay_amount // scale
+
+
+@dataclass(frozen=True, order=True)
+class LiquidationCandidate:
+    """A liquidation, ordered so that the most profitable one is popped first."""
+
+    priority: float
+    account: str = field(compare=False)
+    borrowed_market: str = field(compare=False)
+    collateral_market: str = field(compare=False)
+    repay_amount: int = field(compare=False)
+    seize_tokens: int = field(compare=False)
+    profit: float = field(compare=False)
+
+    def quantize(self) -> Dict[str, Any]:
+        """Get the liquidation with its profit in whole cents, as agreed on."""
+        return dict(
+            account=self.account,
+            borrowed_market=self.borrowed_market,
+            collateral_market=self.collateral_market,
+            repay_amount=self.repay_amount,
+            seize_tokens=self.seize_tokens,
+            profit=round(self.profit * PROFIT_SCALE),
+        )
+
+    @classmethod
+    def from_quantized(cls, data: Dict[str, Any]) -> "LiquidationCandidate":
+        """Get back an agreed liquidation."""
+        profit = data["profit"] / PROFIT_SCALE
+        return cls(
+            priority=-profit,
+            account=data["account"],
+            borrowed_market=data["borrowed_market"],
+            collateral_market=data["collateral_market"],
+            repay_amount=data["repay_amount"],
+            seize_tokens=data["seize_tokens"],
+            profit=profit,
+        )
+
+
+class ProfitabilityEngine:
+    """
+    Choose and size the liquidation of each account in shortfall.
+
+    The value of a liquidation repaying V, in the units of the health engine,
+    is `V (incentive - 1) - V incentive slippage(V) - gas`, where the
+    slippage of selling the seized collateral for the borrowed asset grows
+    linearly with the size, `slippage + V / market_depth`. It is maximised
+    at `V* = market_depth (incentive - 1 - incentive slippage) / (2 incentive)`,
+    capped by the close factor and the collateral which can be seized.
+    Seizing the market which is repaid needs no swap, so has no slippage.
+    """
+
+    def __init__(
+        self,
+        slippage: float = 0.003,
+        market_depth: float = 1_000_000,
+        min_profit: float = 0.0,
+    ) -> None:
+        """
+        Initialize the engine.
+
+        :param slippage: the fixed part of the swap slippage, as a fraction.
+        :param market_depth: the trade size, in USD, moving the price by 100%.
+        :param min_profit: the minimum profit, in USD, of a candidate.
+        """
+        self.slippage = slippage
+        self.market_depth = market_depth * MANTISSA
+        self.min_profit = min_profit
+        self.close_factor: Optional[int] = None
+        self.liquidation_incentive: Optional[int] = None
+        self.params_block: Optional[int] = None
+        self.markets: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def has_params(self) -> bool:
+        """Whether the close factor and liquidation incentive are known."""
+        return self.close_factor is not None and self.liquidation_incentive is not None
+
+    def update_params(
+        self, close_factor: int, liquidation_incentive: int, block_number: int
+    ) -> None:
+        """Cache the close factor and liquidation incentive mantissas."""
+        self.close_factor = close_factor
+        self.liquidation_incentive = liquidation_incentive
+        self.params_block = block_number
+
+    def update_markets(self, markets: Dict[str, Optional[Dict[str, int]]]) -> None:
+        """Cache the exchange rate and price mantissas of markets."""
+        for market, state in markets.items():
+            if state is not None:
+                self.markets[market] = dict(state)
+
+    def candidates(
+        self,
+        health_engine: HealthEngine,
+        accounts: Iterable[str],
+        gas_cost: float = 0.0,
+    ) -> List[LiquidationCandidate]:
+        """
+        Get the best liquidation of each account.
+
+        :param health_engine: the engine holding the balances of the accounts.
+        :param accounts: the accounts in shortfall.
+        :param gas_cost: the cost of a liquidation, in USD.
+        :return: a heap of the profitable liquidations, to pop with heapq.
+        """
+        if not self.has_params:
+            return []
+        heap = []
+        for account in accounts:
+            candidate = self.best_liquidation(health_engine, account, gas_cost)
+            if candidate is not None:
+                heap.append(candidate)
+        heapq.heapify(heap)
+        return heap
+
+    def best_liquidation(  # pylint: disable=too-many-locals
+        self, health_engine: HealthEngine, account: str, gas_cost: float = 0.0
+    ) -> Optional[LiquidationCandidate]:
+        """
+        Get the most profitable liquidation of an account and its repay amount.
+
+        :param health_engine: the engine holding the balances of the account.
+        :param account: the account.
+        :param gas_cost: the cost of a liquidation, in USD.
+        :return: the liquidation, or None if none is profitable.
+        """
+        o_token_balances, borrow_balances = health_engine.position(account)
+        markets = health_engine.markets
+        known = np.array([market in self.markets for market in markets], dtype=bool)
+        prices = health_engine.prices[: len(markets)]
+        exchange_rates = health_engine.exchange_rates[: len(markets)]
+        incentive = self.liquidation_incentive / MANTISSA
+        close_factor = self.close_factor / MANTISSA
+
+        # value which can be repaid per borrowed market and seized per collateral
+        repayable = np.where(known, close_factor * borrow_balances * prices, 0)
+        seizable = np.where(
+            known, o_token_balances * exchange_rates * prices / incentive, 0
+        )
+        max_repay = np.minimum.outer(repayable, seizable)
+        slippage = np.full_like(max_repay, self.slippage)
+        np.fill_diagonal(slippage, 0)
+        depth = np.full_like(max_repay, self.market_depth)
+        np.fill_diagonal(depth, np.inf)
+        with np.errstate(invalid="ignore"):
+            best = depth * (incentive - 1 - incentive * slippage) / (2 * incentive)
+        best = np.nan_to_num(best, nan=0.0)
+        repay = np.clip(np.minimum(max_repay, best), 0, None)
+        profit = repay * (incentive - 1 - incentive * (slippage + repay / depth))
+        profit = profit / MANTISSA - gas_cost
+
+        borrowed, collateral = np.unravel_index(np.argmax(profit), profit.shape)
+        if repay[borrowed, collateral] <= 0:
+            return None
+        if profit[borrowed, collateral] <= self.min_profit:
+            return None
+
+        borrowed_market = markets[borrowed]
+        collateral_market = markets[collateral]
+        borrowed_state = self.markets[borrowed_market]
+        collateral_state = self.markets[collateral_market]
+        repay_amount = int(
+            repay[borrowed, collateral]
+            / borrowed_state["price"]
+            * MANTISSA
+            * (1 - REPAY_BUFFER)
+        )
+        seize_tokens = calculate_seize_tokens(
+            repay_amount,
+            borrowed_state["price"],
+            collateral_state["price"],
+            collateral_state["exchange_rate"],
+            self.liquidation_incentive,
+        )
+        return LiquidationCandidate(
+            priority=-float(profit[borrowed, collateral]),
+            account=account,
+            borrowed_market=borrowed_market,
+            collateral_market=collateral_market,
+            repay_amount=repay_amount,
+            seize_tokens=seize_tokens,
+            profit=float(profit[borrowed, collateral]),
+        )
@@ -17,10 +17,13 @@
 #
 # ------------------------------------------------------------------------------
 
+
 """This package contains the rounds of LiquidationStationAbciApp."""
 
+import json
+from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Dict, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
 
 from packages.eightballer.skills.liquidation_station.payloads import (
     CalculatePositionHealthPayload,
@@ -28,15 +31,21 @@ from packages.eightballer.skills.liquidation_station.payloads import (
     PrepareLiquidationTransactionsPayload,
     RegistrationPayload,
     ResetAndPausePayload,
+    SelectBlockPayload,
     SubmitPositionLiquidationTransactionsPayload,
 )
+from packages.eightballer.skills.liquidation_station.position_set import EMPTY_ROOT
 from packages.valory.skills.abstract_round_abci.base import (
     AbciApp,
     AbciAppTransitionFunction,
-    AbstractRound,
     AppState,
     BaseSynchronizedData,
+    CollectDifferentUntilThresholdRound,
+    CollectSameUntilThresholdRound,
+    CollectionRound,
+    DeserializedCollection,
     EventToTimeout,
+    get_name,
 )
 
 
@@ -44,6 +53,8 @@ class Event(Enum):
     """LiquidationStationAbciApp Events"""
 
     NOT_TRIGGERED = "not_triggered"
+    NO_SHORTFALL = "no_shortfall"
+    NOT_PROFITABLE = "not_profitable"
     ROUND_TIMEOUT = "round_timeout"
     DONE = "done"
     NO_MAJORITY = "no_majority"
@@ -57,131 +68,292 @@ class SynchronizedData(BaseSynchronizedData):
     This data is replicated by the tendermint application.
     """
 
+    def _get_deserialized(self, key: str) -> DeserializedCollection:
+        """Strictly get a collection and return it deserialized."""
+        serialized = self.db.get_strict(key)
+        return CollectionRound.deserialize_collection(serialized)
+
+    def _get_json(self, key: str, default: Any) -> Any:
+        """Get a json encoded value."""
+        value = self.db.get(key, None)
+        return default if value is None else json.loads(value)
+
+    @property
+    def period_block(self) -> int:
+        """Get the block all the reads of the period are made at."""
+        return cast(int, self.db.get_strict("period_block"))
+
+    @property
+    def positions_root(self) -> str:
+        """Get the merkle root of the agreed accounts with positions."""
+        return cast(str, self.db.get("positions_root", EMPTY_ROOT))
+
+    @property
+    def previous_positions_root(self) -> Optional[str]:
+        """Get the merkle root of the accounts the agreed delta applies to."""
+        return cast(Optional[str], self.db.get("previous_root", None))
+
+    @property
+    def positions_delta(self) -> Optional[str]:
+        """Get the agreed delta of the accounts, if it was small enough."""
+        return cast(Optional[str], self.db.get("positions_delta", None))
+
+    @property
+    def positions_ipfs_hash(self) -> Optional[str]:
+        """Get the ipfs hash of the agreed accounts with positions."""
+        return cast(Optional[str], self.db.get("positions_ipfs_hash", None))
+
+    @property
+    def underwater_accounts(self) -> List[str]:
+        """Get the agreed accounts in shortfall."""
+        return self._get_json("underwater_accounts", [])
+
+    @property
+    def liquidation_candidates(self) -> List[Dict[str, Any]]:
+        """Get the agreed liquidations, most profitable first."""
+        return self._get_json("liquidation_candidates", [])
+
+    @property
+    def liquidation_txs(self) -> List[Dict[str, Any]]:
+        """Get the agreed multisend transactions."""
+        return self._get_json("liquidation_txs", [])
+
+    @property
+    def pending_fees(self) -> Dict[str, Dict[str, int]]:
+        """Get the fees of the agreed transactions by nonce, and the block they were set at."""
+        return self._get_json("pending_fees", {})
+
+    @property
+    def skipped_round(self) -> Optional[str]:
+        """Get the round after which the period skipped to the reset, if any."""
+        return cast(Optional[str], self.db.get("skipped_round", None))
+
+    @property
+    def participant_to_registration(self) -> DeserializedCollection:
+        """Get the participant_to_registration."""
+        return self._get_deserialized("participant_to_registration")
+
+    @property
+    def participant_to_positions(self) -> DeserializedCollection:
+        """Get the participant_to_positions."""
+        return self._get_deserialized("participant_to_positions")
+
+    @property
+    def participant_to_position_health(self) -> DeserializedCollection:
+        """Get the participant_to_position_health."""
+        return self._get_deserialized("participant_to_position_health")
+
+    @property
+    def participant_to_prepare_txs(self) -> DeserializedCollection:
+        """Get the participant_to_prepare_txs."""
+        return self._get_deserialized("participant_to_prepare_txs")
+
+    @property
+    def participant_to_liquidation_txs(self) -> DeserializedCollection:
+        """Get the participant_to_liquidation_txs."""
+        return self._get_deserialized("participant_to_liquidation_txs")
+
+    @property
+    def participant_to_reset_and_pause(self) -> DeserializedCollection:
+        """Get the participant_to_reset_and_pause."""
+        return self._get_deserialized("participant_to_reset_and_pause")
+
+    @property
+    def participant_to_block(self) -> DeserializedCollection:
+        """Get the participant_to_block."""
+        return self._get_deserialized("participant_to_block")
+
+
+class SkippableRound(CollectSameUntilThresholdRound, ABC):
+    """A round which skips the rest of the period when the agreed value is empty."""
+
+    skip_event: Event
+
+    @abstractmethod
+    def is_empty(self, synchronized_data: SynchronizedData) -> bool:
+        """Whether the agreed value leaves nothing to do in the period."""
 
-class CalculatePositionHealthRound(AbstractRound):
+    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
+        """Process the end of the block."""
+        result = super().end_block()
+        if result is None:
+            return None
+        synchronized_data, event = result
+        synchronized_data = cast(SynchronizedData, synchronized_data)
+        if event == self.done_event and self.is_empty(synchronized_data):
+            synchronized_data = synchronized_data.update(
+                synchronized_data_class=SynchronizedData,
+                skipped_round=self.auto_round_id(),
+            )
+            return synchronized_data, self.skip_event
+        return synchronized_data, event
+
+
+class CalculatePositionHealthRound(SkippableRound):
     """CalculatePositionHealthRound"""
 
     payload_class = CalculatePositionHealthPayload
-    payload_attribute = "position_health"
     synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
+    skip_event = Event.NO_SHORTFALL
+    collection_key = get_name(SynchronizedData.participant_to_position_health)
+    selection_key = get_name(SynchronizedData.underwater_accounts)
 
-    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-        """Process the end of the block."""
-        synchronized_data = self.synchronized_data
-        return synchronized_data, Event.DONE
-
-    def check_payload(
-        self, payload: CalculatePositionHealthPayload
-    ) -> None:  # pragma: nocover
-        """Check payload."""
+    def is_empty(self, synchronized_data: SynchronizedData) -> bool:
+        """Whether no account is in shortfall."""
+        return not synchronized_data.underwater_accounts
 
-    def process_payload(
-        self, payload: CalculatePositionHealthPayload
-    ) -> None:  # pragma: nocover
-        """Process payload."""
 
-
-class CollectPositionsRound(AbstractRound):
+class CollectPositionsRound(CollectSameUntilThresholdRound):
     """CollectPositionsRound"""
 
     payload_class = CollectPositionsPayload
-    payload_attribute = "positions"
     synchronized_data_class = SynchronizedData
-
-    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-        """Process the end of the block."""
-        synchronized_data = self.synchronized_data
-        return synchronized_data, Event.DONE
-
-    def check_payload(
-        self, payload: CollectPositionsPayload
-    ) -> None:  # pragma: nocover
-        """Check payload."""
-
-    def process_payload(
-        self, payload: CollectPositionsPayload
-    ) -> None:  # pragma: nocover
-        """Process payload."""
-
-
-class PrepareLiquidationTransactionsRound(AbstractRound):
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
+    collection_key = get_name(SynchronizedData.participant_to_positions)
+    selection_key = (
+        get_name(SynchronizedData.positions_root),
+        "previous_root",
+        "positions_delta",
+        get_name(SynchronizedData.positions_ipfs_hash),
+    )
+
+
+class PrepareLiquidationTransactionsRound(SkippableRound):
     """PrepareLiquidationTransactionsRound"""
 
     payload_class = PrepareLiquidationTransactionsPayload
-    payload_attribute = "prepare_txs"
     synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
+    skip_event = Event.NOT_PROFITABLE
+    collection_key = get_name(SynchronizedData.participant_to_prepare_txs)
+    selection_key = get_name(SynchronizedData.liquidation_candidates)
 
-    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-        """Process the end of the block."""
-        synchronized_data = self.synchronized_data
-        return synchronized_data, Event.DONE
-
-    def check_payload(self, payload: PrepareLiquidationTransactionsPayload) -> None:
-        """Check payload."""
-
-    def process_payload(self, payload: PrepareLiquidationTransactionsPayload) -> None:
-        """Process payload."""
+    def is_empty(self, synchronized_data: SynchronizedData) -> bool:
+        """Whether no liquidation is profitable."""
+        return not synchronized_data.liquidation_candidates
 
 
-class RegistrationRound(AbstractRound):
+class RegistrationRound(CollectSameUntilThresholdRound):
     """RegistrationRound"""
 
     payload_class = RegistrationPayload
-    payload_attribute = "registration"
     synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
+    collection_key = get_name(SynchronizedData.participant_to_registration)
+    selection_key = get_name(SynchronizedData.safe_contract_address)
 
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-        """Process the end of the block."""
-        synchronized_data = self.synchronized_data
-        return synchronized_data, Event.DONE
-
-    def check_payload(self, payload: RegistrationPayload) -> None:
-        """Check payload."""
-
-    def process_payload(self, payload: RegistrationPayload) -> None:
-        """Process payload."""
-
-
-class ResetAndPauseRound(AbstractRound):
+        """Process the end of the block, seeding the keys persisted across periods."""
+        result = super().end_block()
+        if result is None:
+            return None
+        synchronized_data, event = result
+        synchronized_data = cast(SynchronizedData, synchronized_data)
+        if event == self.done_event:
+            # a period reset before the accounts are first agreed carries these
+            synchronized_data = synchronized_data.update(
+                synchronized_data_class=SynchronizedData,
+                positions_root=synchronized_data.positions_root,
+                positions_ipfs_hash=synchronized_data.positions_ipfs_hash,
+                pending_fees=json.dumps(synchronized_data.pending_fees),
+            )
+        return synchronized_data, event
+
+
+class ResetAndPauseRound(CollectSameUntilThresholdRound):
     """ResetAndPauseRound"""
 
     payload_class = ResetAndPausePayload
-    payload_attribute = "reset_and_pause"
     synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
+    collection_key = get_name(SynchronizedData.participant_to_reset_and_pause)
+    selection_key = get_name(SynchronizedData.period_count)
 
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-        """Process the end of the block."""
-        synchronized_data = self.synchronized_data
-        return synchronized_data, Event.DONE
+        """Process the end of the block, starting a new period once agreed."""
+        if self.threshold_reached:
+            return self.synchronized_data.create(), self.done_event
+        if not self.is_majority_possible(
+            self.collection, self.synchronized_data.nb_participants
+        ):
+            return self.synchronized_data, self.no_majority_event
+        return None
 
-    def check_payload(self, payload: ResetAndPausePayload) -> None:
-        """Check payload."""
 
-    def process_payload(self, payload: ResetAndPausePayload) -> None:
-        """Process payload."""
+class SelectBlockRound(CollectDifferentUntilThresholdRound):
+    """
+    SelectBlockRound
+
+    Every agent proposes its latest block, the period reads the chain at the
+    lowest of the proposals, which all the agents which proposed have seen.
+    """
 
+    payload_class = SelectBlockPayload
+    synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    collection_key = get_name(SynchronizedData.participant_to_block)
 
-class SubmitPositionLiquidationTransactionsRound(AbstractRound):
+    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
+        """Process the end of the block, selecting the block of the period."""
+        result = super().end_block()
+        if result is None:
+            return None
+        synchronized_data, event = result
+        period_block = min(
+            cast(SelectBlockPayload, payload).block_number
+            for payload in self.collection.values()
+        )
+        synchronized_data = synchronized_data.update(
+            synchronized_data_class=SynchronizedData,
+            period_block=period_block,
+        )
+        return synchronized_data, event
+
+
+class SubmitPositionLiquidationTransactionsRound(CollectSameUntilThresholdRound):
     """SubmitPositionLiquidationTransactionsRound"""
 
     payload_class = SubmitPositionLiquidationTransactionsPayload
-    payload_attribute = ""  # TODO: update
     synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
+    collection_key = get_name(SynchronizedData.participant_to_liquidation_txs)
+    selection_key = get_name(SynchronizedData.liquidation_txs)
 
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-        """Process the end of the block."""
-        synchronized_data = self.synchronized_data
-        return synchronized_data, Event.DONE
-
-    def check_payload(
-        self, payload: SubmitPositionLiquidationTransactionsPayload
-    ) -> None:
-        """Check payload."""
-
-    def process_payload(
-        self, payload: SubmitPositionLiquidationTransactionsPayload
-    ) -> None:
-        """Process payload."""
+        """Process the end of the block, keeping the fees of the agreed transactions."""
+        result = super().end_block()
+        if result is None:
+            return None
+        synchronized_data, event = result
+        synchronized_data = cast(SynchronizedData, synchronized_data)
+        txs = [x for x in synchronized_data.liquidation_txs if "nonce" in x]
+        if event != self.done_event or not txs:
+            return synchronized_data, event
+        # the transactions below the current nonce of the Safe were mined
+        nonce = min(x["nonce"] for x in txs)
+        pending_fees = {
+            key: value
+            for key, value in synchronized_data.pending_fees.items()
+            if int(key) >= nonce
+        }
+        for tx in txs:
+            pending_fees[str(tx["nonce"])] = dict(
+                block=tx["fee_block"],
+                max_fee_per_gas=tx["max_fee_per_gas"],
+                max_priority_fee_per_gas=tx["max_priority_fee_per_gas"],
+            )
+        synchronized_data = synchronized_data.update(
+            synchronized_data_class=SynchronizedData,
+            pending_fees=json.dumps(pending_fees, sort_keys=True),
+        )
+        return synchronized_data, event
 
 
 class LiquidationStationAbciApp(AbciApp[Event]):
@@ -190,7 +362,10 @@ class LiquidationStationAbciApp(AbciApp[Event]):
     initial_round_cls: AppState = RegistrationRound
     initial_states: Set[AppState] = {RegistrationRound}
     transition_function: AbciAppTransitionFunction = {
-        RegistrationRound: {Event.DONE: CollectPositionsRound},
+        RegistrationRound: {
+            Event.DONE: SelectBlockRound,
+            Event.NO_MAJORITY: RegistrationRound,
+        },
         CollectPositionsRound: {
             Event.DONE: CalculatePositionHealthRound,
             Event.ROUND_TIMEOUT: ResetAndPauseRound,
@@ -198,28 +373,43 @@ class LiquidationStationAbciApp(AbciApp[Event]):
         },
         CalculatePositionHealthRound: {
             Event.DONE: PrepareLiquidationTransactionsRound,
+            Event.NO_SHORTFALL: ResetAndPauseRound,
             Event.ROUND_TIMEOUT: ResetAndPauseRound,
             Event.NO_MAJORITY: ResetAndPauseRound,
         },
         PrepareLiquidationTransactionsRound: {
             Event.DONE: SubmitPositionLiquidationTransactionsRound,
+            Event.NOT_PROFITABLE: ResetAndPauseRound,
             Event.ROUND_TIMEOUT: ResetAndPauseRound,
             Event.NO_MAJORITY: ResetAndPauseRound,
         },
+        SelectBlockRound: {
+            Event.DONE: CollectPositionsRound,
+            Event.ROUND_TIMEOUT: ResetAndPauseRound,
+        },
         SubmitPositionLiquidationTransactionsRound: {
             Event.DONE: ResetAndPauseRound,
+            Event.ROUND_TIMEOUT: ResetAndPauseRound,
+            Event.NO_MAJORITY: ResetAndPauseRound,
             Event.NOT_TRIGGERED: ResetAndPauseRound,
         },
         ResetAndPauseRound: {
-            Event.DONE: CollectPositionsRound,
+            Event.DONE: SelectBlockRound,
             Event.NO_MAJORITY: ResetAndPauseRound,
             Event.RESET_TIMEOUT: ResetAndPauseRound,
         },
     }
     final_states: Set[AppState] = set()
-    event_to_timeout: EventToTimeout = {}
-    cross_period_persisted_keys: Set[str] = []
+    event_to_timeout: EventToTimeout = {
+        Event.ROUND_TIMEOUT: 30.0,
+        Event.RESET_TIMEOUT: 30.0,
+    }
+    cross_period_persisted_keys: Set[str] = {
+        get_name(SynchronizedData.positions_root),
+        get_name(SynchronizedData.positions_ipfs_hash),
+        get_name(SynchronizedData.pending_fees),
+    }
     db_pre_conditions: Dict[AppState, Set[str]] = {
-        RegistrationRound: [],
+        RegistrationRound: set(),
     }
     db_post_conditions: Dict[AppState, Set[str]] = {}
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the block driven scheduler of the liquidation_station skill."""
+
+import time
+from typing import Any, Dict, Optional
+
+from packages.eightballer.skills.contract_subscription.head_tracker import (
+    Clock,
+    HeadTracker,
+)
+
+
+class PeriodScheduler:
+    """
+    Start a period as soon as a head newer than the one of the current period arrives.
+
+    Without new heads, when the subscription is down, a period is started
+    once `fallback_timeout` seconds passed since the start of the current one.
+    """
+
+    def __init__(self, fallback_timeout: float = 10.0, clock: Clock = time.monotonic):
+        """
+        Initialize the scheduler.
+
+        :param fallback_timeout: the maximum seconds between the start of two periods.
+        :param clock: the clock measuring the periods.
+        """
+        self.fallback_timeout = fallback_timeout
+        self.clock = clock
+        self.period_block: Optional[int] = None
+        self.period_start: Optional[float] = None
+        self.period_duration: Optional[float] = None
+        self.blocks_behind: Optional[int] = None
+
+    def start_period(self, block_number: int, head: Optional[int] = None) -> None:
+        """
+        Record the start of a period.
+
+        :param block_number: the latest block read at the start of the period.
+        :param head: the latest head announced on the subscription.
+        """
+        now = self.clock()
+        if self.period_start is not None:
+            self.period_duration = now - self.period_start
+        self.period_start = now
+        self.period_block = block_number
+        self.blocks_behind = None if head is None else max(0, head - block_number)
+
+    def is_due(self, tracker: HeadTracker) -> bool:
+        """Whether the next period should start."""
+        if self.period_block is None or self.period_start is None:
+            return True
+        if tracker.head is not None and tracker.head > self.period_block:
+            return True
+        return self.clock() - self.period_start >= self.fallback_timeout
+
+    def lag(self, tracker: HeadTracker) -> Dict[str, Any]:
+        """
+        Get the lag metrics of the current period.
+
+        :param tracker: the tracker of the chain head.
+        :return: the head, the block of the period, the blocks the period started
+            behind the head and the blocks produced since, the duration of the
+            previous period and the age of the head, in seconds.
+        """
+        head, block = tracker.head, self.period_block
+        return {
+            "head": head,
+            "period_block": block,
+            "blocks_behind": self.blocks_behind,
+            "blocks_since": None
+            if head is None or block is None
+            else max(0, head - block),
+            "period_duration": self.period_duration,
+            "head_age": tracker.head_age,
+        }
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the fees.py module of the LiquidationStation."""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from packages.eightballer.skills.liquidation_station.fees import (
+    Fee,
+    FeeOracle,
+    FeeStrategy,
+)
+
+GWEI = 10**9
+GAS = 800_000
+
+
+class DevChain:
+    """A dev chain stand-in, following the EIP-1559 base fee rule."""
+
+    def __init__(self, base_fee: int = 30 * GWEI) -> None:
+        """Initialize the chain at block 0."""
+        self.base_fees = [base_fee]
+        self.tips: List[List[int]] = [[]]
+        self.requests: List[tuple] = []
+
+    @property
+    def latest_block(self) -> int:
+        """The number of the latest block."""
+        return len(self.base_fees) - 1
+
+    def next_base_fee(self, block: int) -> int:
+        """The base fee of the block after a block, from its gas used ratio."""
+        # a block targets 10 transactions, and holds up to 20
+        gas_used = min(len(self.tips[block]), 20)
+        base_fee = self.base_fees[block]
+        return base_fee + base_fee * (gas_used - 10) // (10 * 8)
+
+    def mine(self, tips: List[int]) -> None:
+        """Mine a block holding transactions with tips."""
+        self.base_fees.append(self.next_base_fee(self.latest_block))
+        self.tips.append(sorted(tips))
+
+    def fee_history(
+        self, block_count: int, newest_block: Any, percentiles: List[float]
+    ) -> Dict[str, Any]:
+        """Answer an eth_feeHistory request as a node does."""
+        self.requests.append((block_count, newest_block))
+        newest = self.latest_block if newest_block == "latest" else newest_block
+        oldest = max(0, newest - block_count + 1)
+        blocks = range(oldest, newest + 1)
+        return {
+            "oldestBlock": hex(oldest),
+            "baseFeePerGas": [hex(self.base_fees[x]) for x in blocks]
+            + [hex(self.next_base_fee(newest))],
+            "gasUsedRatio": [len(self.tips[x]) / 10 for x in blocks],
+            "reward": [
+                [hex(int(np.percentile(self.tips[x] or [0], p))) for p in percentiles]
+                for x in blocks
+            ],
+        }
+
+
+def mine_blocks(chain: DevChain, count: int, txs: int = 10, tip: int = GWEI) -> None:
+    """Mine blocks with `txs` transactions, tipping from 1 to `txs` times `tip`."""
+    for _ in range(count):
+        chain.mine([tip * (i + 1) for i in range(txs)])
+
+
+def test_oracle_rolling_window() -> None:
+    """Test that the oracle only requests the new blocks and keeps the window."""
+    chain = DevChain()
+    mine_blocks(chain, 30)
+    oracle = FeeOracle(chain.fee_history, window=20)
+    assert oracle.update(chain.latest_block) == 20
+    assert oracle.newest_block == 30
+    assert [x[0] for x in oracle.blocks] == list(range(11, 31))
+    assert oracle.next_base_fee == chain.next_base_fee(30)
+
+    # full blocks push the base fee up by 12.5% per block
+    mine_blocks(chain, 3, txs=20)
+    assert oracle.update(chain.latest_block) == 3
+    assert chain.requests[-1] == (3, 33)
+    assert [x[0] for x in oracle.blocks] == list(range(14, 34))
+    assert oracle.next_base_fee == chain.next_base_fee(33)
+    assert oracle.next_base_fee > oracle.base_fee(50)
+    assert oracle.update(chain.latest_block) == 0
+
+
+def test_oracle_priority_fee_percentiles() -> None:
+    """Test the priority fee percentiles over the window."""
+    chain = DevChain()
+    mine_blocks(chain, 5, txs=5)
+    oracle = FeeOracle(chain.fee_history, window=5, percentiles=[50.0, 90.0])
+    oracle.update(chain.latest_block)
+    assert oracle.priority_fee(50.0) == 3 * GWEI
+    assert oracle.priority_fee(90.0) == int(np.percentile([1, 2, 3, 4, 5], 90) * GWEI)
+
+
+def test_bid_from_profit() -> None:
+    """Test that the bid grows with the profit and never exceeds the budget."""
+    chain = DevChain()
+    mine_blocks(chain, 20)
+    oracle = FeeOracle(chain.fee_history)
+    oracle.update(chain.latest_block)
+    strategy = FeeStrategy(profit_share=0.5, tip_share=0.5, percentile=75.0)
+    base_fee = oracle.next_base_fee
+
+    # the base fee is not affordable once room is left for a replacement
+    assert strategy.bid(oracle, 2 * base_fee * GAS, GAS) is None
+
+    # the whole headroom is bid when the market tips more
+    small = strategy.bid(oracle, 2 * (base_fee + GWEI) * GAS * 9 // 8, GAS)
+    assert small.max_priority_fee_per_gas == pytest.approx(GWEI, rel=1e-6)
+    assert small.max_fee_per_gas == base_fee + small.max_priority_fee_per_gas
+
+    large_profit = 10**18
+    large = strategy.bid(oracle, large_profit, GAS)
+    assert large.max_priority_fee_per_gas > oracle.priority_fee(75.0)
+    assert large.max_fee_per_gas == 2 * base_fee + large.max_priority_fee_per_gas
+    assert large.cost(GAS, 2 * base_fee) <= large_profit // 2
+    assert large.max_fee_per_gas * 1.125 <= strategy.budget(large_profit, GAS)
+
+
+def test_bump_and_replace() -> None:
+    """Test that a stuck transaction is replaced with fees the nodes accept."""
+    chain = DevChain()
+    mine_blocks(chain, 20)
+    oracle = FeeOracle(chain.fee_history)
+    oracle.update(chain.latest_block)
+    strategy = FeeStrategy(bump=1.125, stuck_blocks=3)
+    profit = 10**17
+    fee = strategy.bid(oracle, profit, GAS)
+    assert not strategy.is_stuck(20, 22)
+    assert strategy.is_stuck(20, 23)
+
+    replacement = strategy.replace(oracle, fee, profit, GAS)
+    assert replacement.max_fee_per_gas >= fee.max_fee_per_gas * 1.1
+    assert replacement.max_priority_fee_per_gas >= fee.max_priority_fee_per_gas * 1.1
+
+    # a replacement above the budget is given up
+    budget = strategy.budget(profit, GAS)
+    assert strategy.replace(oracle, Fee(budget, budget), profit, GAS) is None
+
+    assert strategy.next_fee(oracle, profit, GAS, 20) == (20, fee)
+    assert strategy.next_fee(oracle, profit, GAS, 22, (20, fee)) == (20, fee)
+    assert strategy.next_fee(oracle, profit, GAS, 23, (20, fee)) == (23, replacement)
+
+    with pytest.raises(ValueError):
+        FeeStrategy(bump=1.05)
+
+
+def test_oracle_window_ends_at_the_update() -> None:
+    """Test that the window ends at the block updated to, even an older one."""
+    chain = DevChain()
+    mine_blocks(chain, 30)
+    oracle = FeeOracle(chain.fee_history, window=5)
+    oracle.update(30)
+    oracle.update(25)
+    fresh = FeeOracle(chain.fee_history, window=5)
+    fresh.update(25)
+    assert list(oracle.blocks) == list(fresh.blocks)
+    assert oracle.next_base_fee == fresh.next_base_fee
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the health.py module of the LiquidationStation."""
+
+import numpy as np
+
+from packages.eightballer.skills.liquidation_station.health import (
+    AccountLiquidity,
+    HealthEngine,
+    rank_by_shortfall,
+)
+
+E18 = 10**18
+
+
+def make_engine() -> HealthEngine:
+    """Create an engine with two markets and three accounts."""
+    engine = HealthEngine(confirm_margin=0.1, snapshot_max_age=100)
+    engine.update_markets(
+        {
+            "0xusdc": {
+                "collateral_factor": E18 // 2,
+                "exchange_rate": E18,
+                "price": E18,
+            },
+            "0xweth": {
+                "collateral_factor": E18,
+                "exchange_rate": E18,
+                "price": 2 * E18,
+            },
+            "0xdead": None,
+        }
+    )
+    engine.update_snapshots(
+        {
+            # 50 of collateral against 40 of borrows
+            "0xa": {"0xusdc": (100, 0), "0xweth": (0, 20)},
+            # 100 of collateral against 100 of borrows
+            "0xb": {"0xweth": (50, 100)},
+            # no borrows
+            "0xc": {"0xusdc": (10, 0)},
+        },
+        block_number=1000,
+    )
+    return engine
+
+
+def test_rank_by_shortfall() -> None:
+    """Test that only accounts in shortfall are returned, largest first."""
+    ranked = rank_by_shortfall(
+        {
+            "0xa": [0, 10, 0],
+            "0xb": [0, 0, 5],
+            "0xc": [0, 0, 50],
+            "0xd": [3, 0, 100],
+            "0xe": None,
+        }
+    )
+    assert ranked == [
+        AccountLiquidity("0xc", 0, 50),
+        AccountLiquidity("0xb", 0, 5),
+    ]
+
+
+def test_health_factors() -> None:
+    """Test that the health factors are the risk adjusted collateral over the borrows."""
+    engine = make_engine()
+    assert engine.markets == ["0xusdc", "0xweth"]
+    np.testing.assert_allclose(engine.health_factors(), [1.25, 0.5, np.inf])
+    assert engine.below(1) == ["0xb"]
+    assert engine.near_threshold() == ["0xb"]
+
+    engine.update_prices({"0xweth": int(2.4 * E18)})
+    np.testing.assert_allclose(engine.health_factors(), [50 / 48, 0.5, np.inf])
+    assert engine.near_threshold() == ["0xb", "0xa"]
+
+
+def test_snapshots_replace_and_drop() -> None:
+    """Test that a snapshot replaces all the balances of an account."""
+    engine = make_engine()
+    engine.update_snapshots({"0xb": {"0xusdc": (400, 100)}}, block_number=1050)
+    np.testing.assert_allclose(engine.health_factors(), [1.25, 2.0, np.inf])
+
+    engine.drop(["0xa", "0xunknown"])
+    assert engine.below(np.inf) == ["0xb"]
+
+
+def test_stale_accounts() -> None:
+    """Test that unknown and old accounts are read again."""
+    engine = make_engine()
+    engine.update_snapshots({"0xb": {}}, block_number=1050)
+    assert engine.stale_accounts(["0xa", "0xb", "0xnew"], 1100) == ["0xnew"]
+    assert engine.stale_accounts(["0xa", "0xb", "0xnew"], 1101) == ["0xa", "0xnew"]
+    assert engine.stale_accounts(["0xb"], 1100, updated={"0xb": 1050}) == []
+    assert engine.stale_accounts(["0xb"], 1100, updated={"0xb": 1051}) == ["0xb"]
+
+
+def test_capacity_grows() -> None:
+    """Test that the matrices keep their values when new accounts are added."""
+    engine = make_engine()
+    engine.update_snapshots(
+        {f"0x{i}": {"0xweth": (i, 1)} for i in range(100)}, block_number=1000
+    )
+    assert len(engine.accounts) == 103
+    assert engine.o_token_balances.shape == (103, 2)
+    np.testing.assert_allclose(engine.health_factors()[:3], [1.25, 0.5, np.inf])
+    assert engine.health_factors()[-1] == 99
+
+
+def test_trigger_prices() -> None:
+    """Test that a price update returns the accounts it pushes into shortfall."""
+    engine = make_engine()
+    index = engine.trigger_price_index()
+    assert index.markets == ["0xusdc", "0xweth"]
+
+    # 0xa is short weth: 50 of collateral against 20 weth, liquidatable above 2.5
+    assert index.liquidatable("0xweth", int(2.4 * E18)) == ["0xb"]
+    assert index.liquidatable("0xweth", int(2.6 * E18)) == ["0xb", "0xa"]
+    # 0xa is long usdc: 100 * 0.5 * p against 40, liquidatable below 0.8
+    assert index.liquidatable("0xusdc", int(0.81 * E18)) == []
+    assert index.liquidatable("0xusdc", int(0.79 * E18)) == ["0xa"]
+    assert index.liquidatable("0xunknown", E18) == []
+
+    shocked = index.price_shock({"0xusdc": int(0.7 * E18), "0xweth": 3 * E18})
+    assert shocked == ["0xa", "0xb"]
+
+
+def test_trigger_prices_match_health_factors() -> None:
+    """Test that the trigger prices agree with a full revaluation."""
+    rng = np.random.default_rng(0)
+    engine = HealthEngine()
+    markets = [f"0xm{i}" for i in range(4)]
+    engine.update_markets(
+        {
+            market: {
+                "collateral_factor": int(rng.uniform(0.5, 0.9) * E18),
+                "exchange_rate": int(rng.uniform(0.01, 1) * E18),
+                "price": int(rng.uniform(1, 10) * E18),
+            }
+            for market in markets
+        }
+    )
+    engine.update_snapshots(
+        {
+            f"0x{i}": {
+                market: (int(rng.integers(0, 1000)), int(rng.integers(0, 100)))
+                for market in markets
+            }
+            for i in range(200)
+        },
+        block_number=1,
+    )
+    index = engine.trigger_price_index()
+    for market in markets:
+        for shock in (0.5, 0.9, 1.1, 2.0):
+            price = int(engine.prices[engine.markets.index(market)] * shock * E18)
+            expected = HealthEngine()
+            expected.__dict__.update(engine.__dict__)
+            expected.prices = engine.prices.copy()
+            expected.update_prices({market: price})
+            assert sorted(index.liquidatable(market, price)) == sorted(
+                expected.below(1)
+            )
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the indexer.py module of the LiquidationStation."""
+
+from pathlib import Path
+
+from packages.eightballer.skills.liquidation_station.indexer import BlockRangeIndexer
+
+
+def make_indexer(tmp_path: Path, **kwargs) -> BlockRangeIndexer:
+    """Create an indexer writing to a temporary directory."""
+    kwargs = {
+        "start_block": 0,
+        "chunk_size": 100,
+        "backfill_chunk_size": 50,
+        "confirmations": 10,
+        **kwargs,
+    }
+    return BlockRangeIndexer(checkpoint_path=tmp_path / "checkpoint.json", **kwargs)
+
+
+def test_first_period_only_backfills(tmp_path: Path) -> None:
+    """Test that without a checkpoint only history is requested."""
+    indexer = make_indexer(tmp_path)
+    assert indexer.get_block_ranges(1010) == [(951, 1000)]
+
+
+def test_new_blocks_are_fetched_in_chunks(tmp_path: Path) -> None:
+    """Test that only confirmed blocks after the head are requested."""
+    indexer = make_indexer(tmp_path)
+    (backfill,) = indexer.get_block_ranges(1010)
+    indexer.update(backfill)
+
+    ranges = indexer.get_block_ranges(1260)
+    assert ranges == [(1001, 1100), (1101, 1200), (1201, 1250), (901, 950)]
+    for block_range in ranges:
+        indexer.update(block_range)
+    assert indexer.checkpoint.head_block == 1250
+    assert indexer.checkpoint.tail_block == 901
+
+
+def test_streamed_blocks_are_skipped(tmp_path: Path) -> None:
+    """Test that only the gap before a healthy stream is fetched."""
+    indexer = make_indexer(tmp_path, start_block=1000)
+    (backfill,) = indexer.get_block_ranges(1010)
+    indexer.update(backfill)
+
+    # the stream started at 1101 and applied the events up to 1245
+    streamed = (1101, 1245)
+    assert indexer.get_block_ranges(1260, streamed) == [(1001, 1100)]
+    assert not indexer.skip_streamed(1260, streamed)
+    indexer.update((1001, 1100))
+    assert indexer.skip_streamed(1260, streamed)
+    assert indexer.checkpoint.head_block == 1245
+
+    # the stream went down, the blocks after it are polled again
+    assert indexer.get_block_ranges(1300) == [(1246, 1290)]
+
+
+def test_backfill_stops_at_start_block(tmp_path: Path) -> None:
+    """Test that the backfill never goes below the start block."""
+    indexer = make_indexer(tmp_path, start_block=960)
+    (backfill,) = indexer.get_block_ranges(1010)
+    assert backfill == (960, 1000)
+    indexer.update(backfill)
+    assert indexer.backfill_done
+    assert indexer.get_block_ranges(1010) == []
+
+
+def test_non_adjacent_ranges_are_ignored(tmp_path: Path) -> None:
+    """Test that the indexed window never contains gaps."""
+    indexer = make_indexer(tmp_path)
+    indexer.get_block_ranges(1010)
+    indexer.update((2000, 2100))
+    assert indexer.checkpoint.head_block == 1000
+    assert indexer.checkpoint.tail_block == 1001
+
+
+def test_rewind_on_shorter_chain(tmp_path: Path) -> None:
+    """Test that the head is moved back when the chain is reorganised."""
+    indexer = make_indexer(tmp_path)
+    indexer.update(indexer.get_block_ranges(1010)[0])
+    for block_range in indexer.get_block_ranges(1110):
+        indexer.update(block_range)
+    assert indexer.checkpoint.head_block == 1100
+
+    assert indexer.get_block_ranges(1105) == [(851, 900)]
+    assert indexer.checkpoint.head_block == 1095
+
+
+def test_checkpoint_roundtrip(tmp_path: Path) -> None:
+    """Test that the progress survives a restart."""
+    indexer = make_indexer(tmp_path)
+    indexer.update(indexer.get_block_ranges(1010)[0])
+    indexer.save()
+
+    restored = make_indexer(tmp_path)
+    restored.load()
+    assert restored.checkpoint.head_block == 1000
+    assert restored.checkpoint.tail_block == 951
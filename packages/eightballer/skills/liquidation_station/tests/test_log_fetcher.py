@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the log_fetcher.py module of the LiquidationStation."""
+
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from packages.eightballer.skills.liquidation_station.log_fetcher import LogFetcher
+
+
+class FakeProvider:
+    """A provider with a log in every block, limiting the results per query."""
+
+    def __init__(self, max_results: int = 1_000, delay: float = 0.0) -> None:
+        """Initialize the provider."""
+        self.max_results = max_results
+        self.delay = delay
+        self.queries: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_seen_in_flight = 0
+        self.lock = threading.Lock()
+
+    def get_logs(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Get the logs of a query."""
+        with self.lock:
+            self.queries.append(query)
+            self.in_flight += 1
+            self.max_seen_in_flight = max(self.max_seen_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            blocks = range(query["fromBlock"], query["toBlock"] + 1)
+            if len(blocks) > self.max_results:
+                raise ValueError(
+                    {"code": -32005, "message": "query returned more than 1000 results"}
+                )
+            return [{"blockNumber": block, "logIndex": 0} for block in reversed(blocks)]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_logs_are_merged_in_order() -> None:
+    """Test that the chunks are merged in block order."""
+    provider = FakeProvider(delay=0.01)
+    fetcher = LogFetcher(provider.get_logs, chunk_size=100, max_in_flight=3)
+    logs = fetcher.fetch((1, 950), address=["0xa"], topics=[["0xt"]])
+    assert [log["blockNumber"] for log in logs] == list(range(1, 951))
+    assert len(provider.queries) == 10
+    assert provider.queries[0] == {
+        "address": ["0xa"],
+        "topics": [["0xt"]],
+        "fromBlock": 1,
+        "toBlock": 100,
+    }
+    assert provider.max_seen_in_flight <= 3
+
+
+def test_ranges_are_split_on_too_many_results() -> None:
+    """Test that a rejected range is split until the provider accepts it."""
+    provider = FakeProvider(max_results=300)
+    fetcher = LogFetcher(provider.get_logs, chunk_size=1_000, max_in_flight=2)
+    logs = fetcher.fetch((0, 1_999))
+    assert [log["blockNumber"] for log in logs] == list(range(2_000))
+    # each chunk of 1000 blocks is split in four chunks of 250
+    assert fetcher.splits == 6
+
+
+def test_other_errors_are_raised() -> None:
+    """Test that errors which splitting cannot solve are raised."""
+
+    def get_logs(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raise ConnectionError("connection reset")
+
+    with pytest.raises(ConnectionError):
+        LogFetcher(get_logs).fetch((0, 10))
+
+    with pytest.raises(ValueError):
+        LogFetcher(FakeProvider(max_results=0).get_logs).fetch((0, 10))
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the multisend.py module of the LiquidationStation."""
+
+from eth_abi import decode, encode
+
+from packages.eightballer.skills.liquidation_station.multisend import (
+    AGGREGATE3_SELECTOR,
+    LIQUIDATE_BORROW_SELECTOR,
+    MULTISEND_SELECTOR,
+    MultiSendTx,
+    Operation,
+    aggregate_simulations_calldata,
+    aggregated_simulations_succeeded,
+    liquidation_tx,
+    multisend_calldata,
+    plan_bundles,
+    simulate_bundles,
+    simulation_succeeded,
+)
+from packages.eightballer.skills.liquidation_station.profitability import (
+    LiquidationCandidate,
+)
+
+BORROWED = "0x000000000000000000000000000000000000000A"
+COLLATERAL = "0x000000000000000000000000000000000000000b"
+
+
+def candidate(account: int, profit: float) -> LiquidationCandidate:
+    """Build a liquidation of an account."""
+    return LiquidationCandidate(
+        priority=-profit,
+        account=f"0x{account:040x}",
+        borrowed_market=BORROWED,
+        collateral_market=COLLATERAL,
+        repay_amount=account * 10**18,
+        seize_tokens=account * 10**8,
+        profit=profit,
+    )
+
+
+def test_multisend_encoding() -> None:
+    """Test that transactions are packed back to back, in order."""
+    txs = [
+        MultiSendTx(to=BORROWED, data=b"\x01\x02"),
+        MultiSendTx(
+            to=COLLATERAL, data=b"", value=5, operation=Operation.DELEGATE_CALL
+        ),
+    ]
+    calldata = multisend_calldata(txs)
+    assert calldata[:4] == MULTISEND_SELECTOR
+    (packed,) = decode(["bytes"], calldata[4:])
+    assert len(packed) == 2 * (1 + 20 + 32 + 32) + 2
+    assert packed[0] == Operation.CALL
+    assert packed[1:21] == bytes.fromhex(BORROWED[2:])
+    assert int.from_bytes(packed[53:85], "big") == 2
+    assert packed[85:87] == b"\x01\x02"
+    assert packed[87] == Operation.DELEGATE_CALL
+    assert int.from_bytes(packed[108:140], "big") == 5
+
+
+def test_liquidation_tx() -> None:
+    """Test the liquidateBorrow call of a liquidation."""
+    tx = liquidation_tx(candidate(3, 10.0))
+    assert tx.to == BORROWED
+    assert tx.data[:4] == LIQUIDATE_BORROW_SELECTOR
+    account, repay_amount, collateral = decode(
+        ["address", "uint256", "address"], tx.data[4:]
+    )
+    assert int(account, 16) == 3
+    assert repay_amount == 3 * 10**18
+    assert collateral.lower() == COLLATERAL.lower()
+
+
+def test_plan_bundles() -> None:
+    """Test that bundles keep the priority order under the gas limit."""
+    candidates = [candidate(i, 100.0 - i) for i in range(1, 8)]
+    bundles = plan_bundles(
+        candidates, gas_per_liquidation=800_000, max_bundle_gas=2_500_000
+    )
+    assert [len(bundle.candidates) for bundle in bundles] == [3, 3, 1]
+    assert [x for bundle in bundles for x in bundle.candidates] == candidates
+    assert all(bundle.gas <= 2_500_000 for bundle in bundles)
+    # a liquidation above the limit still gets its own bundle
+    assert len(plan_bundles(candidates, 800_000, 100_000)) == len(candidates)
+
+
+def test_simulate_bundles_split_fallback() -> None:
+    """Test that a failing bundle is split until the failing liquidation is dropped."""
+    candidates = [candidate(i, 100.0 - i) for i in range(1, 6)]
+    bad = candidates[3]
+    simulated = []
+
+    def simulate(bundle) -> bool:
+        simulated.append(len(bundle.candidates))
+        return bad not in bundle.candidates
+
+    (bundle,) = plan_bundles(candidates, 800_000, 8_000_000)
+    valid, failed = simulate_bundles([bundle], simulate)
+    assert failed == [bad]
+    assert [x for b in valid for x in b.candidates] == [
+        x for x in candidates if x is not bad
+    ]
+    assert sum(b.gas for b in valid) == 800_000 * 4
+    assert simulated == [5, 2, 3, 1, 2, 1, 1]
+
+
+def test_simulation_succeeded() -> None:
+    """Test reading the result of simulateAndRevert off the revert data."""
+    success = "0x" + (1).to_bytes(32, "big").hex() + (0).to_bytes(32, "big").hex()
+    failure = "0x" + (0).to_bytes(32, "big").hex() + (0).to_bytes(32, "big").hex()
+    assert simulation_succeeded({"error": {"code": 3, "data": success}})
+    assert simulation_succeeded({"error": {"data": "Reverted " + success}})
+    assert simulation_succeeded({"error": {"data": {"data": success}}})
+    assert not simulation_succeeded({"error": {"code": 3, "data": failure}})
+    assert not simulation_succeeded({"error": {"message": "out of gas"}})
+    assert not simulation_succeeded({"result": "0x"})
+
+
+def test_aggregated_simulations() -> None:
+    """Test batching simulations in a single aggregate3 call."""
+    safe = "0x000000000000000000000000000000000000000C"
+    calldatas = [b"\x01", b"\x02"]
+    data = aggregate_simulations_calldata(safe, calldatas)
+    assert data[:4] == AGGREGATE3_SELECTOR
+    (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+    assert [(target.lower(), allow) for target, allow, _ in calls] == [
+        (safe.lower(), True)
+    ] * 2
+
+    success = (1).to_bytes(32, "big") + (0).to_bytes(32, "big")
+    failure = (0).to_bytes(32, "big") + (0).to_bytes(32, "big")
+    results = [(False, success), (False, failure), (True, success), (False, b"")]
+    returned = encode(["(bool,bytes)[]"], [results])
+    assert aggregated_simulations_succeeded(returned) == [True, False, False, False]
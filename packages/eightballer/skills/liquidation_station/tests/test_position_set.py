@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the position_set.py module of the LiquidationStation."""
+
+import pytest
+from eth_utils import keccak
+
+from packages.eightballer.skills.liquidation_station.position_set import (
+    EMPTY_ROOT,
+    PositionSetDelta,
+    make_delta,
+    merkle_root,
+    resolve_positions,
+    sorted_accounts,
+)
+
+ACCOUNTS = [f"0x{i:040x}" for i in range(1, 6)]
+
+
+def test_merkle_root() -> None:
+    """Test that the root only depends on the set of accounts."""
+    assert merkle_root([]) == EMPTY_ROOT
+    leaf = keccak(bytes.fromhex(ACCOUNTS[0][2:]))
+    assert merkle_root(ACCOUNTS[:1]) == "0x" + leaf.hex()
+    root = merkle_root(ACCOUNTS)
+    assert merkle_root(reversed(ACCOUNTS)) == root
+    assert merkle_root([x.upper().replace("0X", "0x") for x in ACCOUNTS]) == root
+    assert merkle_root(ACCOUNTS + ACCOUNTS[:2]) == root
+    assert merkle_root(ACCOUNTS[:4]) != root
+
+    # the fifth leaf has no sibling and is carried up to the root
+    leaves = [keccak(bytes.fromhex(x[2:])) for x in ACCOUNTS]
+    left = keccak(keccak(leaves[0] + leaves[1]) + keccak(leaves[2] + leaves[3]))
+    assert root == "0x" + keccak(left + leaves[4]).hex()
+
+
+def test_sorted_accounts_are_checksummed() -> None:
+    """Test that the same account in another case is counted once."""
+    account = "0x8849f1a0cB6b5D6076aB150546EddEe193754F1C"
+    other = "0x00000000000000000000000000000000000000aa"
+    assert sorted_accounts([account.lower(), other, account.upper()[2:]]) == [
+        "0x00000000000000000000000000000000000000AA",
+        account,
+    ]
+    delta = PositionSetDelta.between([account.lower()], [account, other])
+    assert delta.added == ("0x00000000000000000000000000000000000000AA",)
+    assert delta.removed == ()
+    assert delta.apply([account.lower()]) == sorted_accounts([account, other])
+
+
+def test_delta_round_trip() -> None:
+    """Test that a delta rebuilds the current accounts from the previous ones."""
+    previous = ACCOUNTS[:3]
+    current = ACCOUNTS[1:]
+    delta = PositionSetDelta.between(previous, current)
+    assert delta.added == tuple(ACCOUNTS[3:])
+    assert delta.removed == (ACCOUNTS[0],)
+    assert len(delta) == 3
+    assert PositionSetDelta.deserialize(delta.serialize()) == delta
+    assert resolve_positions(previous, delta, merkle_root(current)) == current
+    with pytest.raises(ValueError):
+        resolve_positions(ACCOUNTS[:2], delta, merkle_root(current))
+
+
+def test_make_delta() -> None:
+    """Test that large or unresolvable deltas are left to ipfs."""
+    assert make_delta(None, ACCOUNTS, max_delta_size=10) is None
+    assert make_delta([], ACCOUNTS, max_delta_size=4) is None
+    assert len(make_delta(ACCOUNTS[:3], ACCOUNTS, max_delta_size=2)) == 2
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the profitability.py module of the LiquidationStation."""
+
+import heapq
+
+import pytest
+
+from packages.eightballer.skills.liquidation_station.health import HealthEngine
+from packages.eightballer.skills.liquidation_station.profitability import (
+    LiquidationCandidate,
+    ProfitabilityEngine,
+    calculate_seize_tokens,
+)
+
+E18 = 10**18
+MARKETS = {
+    "0xusdc": {
+        "collateral_factor": 8 * E18 // 10,
+        "exchange_rate": E18,
+        "price": E18,
+    },
+    "0xweth": {
+        "collateral_factor": 8 * E18 // 10,
+        "exchange_rate": E18,
+        "price": 2000 * E18,
+    },
+}
+
+
+def make_engines(**kwargs) -> tuple:
+    """Create a health engine with positions, and a profitability engine."""
+    health_engine = HealthEngine()
+    health_engine.update_markets(MARKETS)
+    health_engine.update_snapshots(
+        {
+            # 1000 USD of weth against 900 USD of usdc
+            "0xa": {"0xweth": (E18 // 2, 0), "0xusdc": (0, 900 * E18)},
+            # 10000 USD of usdc against 9000 USD of weth, and 1000 USD of usdc
+            "0xb": {"0xusdc": (10_000 * E18, 1_000 * E18), "0xweth": (0, 4 * E18)},
+            # 100000 USD of usdc against 80000 USD of weth
+            "0xc": {"0xusdc": (100_000 * E18, 0), "0xweth": (0, 40 * E18)},
+        },
+        block_number=1,
+    )
+    profitability_engine = ProfitabilityEngine(**kwargs)
+    profitability_engine.update_params(E18 // 2, 108 * E18 // 100, block_number=1)
+    profitability_engine.update_markets(MARKETS)
+    return health_engine, profitability_engine
+
+
+def test_calculate_seize_tokens() -> None:
+    """Test that the seized oTokens include the incentive."""
+    seize_tokens = calculate_seize_tokens(
+        100 * E18, 2000 * E18, E18, 2 * 10**16, 108 * E18 // 100
+    )
+    assert seize_tokens == 100 * 2000 * 108 // 100 * 50 * E18
+
+
+def test_best_pair_is_chosen() -> None:
+    """Test that the pair with the largest profit is liquidated."""
+    health_engine, engine = make_engines(slippage=0.0, market_depth=1e12)
+    candidate = engine.best_liquidation(health_engine, "0xb")
+    # half the 8000 USD of weth borrows can be repaid
+    assert candidate.borrowed_market == "0xweth"
+    assert candidate.collateral_market == "0xusdc"
+    assert candidate.repay_amount == pytest.approx(2 * E18, rel=1e-5)
+    assert candidate.profit == pytest.approx(4000 * 0.08, rel=1e-4)
+
+
+def test_repay_is_capped_by_collateral_and_slippage() -> None:
+    """Test that the repay is the smallest of the limits."""
+    health_engine, engine = make_engines(slippage=0.0, market_depth=1e12)
+    # half the borrows, with 1000 USD of collateral covering up to 925 USD
+    candidate = engine.best_liquidation(health_engine, "0xa")
+    assert candidate.repay_amount == pytest.approx(450 * E18, rel=1e-5)
+
+    health_engine, engine = make_engines(slippage=0.01, market_depth=10_000)
+    candidate = engine.best_liquidation(health_engine, "0xc")
+    optimum = 10_000 * (0.08 - 1.08 * 0.01) / (2 * 1.08)
+    assert candidate.repay_amount == pytest.approx(optimum / 2000 * E18, rel=1e-5)
+
+    # repaying usdc to seize usdc needs no swap
+    candidate = engine.best_liquidation(health_engine, "0xb")
+    assert candidate.borrowed_market == candidate.collateral_market == "0xusdc"
+    assert candidate.repay_amount == pytest.approx(500 * E18, rel=1e-5)
+
+    health_engine, engine = make_engines(slippage=0.08, market_depth=10_000)
+    assert engine.best_liquidation(health_engine, "0xa") is None
+
+
+def test_candidates_are_a_priority_queue() -> None:
+    """Test that the most profitable liquidation is popped first."""
+    health_engine, engine = make_engines(slippage=0.0, market_depth=1e12)
+    heap = engine.candidates(health_engine, ["0xa", "0xb", "0xc", "0xunknown"])
+    assert [heapq.heappop(heap).account for _ in range(len(heap))] == [
+        "0xc",
+        "0xb",
+        "0xa",
+    ]
+
+    heap = engine.candidates(health_engine, ["0xa", "0xb"], gas_cost=100)
+    # 0xa only brings 36 USD
+    assert [candidate.account for candidate in heap] == ["0xb"]
+
+
+def test_quantized_candidates() -> None:
+    """Test that a liquidation is agreed on with integers only."""
+    health_engine, engine = make_engines(slippage=0.0, market_depth=1e12)
+    candidate = engine.best_liquidation(health_engine, "0xa")
+    quantized = candidate.quantize()
+    assert all(isinstance(value, (int, str)) for value in quantized.values())
+    restored = LiquidationCandidate.from_quantized(quantized)
+    assert restored.repay_amount == candidate.repay_amount
+    assert restored.profit == pytest.approx(candidate.profit, abs=0.005)
+    assert restored.priority == -restored.profit
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the rounds.py module of the LiquidationStation."""
+
+import json
+from typing import Any, List, Type
+
+import pytest
+
+from packages.eightballer.skills.liquidation_station.payloads import (
+    CalculatePositionHealthPayload,
+    PrepareLiquidationTransactionsPayload,
+    RegistrationPayload,
+    ResetAndPausePayload,
+    SelectBlockPayload,
+    SubmitPositionLiquidationTransactionsPayload,
+)
+from packages.eightballer.skills.liquidation_station.position_set import EMPTY_ROOT
+from packages.eightballer.skills.liquidation_station.rounds import (
+    CalculatePositionHealthRound,
+    Event,
+    LiquidationStationAbciApp,
+    PrepareLiquidationTransactionsRound,
+    RegistrationRound,
+    ResetAndPauseRound,
+    SelectBlockRound,
+    SkippableRound,
+    SubmitPositionLiquidationTransactionsRound,
+    SynchronizedData,
+)
+from packages.valory.skills.abstract_round_abci.base import AbciAppDB
+
+PARTICIPANTS = ("agent_0", "agent_1", "agent_2", "agent_3")
+
+
+def make_synchronized_data() -> SynchronizedData:
+    """Build the synchronized data of a service of four agents."""
+    return SynchronizedData(
+        db=AbciAppDB(
+            setup_data=AbciAppDB.data_to_lists(
+                dict(
+                    participants=PARTICIPANTS,
+                    all_participants=PARTICIPANTS,
+                    consensus_threshold=None,
+                    safe_contract_address="0x0",
+                )
+            ),
+            cross_period_persisted_keys=frozenset(
+                LiquidationStationAbciApp.cross_period_persisted_keys
+            ),
+        )
+    )
+
+
+def run_round(round_cls: Type[SkippableRound], payload_cls: Any, value: List) -> Any:
+    """Run a round on the same value sent by three of the four agents."""
+    test_round = round_cls(make_synchronized_data())
+    for sender in PARTICIPANTS[:3]:
+        test_round.process_payload(payload_cls(sender, json.dumps(value)))
+    return test_round.end_block()
+
+
+@pytest.mark.parametrize(
+    "round_cls, payload_cls, skip_event",
+    [
+        (
+            CalculatePositionHealthRound,
+            CalculatePositionHealthPayload,
+            Event.NO_SHORTFALL,
+        ),
+        (
+            PrepareLiquidationTransactionsRound,
+            PrepareLiquidationTransactionsPayload,
+            Event.NOT_PROFITABLE,
+        ),
+    ],
+)
+def test_skippable_round(
+    round_cls: Type[SkippableRound], payload_cls: Any, skip_event: Event
+) -> None:
+    """Test that an empty agreed value skips the period, and a value goes on."""
+    synchronized_data, event = run_round(round_cls, payload_cls, [])
+    assert event == skip_event
+    assert synchronized_data.skipped_round == round_cls.auto_round_id()
+
+    synchronized_data, event = run_round(round_cls, payload_cls, ["0x01"])
+    assert event == Event.DONE
+    assert synchronized_data.skipped_round is None
+
+
+def test_reset_before_the_accounts_are_agreed() -> None:
+    """Test that a period resets when the first collection of the accounts fails."""
+    registration = RegistrationRound(make_synchronized_data())
+    for sender in PARTICIPANTS[:3]:
+        registration.process_payload(RegistrationPayload(sender, "0x0"))
+    synchronized_data, event = registration.end_block()
+    assert event == Event.DONE
+
+    reset = ResetAndPauseRound(synchronized_data)
+    for sender in PARTICIPANTS[:3]:
+        reset.process_payload(ResetAndPausePayload(sender, 0))
+    synchronized_data, event = reset.end_block()
+    assert event == Event.DONE
+    assert synchronized_data.positions_root == EMPTY_ROOT
+    assert synchronized_data.positions_ipfs_hash is None
+    assert synchronized_data.pending_fees == {}
+
+
+def test_select_block() -> None:
+    """Test that the period reads the chain at the lowest proposed block."""
+    select_block = SelectBlockRound(make_synchronized_data())
+    for sender, block_number in zip(PARTICIPANTS, (105, 103)):
+        select_block.process_payload(SelectBlockPayload(sender, block_number))
+    assert select_block.end_block() is None
+
+    select_block.process_payload(SelectBlockPayload(PARTICIPANTS[2], 104))
+    synchronized_data, event = select_block.end_block()
+    assert event == Event.DONE
+    assert synchronized_data.period_block == 103
+
+
+def test_pending_fees() -> None:
+    """Test that the fees of the agreed transactions are kept until mined."""
+    fees = dict(max_fee_per_gas=2, max_priority_fee_per_gas=1)
+    synchronized_data = make_synchronized_data().update(
+        pending_fees=json.dumps(
+            {"4": dict(block=90, **fees), "6": dict(block=95, **fees)}
+        )
+    )
+    txs = [dict(nonce=5, fee_block=100, **fees)]
+    submit = SubmitPositionLiquidationTransactionsRound(synchronized_data)
+    for sender in PARTICIPANTS[:3]:
+        submit.process_payload(
+            SubmitPositionLiquidationTransactionsPayload(sender, json.dumps(txs))
+        )
+    synchronized_data, event = submit.end_block()
+    assert event == Event.DONE
+    assert synchronized_data.pending_fees == {
+        "5": dict(block=100, **fees),
+        "6": dict(block=95, **fees),
+    }
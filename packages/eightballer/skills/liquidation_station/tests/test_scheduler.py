@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the scheduler.py module of the LiquidationStation."""
+
+from packages.eightballer.skills.contract_subscription.head_tracker import HeadTracker
+from packages.eightballer.skills.liquidation_station.scheduler import PeriodScheduler
+
+
+class FakeClock:
+    """A clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Initialize the clock."""
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        """Get the time."""
+        return self.now
+
+
+def test_period_scheduler_new_head() -> None:
+    """Test that a period is due as soon as a new head arrives."""
+    clock = FakeClock()
+    tracker = HeadTracker(clock=clock)
+    scheduler = PeriodScheduler(fallback_timeout=10.0, clock=clock)
+    assert scheduler.is_due(tracker)
+
+    tracker.update(101)
+    scheduler.start_period(100, tracker.head)
+    assert scheduler.is_due(tracker)
+
+    tracker.update(102)
+    clock.now += 2.0
+    scheduler.start_period(102, tracker.head)
+    assert not scheduler.is_due(tracker)
+    clock.now += 1.0
+    tracker.update(103)
+    assert scheduler.is_due(tracker)
+    assert scheduler.lag(tracker) == {
+        "head": 103,
+        "period_block": 102,
+        "blocks_behind": 0,
+        "blocks_since": 1,
+        "period_duration": 2.0,
+        "head_age": 0.0,
+    }
+
+
+def test_period_scheduler_fallback() -> None:
+    """Test that a period is due after the fallback timeout without heads."""
+    clock = FakeClock()
+    tracker = HeadTracker(clock=clock)
+    scheduler = PeriodScheduler(fallback_timeout=10.0, clock=clock)
+    scheduler.start_period(100)
+    clock.now += 9.9
+    assert not scheduler.is_due(tracker)
+    clock.now += 0.1
+    assert scheduler.is_due(tracker)
+    assert scheduler.lag(tracker)["blocks_behind"] is None
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the timings.py module of the LiquidationStation."""
+
+import pytest
+
+from packages.eightballer.skills.liquidation_station.timings import (
+    SkipRate,
+    period_timings,
+)
+
+
+def test_period_timings() -> None:
+    """Test that the time of a period is split between collection and consensus."""
+    timings = period_timings(
+        [
+            {
+                "behaviour": "collect_positions",
+                "data": {"local": 1.5, "consensus": 2.0, "total": 3.5},
+            },
+            {
+                "behaviour": "calculate_position_health",
+                "data": {"local": 0.5, "consensus": 1.0, "total": 1.5},
+            },
+            {"behaviour": "registration", "data": {"consensus": 0.25}},
+        ]
+    )
+    assert timings["collect"] == pytest.approx(2.0)
+    assert timings["consensus"] == pytest.approx(3.25)
+    assert timings["total"] == pytest.approx(5.25)
+    assert timings["behaviours"]["registration"] == {
+        "collect": 0.0,
+        "consensus": 0.25,
+    }
+    assert period_timings([])["total"] == 0
+
+
+def test_skip_rate() -> None:
+    """Test that the skipped periods are counted by the round they skipped after."""
+    skip_rate = SkipRate()
+    assert skip_rate.rate == 0.0
+    for skipped_round in [
+        "calculate_position_health",
+        None,
+        "calculate_position_health",
+        "prepare_liquidation_transactions",
+    ]:
+        skip_rate.record(skipped_round)
+    assert skip_rate.as_dict() == {
+        "periods": 4,
+        "skipped": {
+            "calculate_position_health": 2,
+            "prepare_liquidation_transactions": 1,
+        },
+        "rate": 0.75,
+    }
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the tx_cache.py module of the LiquidationStation."""
+
+from dataclasses import replace
+
+from packages.eightballer.skills.liquidation_station.multisend import liquidation_tx
+from packages.eightballer.skills.liquidation_station.profitability import (
+    LiquidationCandidate,
+)
+from packages.eightballer.skills.liquidation_station.tx_cache import LiquidationTxCache
+
+ACCOUNT = "0x0000000000000000000000000000000000000001"
+OTHER = "0x0000000000000000000000000000000000000002"
+
+
+def candidate(account: str = ACCOUNT, repay_amount: int = 10**18):
+    """Build a liquidation."""
+    return LiquidationCandidate(
+        priority=-1.0,
+        account=account,
+        borrowed_market="0x000000000000000000000000000000000000000A",
+        collateral_market="0x000000000000000000000000000000000000000b",
+        repay_amount=repay_amount,
+        seize_tokens=10**8,
+        profit=1.0,
+    )
+
+
+def test_prepare_reuses_entries() -> None:
+    """Test that a liquidation is built once while it is sized the same."""
+    tx_cache = LiquidationTxCache()
+    entry = tx_cache.prepare(candidate(), block_number=100, nonce=3)
+    assert entry.tx == liquidation_tx(candidate())
+    # the priority changes with the prices, the transaction does not
+    same = replace(candidate(), priority=-2.0)
+    assert tx_cache.prepare(same, block_number=101, nonce=3) is entry
+    assert tx_cache.prepare(candidate(repay_amount=1), 102, 3) is not entry
+    assert tx_cache.prepare(candidate(repay_amount=1), 102, 4).nonce == 4
+    assert (tx_cache.hits, tx_cache.misses) == (1, 3)
+
+
+def test_is_ready() -> None:
+    """Test that a simulation is trusted for max_age blocks at the same nonce."""
+    tx_cache = LiquidationTxCache(max_age=2)
+    tx_cache.prepare(candidate(), block_number=100, nonce=3)
+    assert not tx_cache.is_ready(candidate(), 100, 3)
+    tx_cache.record_simulation(ACCOUNT, 100, False)
+    assert not tx_cache.is_ready(candidate(), 100, 3)
+    tx_cache.record_simulation(ACCOUNT, 101, True)
+    assert tx_cache.is_ready(candidate(), 103, 3)
+    assert not tx_cache.is_ready(candidate(), 104, 3)
+    assert not tx_cache.is_ready(candidate(), 101, 4)
+    assert not tx_cache.is_ready(candidate(repay_amount=1), 101, 3)
+    assert not tx_cache.is_ready(candidate(OTHER), 101, 3)
+    assert tx_cache.is_ready(candidate(), 101, 3, max_age=0)
+    assert not tx_cache.is_ready(candidate(), 102, 3, max_age=0)
+
+
+def test_invalidate() -> None:
+    """Test that entries are dropped on account updates and nonce changes."""
+    tx_cache = LiquidationTxCache()
+    tx_cache.prepare(candidate(), block_number=100, nonce=3)
+    tx_cache.prepare(candidate(OTHER), block_number=105, nonce=3)
+    assert tx_cache.oldest_block == 100
+
+    assert tx_cache.invalidate({ACCOUNT: 100, OTHER: 101}, nonce=3) == 0
+    assert tx_cache.invalidate({ACCOUNT: 101}, nonce=3) == 1
+    assert list(tx_cache.entries) == [OTHER]
+    assert tx_cache.invalidate({}, nonce=4) == 1
+    assert len(tx_cache) == 0
+
+    tx_cache.prepare(candidate(), block_number=100, nonce=3)
+    tx_cache.prepare(candidate(OTHER), block_number=100, nonce=3)
+    tx_cache.retain([OTHER])
+    assert list(tx_cache.entries) == [OTHER]
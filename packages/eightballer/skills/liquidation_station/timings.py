@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the metrics of the periods of LiquidationStationAbciApp."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+COLLECT = "local"
+CONSENSUS = "consensus"
+
+
+def period_timings(benchmark_data: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Break the time spent in a period down by behaviour.
+
+    The `local` block of a behaviour collects the data of its payload, its
+    `consensus` block sends the payload and waits for the round to end.
+
+    :param benchmark_data: the data of the benchmark tool, one entry per behaviour.
+    :return: the seconds spent collecting and in consensus, in total and by behaviour.
+    """
+    behaviours = {
+        entry["behaviour"]: {
+            "collect": entry["data"].get(COLLECT, 0.0),
+            "consensus": entry["data"].get(CONSENSUS, 0.0),
+        }
+        for entry in benchmark_data
+    }
+    collect = sum(timing["collect"] for timing in behaviours.values())
+    consensus = sum(timing["consensus"] for timing in behaviours.values())
+    return {
+        "collect": collect,
+        "consensus": consensus,
+        "total": collect + consensus,
+        "behaviours": behaviours,
+    }
+
+
+@dataclass
+class SkipRate:
+    """Count the periods which skipped to the reset, by the round they skipped after."""
+
+    periods: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, skipped_round: Optional[str]) -> None:
+        """Record a period, and the round it skipped after if it did."""
+        self.periods += 1
+        if skipped_round is not None:
+            self.skipped[skipped_round] = self.skipped.get(skipped_round, 0) + 1
+
+    @property
+    def rate(self) -> float:
+        """The fraction of the periods which skipped."""
+        return sum(self.skipped.values()) / self.periods if self.periods else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the metric to publish."""
+        return {
+            "periods": self.periods,
+            "skipped": dict(self.skipped),
+            "rate": self.rate,
+        }
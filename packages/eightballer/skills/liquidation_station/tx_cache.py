@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the cache of the liquidation transactions prepared in advance."""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Optional, Tuple
+
+from packages.eightballer.skills.liquidation_station.multisend import (
+    MultiSendTx,
+    liquidation_tx,
+)
+from packages.eightballer.skills.liquidation_station.profitability import (
+    LiquidationCandidate,
+)
+
+
+def liquidation_key(candidate: LiquidationCandidate) -> Tuple[str, str, str, int]:
+    """The fields which decide the transaction of a liquidation."""
+    return (
+        candidate.account,
+        candidate.borrowed_market,
+        candidate.collateral_market,
+        candidate.repay_amount,
+    )
+
+
+@dataclass(frozen=True)
+class PreparedLiquidation:
+    """A liquidation transaction, built and possibly simulated in advance."""
+
+    candidate: LiquidationCandidate
+    tx: MultiSendTx
+    block_number: int
+    nonce: int
+    simulated_block: Optional[int] = None
+    simulated: bool = False
+
+
+class LiquidationTxCache:
+    """
+    Keep the liquidation transactions of the accounts close to shortfall ready.
+
+    An entry is built for an account at a block and a Safe nonce. It is
+    reused as long as the liquidation is sized the same, and dropped when the
+    account is updated after the block or the nonce changes. A successful
+    simulation is trusted for `max_age` blocks, so at the moment of shortfall
+    a liquidation which was already simulated only has to be broadcast.
+    """
+
+    def __init__(self, max_age: int = 2) -> None:
+        """
+        Initialize the cache.
+
+        :param max_age: the number of blocks a successful simulation is trusted for.
+        """
+        self.max_age = max_age
+        self.entries: Dict[str, PreparedLiquidation] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """The number of accounts with a prepared liquidation."""
+        return len(self.entries)
+
+    @property
+    def oldest_block(self) -> Optional[int]:
+        """The oldest block an entry was built at."""
+        return min((x.block_number for x in self.entries.values()), default=None)
+
+    def prepare(
+        self, candidate: LiquidationCandidate, block_number: int, nonce: int
+    ) -> PreparedLiquidation:
+        """
+        Get the prepared liquidation of a candidate, building it if needed.
+
+        :param candidate: the liquidation.
+        :param block_number: the block the liquidation was sized at.
+        :param nonce: the current nonce of the Safe.
+        :return: the cached entry if it is still valid, a new one otherwise.
+        """
+        entry = self.entries.get(candidate.account)
+        if (
+            entry is not None
+            and entry.nonce == nonce
+            and liquidation_key(entry.candidate) == liquidation_key(candidate)
+        ):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = PreparedLiquidation(
+            candidate=candidate,
+            tx=liquidation_tx(candidate),
+            block_number=block_number,
+            nonce=nonce,
+        )
+        self.entries[candidate.account] = entry
+        return entry
+
+    def record_simulation(self, account: str, block_number: int, success: bool) -> None:
+        """Record the outcome of simulating the liquidation of an account on its own."""
+        entry = self.entries.get(account)
+        if entry is not None:
+            self.entries[account] = replace(
+                entry, simulated_block=block_number, simulated=success
+            )
+
+    def is_ready(
+        self,
+        candidate: LiquidationCandidate,
+        block_number: int,
+        nonce: int,
+        max_age: Optional[int] = None,
+    ) -> bool:
+        """
+        Whether the liquidation was simulated successfully recently enough.
+
+        :param candidate: the liquidation.
+        :param block_number: the current block.
+        :param nonce: the current nonce of the Safe.
+        :param max_age: the blocks the simulation is trusted for, `max_age` by default.
+        :return: whether the liquidation is ready.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        entry = self.entries.get(candidate.account)
+        return (
+            entry is not None
+            and entry.simulated
+            and entry.nonce == nonce
+            and entry.simulated_block is not None
+            and block_number - entry.simulated_block <= max_age
+            and liquidation_key(entry.candidate) == liquidation_key(candidate)
+        )
+
+    def invalidate(self, updated: Dict[str, int], nonce: int) -> int:
+        """
+        Drop the entries of the accounts updated since, or of another nonce.
+
+        :param updated: the block each account was last updated at.
+        :param nonce: the current nonce of the Safe.
+        :return: the number of entries dropped.
+        """
+        stale = [
+            account
+            for account, entry in self.entries.items()
+            if entry.nonce != nonce or updated.get(account, -1) > entry.block_number
+        ]
+        for account in stale:
+            del self.entries[account]
+        return len(stale)
+
+    def retain(self, accounts: Iterable[str]) -> None:
+        """Drop the entries of the accounts which are no longer close to shortfall."""
+        keep = set(accounts)
+        for account in [x for x in self.entries if x not in keep]:
+            del self.entries[account]
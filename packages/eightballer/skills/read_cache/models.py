@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 eightballer
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the models of the read_cache skill."""
+
+from typing import Any
+
+from aea.skills.base import Model
+
+from packages.eightballer.skills.read_cache.read_cache import ReadCache as BaseReadCache
+
+
+class ReadCache(Model, BaseReadCache):
+    """Serve the identical contract reads of a block from memory."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the cache."""
+        Model.__init__(self, **kwargs)
+        BaseReadCache.__init__(self)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the per block read cache of the contract api calls."""
+
+import json
+from enum import Enum
+from typing import Any, Callable, Dict, Generator, Optional, Set, Tuple
+
+CacheKey = Tuple[int, str]
+Read = Callable[[], Generator[Any, None, Optional[Any]]]
+WaitForCondition = Callable[[Callable[[], bool]], Generator[Any, None, Any]]
+
+
+class ReadStatus(Enum):
+    """The status of a read looked up in the cache."""
+
+    HIT = "hit"
+    IN_FLIGHT = "in_flight"
+    MISS = "miss"
+
+
+class ReadCache:
+    """
+    Serve the identical contract reads of a block from memory.
+
+    The reads are keyed by the block they are made at and their request, so
+    a read is only made again once a new block is seen. A read requested
+    while the same one is in flight waits for it instead of being sent twice.
+    The values of older blocks are dropped when a new block is seen.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self.block_number: Optional[int] = None
+        self.values: Dict[str, Any] = {}
+        self.in_flight: Set[CacheKey] = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(**kwargs: Any) -> str:
+        """Get the key of a request, independent of the order of its arguments."""
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    def advance(self, block_number: int) -> None:
+        """Drop the values of the previous blocks once a new block is seen."""
+        if self.block_number is None or block_number > self.block_number:
+            self.block_number = block_number
+            self.values.clear()
+
+    def lookup(self, block_number: int, key: str) -> Tuple[ReadStatus, Any]:
+        """
+        Look a read up, marking it in flight on a miss.
+
+        A read which is coalesced with one in flight is counted again, as a
+        hit or a miss, when it is looked up once the other one is done.
+
+        :param block_number: the block the read is made at.
+        :param key: the key of the request.
+        :return: the status of the read, and its value on a hit.
+        """
+        self.advance(block_number)
+        if block_number == self.block_number and key in self.values:
+            self.hits += 1
+            return ReadStatus.HIT, self.values[key]
+        if (block_number, key) in self.in_flight:
+            self.coalesced += 1
+            return ReadStatus.IN_FLIGHT, None
+        self.misses += 1
+        self.in_flight.add((block_number, key))
+        return ReadStatus.MISS, None
+
+    def is_pending(self, block_number: int, key: str) -> bool:
+        """Whether a read is in flight."""
+        return (block_number, key) in self.in_flight
+
+    def complete(self, block_number: int, key: str, value: Any) -> None:
+        """Store the value of a read, unless a newer block was seen meanwhile."""
+        self.in_flight.discard((block_number, key))
+        if block_number == self.block_number:
+            self.values[key] = value
+
+    def fail(self, block_number: int, key: str) -> None:
+        """Drop a read which failed, so that the next lookup makes it again."""
+        self.in_flight.discard((block_number, key))
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of the lookups served from memory."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The counters of the cache, to be displayed."""
+        return {
+            "block_number": self.block_number,
+            "entries": len(self.values),
+            "in_flight": len(self.in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hit_rate,
+        }
+
+
+def cached_read(
+    read_cache: ReadCache,
+    block_number: int,
+    key: str,
+    read: Read,
+    wait_for_condition: WaitForCondition,
+) -> Generator[Any, None, Optional[Any]]:
+    """
+    Make a read through the cache, from the generator of a behaviour.
+
+    :param read_cache: the cache.
+    :param block_number: the block the read is made at.
+    :param key: the key of the request.
+    :param read: makes the read, returning None when it failed.
+    :param wait_for_condition: the wait_for_condition of the behaviour.
+    :return: the value of the read, or None when it failed.
+    """
+    status, value = read_cache.lookup(block_number, key)
+    while status is ReadStatus.IN_FLIGHT:
+        yield from wait_for_condition(
+            lambda: not read_cache.is_pending(block_number, key)
+        )
+        status, value = read_cache.lookup(block_number, key)
+    if status is ReadStatus.HIT:
+        return value
+
+    try:
+        value = yield from read()
+    finally:
+        if value is None:
+            read_cache.fail(block_number, key)
+        else:
+            read_cache.complete(block_number, key, value)
+    return value
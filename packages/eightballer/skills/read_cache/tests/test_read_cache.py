@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the read_cache.py module of the ReadCache."""
+
+from packages.eightballer.skills.read_cache.read_cache import (
+    ReadCache,
+    ReadStatus,
+    cached_read,
+)
+
+
+def test_reads_are_served_until_the_next_block() -> None:
+    """Test that a read is made once per block."""
+    read_cache = ReadCache()
+    key = read_cache.key(contract_callable="balance_of", owner_address="0xa")
+    assert key == read_cache.key(owner_address="0xa", contract_callable="balance_of")
+    assert read_cache.lookup(100, key) == (ReadStatus.MISS, None)
+    read_cache.complete(100, key, {"balance": 1})
+    assert read_cache.lookup(100, key) == (ReadStatus.HIT, {"balance": 1})
+    assert read_cache.lookup(101, key) == (ReadStatus.MISS, None)
+    assert not read_cache.values
+    assert (read_cache.hits, read_cache.misses) == (1, 2)
+
+
+def test_identical_reads_in_flight_are_coalesced() -> None:
+    """Test that a read in flight is not made again."""
+    read_cache = ReadCache()
+    key = read_cache.key(contract_callable="balance_of")
+    assert read_cache.lookup(100, key)[0] is ReadStatus.MISS
+    assert read_cache.lookup(100, key)[0] is ReadStatus.IN_FLIGHT
+    assert read_cache.is_pending(100, key)
+    read_cache.fail(100, key)
+    # a failed read is made again by the next lookup
+    assert read_cache.lookup(100, key)[0] is ReadStatus.MISS
+    assert read_cache.as_dict()["coalesced"] == 1
+
+
+def test_reads_of_an_older_block_are_not_stored() -> None:
+    """Test that a read completing after a new block is not served."""
+    read_cache = ReadCache()
+    key = read_cache.key(contract_callable="balance_of")
+    read_cache.lookup(100, key)
+    read_cache.advance(101)
+    read_cache.complete(100, key, {"balance": 1})
+    assert read_cache.lookup(101, key)[0] is ReadStatus.MISS
+    assert read_cache.hit_rate == 0.0
+
+
+def test_cached_read_waits_for_the_read_in_flight() -> None:
+    """Test that a read waiting for one in flight gets its value."""
+    read_cache = ReadCache()
+    key = read_cache.key(contract_callable="balance_of")
+    reads = []
+
+    def read():
+        """Make a read, yielding once."""
+        reads.append(key)
+        yield
+        return {"balance": 1}
+
+    def wait_for_condition(condition):
+        """Yield until the condition holds."""
+        while not condition():
+            yield
+
+    first = cached_read(read_cache, 100, key, read, wait_for_condition)
+    second = cached_read(read_cache, 100, key, read, wait_for_condition)
+    next(first)
+    next(second)
+    for generator in (first, second):
+        try:
+            next(generator)
+        except StopIteration as stop:
+            assert stop.value == {"balance": 1}
+    assert reads == [key]
+    assert (read_cache.hits, read_cache.misses, read_cache.coalesced) == (1, 1, 1)
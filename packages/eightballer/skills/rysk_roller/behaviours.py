@@ -20,11 +20,23 @@
 """This package contains round behaviours of FlowchartToFSMAbciApp."""
 import json
 from abc import ABC
-from dataclasses import asdict
+from dataclasses import asdict, astuple
 from datetime import datetime
-from typing import Generator, Set, Type, cast
+from typing import Any, Dict, Generator, List, Optional, Set, Type, cast
 
+import numpy as np
+from aea.protocols.base import Message
+from aea.protocols.dialogue.base import Dialogues
+
+from packages.eightballer.skills.read_cache.read_cache import cached_read
+from packages.eightballer.skills.rysk_roller.fan_out import gather
 from packages.eightballer.skills.rysk_roller.models import Params, StrategyAction
+from packages.eightballer.skills.rysk_roller.option_chain import (
+    DECIMALS,
+    OptionChain,
+    to_e18,
+)
+from packages.eightballer.skills.rysk_roller.pricer import QuoteSet
 from packages.eightballer.skills.rysk_roller.rounds import (
     AnalyseDataPayload,
     AnalyseDataRound,
@@ -43,13 +55,21 @@ from packages.eightballer.skills.rysk_roller.rounds import (
     PutExercisedRound,
     PutExpiredPayload,
     PutExpiredRound,
+    SelectBlockPayload,
+    SelectBlockRound,
     SynchronizedData,
     UnderAllocatedPayload,
     UnderAllocatedRound,
 )
+from packages.eightballer.skills.rysk_roller.subgraph_sync import META_QUERY
 from packages.valory.contracts.uniswap_v2_erc20.contract import UniswapV2ERC20Contract
 from packages.valory.protocols.contract_api import ContractApiMessage
-from packages.valory.skills.abstract_round_abci.base import AbstractRound
+from packages.valory.protocols.ledger_api.message import LedgerApiMessage
+from packages.valory.skills.abstract_round_abci.base import (
+    AbstractRound,
+    LEDGER_API_ADDRESS,
+)
+from packages.valory.skills.abstract_round_abci.behaviour_utils import TimeoutException
 from packages.valory.skills.abstract_round_abci.behaviours import (
     AbstractRoundBehaviour,
     BaseBehaviour,
@@ -62,6 +82,8 @@ from packages.zarathustra.contracts.homm_vault.contract import (
 )
 
 DISPLAY_FORMAT = 1000000000000000000
+UNDERLYING_ADDRESS = "0x3b3a1dE07439eeb04492Fa64A889eE25A130CDd3"
+STRIKE_ASSET_ADDRESS = "0x408c5755b5c7a0a28D851558eA3636CfC5b5b19d"
 
 price_devisor = 1_000_000_000_000_000_000
 exposure_devisor = 100_000_000_000_000_0000
@@ -72,19 +94,20 @@ def from_timestamp(date_string):
     return datetime.fromtimestamp(int(date_string))
 
 
-def to_human_format(row):
+def to_human_format(series):
     """
-    Format the row to align to the ccxt unified client.
+    Format a series of the option chain to align to the ccxt unified client.
     'ETH-16MAY23-1550-C'
     """
 
-    expiration_datetime = from_timestamp(row["expiration"])
+    expiration_datetime = from_timestamp(series["expiration"])
     month_code = expiration_datetime.strftime("%b").upper()
     day = expiration_datetime.strftime("%d")
     year = str(expiration_datetime.year)[2:]
-    strike_price = str(int(int(row["strike"]) / price_devisor))
+    strike_price = str(int(series["strike"]) // DECIMALS)
+    option_type = "P" if series["is_put"] else "C"
 
-    return f"ETH-{day}{month_code}{year}-{strike_price}-{'P' if row['isPut'] else 'C'}"
+    return f"ETH-{day}{month_code}{year}-{strike_price}-{option_type}"
 
 
 # df = pd.DataFrame(results['series'])
@@ -110,23 +133,162 @@ class RyskRollerBaseBehaviour(BaseBehaviour, ABC):
         """Return the params."""
         return cast(Params, super().params)
 
-    def _request_erc20_balances(self, assets):
-        """Request balance from ledger api."""
+    def _get_block_number(self) -> Generator[None, None, Optional[int]]:
+        """Get the number of the latest block from the ledger api."""
+        ledger_api_response = yield from self.get_ledger_api_response(
+            performative=LedgerApiMessage.Performative.GET_STATE,  # type: ignore
+            ledger_callable="get_block_number",
+        )
+        if ledger_api_response.performative != LedgerApiMessage.Performative.STATE:
+            self.context.logger.error(
+                f"Could not get the block number: {ledger_api_response}"
+            )
+            return None
+        return ledger_api_response.state.body["get_block_number_result"]
+
+    def _query_subgraph(self, request: dict) -> Generator[None, None, Optional[dict]]:
+        """
+        Post a graphql request to the subgraph api.
+
+        :param request: the graphql request.
+        :return: the data of the response, or None if the query failed.
+        """
+        response = yield from self.get_http_response(
+            method="POST",
+            url=self.context.params.config["subgraph_url"],
+            content=json.dumps(request).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            return json.loads(response.body)["data"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            self.context.logger.error(f"Could not query the subgraph: {e}")
+            return None
+
+    def _send_request(
+        self, dialogues: Dialogues, **kwargs: Any
+    ) -> Generator[None, None, Optional[Message]]:
+        """
+        Send a request to the ledger connection, and wait for its response.
+
+        Unlike get_contract_api_response, the response is not delivered
+        through the message of the behaviour, so that many requests can wait
+        at once in tasks gathered with `gather`. A request is given up after
+        `request_timeout` seconds, its late response is dropped.
+
+        :param dialogues: the contract api or ledger api dialogues.
+        :param kwargs: the fields of the request message.
+        :return: the response, or None if it timed out.
+        """
+        message, dialogue = dialogues.create(
+            counterparty=LEDGER_API_ADDRESS,
+            ledger_id=self.context.default_ledger_id,
+            **kwargs,
+        )
+        dialogue.terms = self._get_default_terms()
+        responses = []
+
+        def callback(response: Message, _current_behaviour: BaseBehaviour) -> None:
+            """Keep the response, whichever behaviour is current."""
+            responses.append(response)
+
+        request_nonce = self._get_request_nonce_from_dialogue(dialogue)
+        self.context.requests.request_id_to_callback[request_nonce] = callback
+        self.context.outbox.put_message(message=message)
+        try:
+            yield from self.wait_for_condition(
+                lambda: bool(responses), timeout=self.params.request_timeout
+            )
+        except TimeoutException:
+            self.context.logger.warning(f"Request timed out: {message}")
+            return None
+        return responses[0]
+
+    def _request_contract_state(
+        self, contract_address: str, contract_id: str, contract_callable: str, **kwargs
+    ) -> Generator[None, None, Optional[ContractApiMessage]]:
+        """Make a contract api GET_STATE request, which can be gathered."""
+        response = yield from self._send_request(
+            self.context.contract_api_dialogues,
+            performative=ContractApiMessage.Performative.GET_STATE,
+            contract_address=contract_address,
+            contract_id=contract_id,
+            callable=contract_callable,
+            kwargs=ContractApiMessage.Kwargs(kwargs),
+        )
+        return response
+
+    def _get_contract_state(
+        self, block_number: Optional[int], **kwargs: Any
+    ) -> Generator[None, None, Optional[dict]]:
+        """
+        Make a contract api GET_STATE request, at most once per block.
+
+        A request identical to one in flight waits for its response. Without
+        a block number, the read is made without the cache. The reads can be
+        made concurrently with `gather`.
+        """
+
+        def read() -> Generator[None, None, Optional[dict]]:
+            """Make the request."""
+            contract_api_msg = yield from self._request_contract_state(**kwargs)
+            if (
+                contract_api_msg is None
+                or contract_api_msg.performative
+                != ContractApiMessage.Performative.STATE
+            ):
+                return None
+            return contract_api_msg.state.body
+
+        if block_number is None:
+            body = yield from read()
+            return body
+        read_cache = self.context.read_cache
+        body = yield from cached_read(
+            read_cache,
+            block_number,
+            read_cache.key(**kwargs),
+            read,
+            self.wait_for_condition,
+        )
+        return body
+
+    def _request_erc20_balances(self, assets) -> Generator[None, None, Dict[str, int]]:
+        """
+        Request balance from ledger api.
+
+        The balances of all the assets are requested at once, with at most
+        `max_in_flight_requests` requests waiting for a response.
+        """
         balances = {}
-        for name, address in assets.items():
-            contract_api_msg = yield from self.get_contract_api_response(
-                performative=ContractApiMessage.Performative.GET_STATE,
-                # type: ignore
+        block_number = yield from self._get_block_number()
+        tasks = [
+            self._get_contract_state(
+                block_number,
                 contract_address=address,
                 contract_id=str(UniswapV2ERC20Contract.contract_id),
                 contract_callable="balance_of",
                 owner_address=self.context.agent_address,
             )
-            balance = contract_api_msg.state.body["balance"]
+            for address in assets.values()
+        ]
+        bodies = yield from gather(
+            tasks, self.context.params.config["max_in_flight_requests"]
+        )
+        for (name, address), body in zip(assets.items(), bodies):
+            if body is None:
+                # an unknown balance is taken as empty, so no option is sold on it
+                self.context.logger.error(
+                    f"Could not get the balance of {name}, taking it as 0."
+                )
+                balances[name] = 0
+                continue
+            balance = body["balance"]
             self.context.logger.info(
                 f"Requested balance for {name} at {address} is {str(balance / DISPLAY_FORMAT)}."
             )
             balances[name] = balance
+        self.context.logger.info(f"Read cache: {self.context.read_cache.as_dict()}")
         return balances
 
 
@@ -140,6 +302,7 @@ class AnalyseDataBehaviour(RyskRollerBaseBehaviour):
         """Do the act, supporting asynchronous execution."""
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            self.summarise_chain()
             sender = self.context.agent_address
             payload = AnalyseDataPayload(
                 sender=sender,
@@ -151,6 +314,22 @@ class AnalyseDataBehaviour(RyskRollerBaseBehaviour):
 
         self.set_done()
 
+    def summarise_chain(self) -> None:
+        """Log the series and net dhv exposure of each side of the option chain."""
+        price_data = self.synchronized_data.price_data["price_data"]
+        chain = OptionChain.decode(price_data["series"])
+        for expiration in chain.expirations.tolist():
+            for is_put in (False, True):
+                side = chain.side(expiration, is_put).series
+                if not len(side):
+                    continue
+                kind = "puts" if is_put else "calls"
+                self.context.logger.info(
+                    f"{from_timestamp(expiration):%d%b%y} {kind}: "
+                    f"{len(side)} series, net dhv exposure "
+                    f"{side['exposure'].sum() / DECIMALS:.2f}"
+                )
+
 
 class CallExercisedBehaviour(RyskRollerBaseBehaviour):
     """CallExercisedBehaviour"""
@@ -201,12 +380,14 @@ class CollectDataBehaviour(RyskRollerBaseBehaviour):
 
     matching_round: Type[AbstractRound] = CollectDataRound
 
-    # TODO: implement logic required to set payload content for synchronization
     def async_act(self) -> Generator:
         """Do the act, supporting asynchronous execution."""
 
         assets = self.context.params.config["option_assets"]
         subgraph = yield from self._request_subgraph_data()
+        if subgraph is None:
+            yield from self.sleep(self.params.sleep_time)
+            return
         balances = yield from self._request_erc20_balances(assets)
 
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
@@ -227,21 +408,48 @@ class CollectDataBehaviour(RyskRollerBaseBehaviour):
 
         self.set_done()
 
-    def _request_subgraph_data(self):
-        """Perform a http request to the subgraph api."""
+    def _request_subgraph_data(self) -> Generator[None, None, Optional[dict]]:
+        """
+        Perform a http request to the subgraph api.
+
+        Only the series changed since the block of the previous agreed sync
+        are requested, page by page, all of them as of the agreed block of the
+        period, so that every agent requests the same changes. The changes are
+        returned, to be merged into the agreed series by the round, which
+        records the block they were synced at.
+        """
         self.context.logger.info("Requesting subgraph data.")
-        url = self.context.params.config["subgraph_url"]
-        query = self.context.params.config["subgraph_query"]
-        data = json.dumps({"query": query})
-        response = yield from self.get_http_response(
-            method="POST",
-            url=url,
-            content=data.encode("utf-8"),
-            headers={"Content-Type": "application/json"},
+        series_query = self.context.series_query
+        # the time of the last transition is agreed, so all agents prune alike
+        timestamp = int(self.round_sequence.last_round_transition_timestamp.timestamp())
+        sync_block = self.synchronized_data.sync_block
+        rysk_data = self.synchronized_data.db.get("rysk_data", None)
+        since_block = (
+            None if not rysk_data else rysk_data["subgraph"].get("synced_block")
+        )
+
+        changes: List[Dict[str, Any]] = []
+        cursor: Optional[str] = ""
+        while cursor is not None:
+            data = yield from self._query_subgraph(
+                series_query.request(sync_block, cursor, since_block)
+            )
+            if data is None or "series" not in data:
+                self.context.logger.error("Could not sync the series.")
+                return None
+            page = data["series"]
+            changes.extend(page)
+            cursor = series_query.next_cursor(page)
+
+        self.context.logger.info(
+            f"Received {len(changes)} series changed between blocks {since_block} "
+            f"and {sync_block}."
+        )
+        return dict(
+            series=OptionChain.from_rows(changes).prune(timestamp).encode(),
+            since_block=since_block,
+            timestamp=timestamp,
         )
-        response_data = json.loads(response.body)["data"]
-        self.context.logger.info(f"Received subgraph data!")
-        return response_data
 
 
 class CollectPriceDataBehaviour(RyskRollerBaseBehaviour):
@@ -279,69 +487,209 @@ class CollectPriceDataBehaviour(RyskRollerBaseBehaviour):
         """
         We call the beyond pricer to determine the prices for a market
         huge thanks to 0xPawel2 and Jib &&
+
+        The bids and asks of every traded series are quoted on chain, in
+        multicall batches at the agreed sync block, so that all the agents
+        propose the same prices. They are returned along the encoded chain,
+        None where a quote failed. The local replica of the BeyondPricer is
+        only checked and calibrated against them, its prices are kept out of
+        the payload.
         """
-        data = self.context.state.synchronized_data.db.get("rysk_data")["subgraph"][
-            "series"
-        ]
+        encoded = self.synchronized_data.db.get("rysk_data")["subgraph"]["series"]
+        chain = OptionChain.decode(encoded)
+        block_number = self.synchronized_data.sync_block
+        buyable = np.flatnonzero(chain.series["is_buyable"])
+        sellable = np.flatnonzero(chain.series["is_sellable"])
+        indices = np.concatenate([buyable, sellable])
+        sides = chain.series[indices]
+        is_sell = np.repeat([False, True], [len(buyable), len(sellable)])
+        price_data: Dict[str, Any] = dict(
+            series=encoded, bid=[None] * len(chain), ask=[None] * len(chain)
+        )
 
-        for row in data:
-            if row["isBuyable"]:
-                row["ask"] = yield from self._get_option_price(row, side="buy")
-            if row["isSellable"]:
-                row["bid"] = yield from self._get_option_price(row, side="sell")
-        return data
+        quotes = yield from self._quote_on_chain(block_number, sides, is_sell)
+        for index, sell, quote in zip(indices.tolist(), is_sell.tolist(), quotes):
+            price_data["bid" if sell else "ask"][index] = quote
+        yield from self._calibrate_pricer(block_number, sides, is_sell, quotes)
+        self.context.logger.info(f"Read cache: {self.context.read_cache.as_dict()}")
+        return price_data
+
+    def _calibrate_pricer(
+        self,
+        block_number: int,
+        sides: np.ndarray,
+        is_sell: np.ndarray,
+        quotes: List[Optional[dict]],
+    ) -> Generator:
+        """
+        Check the local replica of the BeyondPricer against the on-chain quotes.
+
+        The quotes its prices moved away from by more than the tolerance are
+        counted, and the replica is calibrated on them, or on all of them when
+        a calibration is due.
+
+        :param block_number: the block the quotes were made at.
+        :param sides: the series, of the option chain dtype.
+        :param is_sell: whether each option is sold to the dhv.
+        :param quotes: the on-chain quotes, None where a quote failed.
+        """
+        pricer = self.context.beyond_pricer
+        state = yield from self._get_contract_state(
+            block_number,
+            contract_address=self.context.params.config["vault_address"],
+            contract_id=str(HOMMVaultContract.contract_id),
+            contract_callable="get_pricer_state",
+            underlying=UNDERLYING_ADDRESS,
+            strike_asset=STRIKE_ASSET_ADDRESS,
+            block_identifier=block_number,
+        )
+        if state is None:
+            self.context.logger.error("Could not get the state of the pricer.")
+            return
+
+        pricer.update_params(state)
+        quote_set = QuoteSet.from_series(sides, is_sell)
+        premiums, _ = pricer.premiums(quote_set)
+        period = self.synchronized_data.period_count
+        calibrating = pricer.is_calibration_due(period)
+        checks = np.ones(len(quote_set), dtype=bool)
+        if not calibrating:
+            checks = pricer.needs_check(quote_set, premiums)
+
+        scale = 10 ** self.context.params.config["premium_decimals"]
+        on_chain_premiums = np.full(len(quote_set), np.nan)
+        on_chain_fees = np.full(len(quote_set), np.nan)
+        for i in np.flatnonzero(checks).tolist():
+            if quotes[i]:
+                on_chain_premiums[i] = (
+                    quotes[i]["total_premium"] / scale / pricer.amount
+                )
+                on_chain_fees[i] = quotes[i]["total_fees"] / scale / pricer.amount
+        pricer.calibrate(
+            quote_set,
+            on_chain_premiums,
+            on_chain_fees,
+            period=period if calibrating else None,
+        )
+        self.context.logger.info(
+            f"Quoted {len(sides)} options on chain at block {block_number}, the "
+            f"local pricer was off on {int(checks.sum())} of them"
+            f"{', calibrated' if calibrating else ''}."
+        )
+
+    def _quote_on_chain(
+        self, block_number: Optional[int], sides: np.ndarray, is_sell: np.ndarray
+    ) -> Generator[None, None, List[Optional[dict]]]:
+        """
+        Quote options on chain, in multicall batches of `quote_batch_size` quotes.
+
+        The quotes of the requests which did not change, netDHVExposure
+        included, in the last blocks are served by the quote cache.
+
+        :param block_number: the block the quotes are made at.
+        :param sides: the series, of the option chain dtype.
+        :param is_sell: whether each option is sold to the dhv.
+        :return: the quotes, None where a quote failed.
+        """
+        quote_cache = self.context.quote_cache
+        requests = [
+            self._get_quote_request(series, side="sell" if sell else "buy")
+            for series, sell in zip(sides, is_sell.tolist())
+        ]
+        keys = [astuple(request) for request in requests]
+        # the quotes go in the consensus payload, only the ones made at the
+        # same block can be served
+        quotes: List[Optional[dict]] = [
+            None if block_number is None else quote_cache.get(key, block_number, 0)
+            for key in keys
+        ]
+        missing = [i for i, quote in enumerate(quotes) if quote is None]
+        if not missing:
+            return quotes
+        body = yield from self._get_contract_state(
+            block_number,
+            contract_address=self.context.params.config["vault_address"],
+            contract_id=str(HOMMVaultContract.contract_id),
+            contract_callable="quote_option_prices",
+            requests=[asdict(requests[i]) for i in missing],
+            batch_size=self.context.params.config["quote_batch_size"],
+            block_identifier="latest" if block_number is None else block_number,
+        )
+        if body is None:
+            self.context.logger.error("Could not get the option prices.")
+            return quotes
+        for i, quote in zip(missing, body["quote_option_prices"]):
+            quotes[i] = quote
+            if quote is not None and block_number is not None:
+                quote_cache.put(keys[i], block_number, quote)
+        self.context.logger.info(
+            f"Quoted {len(missing)} of {len(sides)} options on chain, "
+            f"quote cache: {quote_cache.as_dict()}"
+        )
+        return quotes
 
     def get_positions(self):
         """Get the price for an option series."""
 
-        data = self.context.state.synchronized_data.db.get("rysk_data")["subgraph"][
-            "series"
-        ]
-        assets = {to_human_format(row): row["id"] for row in data}
+        chain = OptionChain.decode(
+            self.synchronized_data.db.get("rysk_data")["subgraph"]["series"]
+        )
+        assets = dict(zip(map(to_human_format, chain.series), chain.ids))
         self.context.logger.info(f"Requesting positions for {len(assets)} assets.")
         balances = yield from self._request_erc20_balances(assets)
-        current_positions = filter(lambda x: x["balance"] > 0, balances)
+        current_positions = {
+            name: balance for name, balance in balances.items() if balance > 0
+        }
         self.context.logger.info(
-            f"Received positions for {len(list(current_positions))} assets."
+            f"Received positions for {len(current_positions)} assets."
         )
+        return current_positions
 
-    def _get_option_price(
-        self, option_data, amount=1000000000000000000, side="buy", collateral="eth"
-    ):
-        """Get the price for an option series."""
-
+    @staticmethod
+    def _get_quote_request(
+        option_data, amount=1000000000000000000, side="buy"
+    ) -> RequestQuoteOptionPrice:
+        """Get the quote request of a series of the option chain."""
         option_series = OptionSeries(
             expiration=int(option_data["expiration"]),
-            strike=int(option_data["strike"]),
-            is_put=bool(option_data["isPut"]),
-            underlying="0x3b3a1dE07439eeb04492Fa64A889eE25A130CDd3",
-            strike_asset="0x408c5755b5c7a0a28D851558eA3636CfC5b5b19d",
-            collateral="0x408c5755b5c7a0a28D851558eA3636CfC5b5b19d",
+            strike=to_e18(option_data["strike"]),
+            is_put=bool(option_data["is_put"]),
+            underlying=UNDERLYING_ADDRESS,
+            strike_asset=STRIKE_ASSET_ADDRESS,
+            collateral=STRIKE_ASSET_ADDRESS,
         )
 
-        request = RequestQuoteOptionPrice(
+        return RequestQuoteOptionPrice(
             _option_series=option_series,
             _amount=amount,
             is_sell=(side == "sell"),
-            net_dhv_exposure=int(option_data["netDHVExposure"]),
+            net_dhv_exposure=to_e18(option_data["exposure"]),
         )
 
+    def _get_option_price(  # pylint: disable=too-many-arguments
+        self,
+        option_data,
+        amount=1000000000000000000,
+        side="buy",
+        collateral="eth",
+        block_number=None,
+    ):
+        """Get the price for an option series."""
+        request = self._get_quote_request(option_data, amount=amount, side=side)
+
         # breakpoint()
-        contract_api_msg = yield from self.get_contract_api_response(
-            performative=ContractApiMessage.Performative.GET_STATE,
-            # type: ignore
+        body = yield from self._get_contract_state(
+            block_number,
             contract_address=self.context.params.config["vault_address"],
             contract_id=str(HOMMVaultContract.contract_id),
             contract_callable="quote_option_price",
             owner_address=self.context.agent_address,
             request_quote_option_price=asdict(request),
         )
-        if contract_api_msg.performative == ContractApiMessage.Performative.ERROR:
+        if body is None:
             return {}
 
-        quote_option_price: QuoteOptionPrice = contract_api_msg.state.body[
-            "quote_option_price"
-        ]
+        quote_option_price: QuoteOptionPrice = body["quote_option_price"]
         self.context.logger.info(
             f"Received price for option series {quote_option_price}."
         )
@@ -365,10 +713,10 @@ class MultiplexerBehaviour(RyskRollerBaseBehaviour):
         # subgraph = self.context.state.synchronized_data.db.get("rysk_data")['subgraph']
         # positions = self.context.state.synchronized_data.db.get("rysk_data")['positions']
 
-        if balances["WETH"] > self.context.params.config["min_weth"]:
+        if balances.get("WETH", 0) > self.context.params.config["min_weth"]:
             self.context.logger.info(f"Available WETH funds: {balances['WETH']}")
             decision = StrategyAction.SELL_CALL.value
-        elif balances["USDC"] > self.context.params.config["min_usdc"]:
+        elif balances.get("USDC", 0) > self.context.params.config["min_usdc"]:
             self.context.logger.info(f"Available USDC funds: {balances['USDC']}")
             decision = StrategyAction.SELL_PUT.value
         else:
@@ -432,6 +780,34 @@ class PutExpiredBehaviour(RyskRollerBaseBehaviour):
         self.set_done()
 
 
+class SelectBlockBehaviour(RyskRollerBaseBehaviour):
+    """SelectBlockBehaviour"""
+
+    matching_round: Type[AbstractRound] = SelectBlockRound
+
+    def async_act(self) -> Generator:
+        """Do the act, supporting asynchronous execution."""
+
+        data = yield from self._query_subgraph({"query": META_QUERY})
+        if data is None or "_meta" not in data:
+            self.context.logger.error("Could not get the block of the subgraph.")
+            yield from self.sleep(self.params.sleep_time)
+            return
+
+        with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            sender = self.context.agent_address
+            payload = SelectBlockPayload(
+                sender=sender,
+                block_number=data["_meta"]["block"]["number"],
+            )
+
+        with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
+            yield from self.send_a2a_transaction(payload)
+            yield from self.wait_until_round_end()
+
+        self.set_done()
+
+
 class UnderAllocatedBehaviour(RyskRollerBaseBehaviour):
     """UnderAllocatedBehaviour"""
 
@@ -456,7 +832,7 @@ class UnderAllocatedBehaviour(RyskRollerBaseBehaviour):
 class FlowchartToFSMRoundBehaviour(AbstractRoundBehaviour):
     """FlowchartToFSMRoundBehaviour"""
 
-    initial_behaviour_cls = CollectDataBehaviour
+    initial_behaviour_cls = SelectBlockBehaviour
     abci_app_cls = FlowchartToFSMAbciApp  # type: ignore
     behaviours: Set[Type[BaseBehaviour]] = [
         AnalyseDataBehaviour,
@@ -467,5 +843,6 @@ class FlowchartToFSMRoundBehaviour(AbstractRoundBehaviour):
         MultiplexerBehaviour,
         PutExercisedBehaviour,
         PutExpiredBehaviour,
+        SelectBlockBehaviour,
         UnderAllocatedBehaviour,
     ]
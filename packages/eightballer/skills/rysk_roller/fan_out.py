@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the concurrent fan-out of the requests of the behaviours."""
+
+from collections import deque
+from typing import Any, Deque, Dict, Generator, List, Sequence, Tuple
+
+Task = Generator[Any, None, Any]
+
+
+def gather(
+    tasks: Sequence[Task], max_in_flight: int
+) -> Generator[None, None, List[Any]]:
+    """
+    Run the tasks of a behaviour concurrently, collecting their results in order.
+
+    The tasks are stepped in turn on each tick of the behaviour, so that
+    their requests are all sent before any response is waited for. A task
+    is started on the tick another one finished, with at most
+    `max_in_flight` tasks running at once. The tasks must only yield to
+    wait, and not wait for the message of the behaviour, which can only
+    receive a single response at a time.
+
+    :param tasks: the generators of the tasks.
+    :param max_in_flight: the maximum number of tasks running at once.
+    :return: the results of the tasks, in the order of the tasks.
+    :yield: None, while tasks are running.
+    """
+    results: List[Any] = [None] * len(tasks)
+    pending: Deque[Tuple[int, Task]] = deque(enumerate(tasks))
+    running: Dict[int, Task] = {}
+
+    def step(index: int, task: Task) -> None:
+        """Step a task, collecting its result once it is done."""
+        try:
+            next(task)
+            running[index] = task
+        except StopIteration as stop:
+            results[index] = stop.value
+            running.pop(index, None)
+
+    while pending or running:
+        for index, task in list(running.items()):
+            step(index, task)
+        while pending and len(running) < max(1, max_in_flight):
+            step(*pending.popleft())
+        if running:
+            yield
+    return results
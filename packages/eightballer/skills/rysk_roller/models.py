@@ -20,8 +20,21 @@
 """This module contains the shared state for the abci skill of FlowchartToFSMAbciApp."""
 
 from enum import Enum
+from typing import Any
 
+from aea.skills.base import Model
+
+from packages.eightballer.skills.read_cache.models import ReadCache as BaseReadCache
+from packages.eightballer.skills.rysk_roller.pricer import (
+    BeyondPricer as BaseBeyondPricer,
+)
+from packages.eightballer.skills.rysk_roller.quote_cache import (
+    QuoteCache as BaseQuoteCache,
+)
 from packages.eightballer.skills.rysk_roller.rounds import FlowchartToFSMAbciApp
+from packages.eightballer.skills.rysk_roller.subgraph_sync import (
+    SeriesQuery as BaseSeriesQuery,
+)
 from packages.valory.skills.abstract_round_abci.models import BaseParams
 from packages.valory.skills.abstract_round_abci.models import (
     BenchmarkTool as BaseBenchmarkTool,
@@ -48,6 +61,51 @@ class StrategyAction(Enum):
     HOLD = 5
 
 
+class BeyondPricer(Model, BaseBeyondPricer):
+    """Keep the calibration of the local replica of the BeyondPricer across periods."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the pricer."""
+        tolerance = kwargs.pop("tolerance", 0.02)
+        calibration_interval = kwargs.pop("calibration_interval", 10)
+        sample_size = kwargs.pop("sample_size", 20)
+        default_vol = kwargs.pop("default_vol", 0.8)
+        Model.__init__(self, **kwargs)
+        BaseBeyondPricer.__init__(
+            self,
+            tolerance=tolerance,
+            calibration_interval=calibration_interval,
+            sample_size=sample_size,
+            default_vol=default_vol,
+        )
+
+
+class QuoteCache(Model, BaseQuoteCache):
+    """Keep the on-chain quotes of the option series across periods."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the cache."""
+        max_age = kwargs.pop("max_age", 10)
+        max_entries = kwargs.pop("max_entries", 10_000)
+        Model.__init__(self, **kwargs)
+        BaseQuoteCache.__init__(self, max_age=max_age, max_entries=max_entries)
+
+
+class SeriesQuery(Model, BaseSeriesQuery):
+    """Page through the series of the subgraph."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the query."""
+        page_size = kwargs.pop("page_size", 1000)
+        Model.__init__(self, **kwargs)
+        BaseSeriesQuery.__init__(self, page_size=page_size)
+
+    def setup(self) -> None:
+        """Use the series query of the params."""
+        self.query = self.context.params.config["subgraph_query"]
+
+
 Params = BaseParams
 Requests = BaseRequests
 BenchmarkTool = BaseBenchmarkTool
+ReadCache = BaseReadCache
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the columnar option chain of the rysk series."""
+
+import base64
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# the strikes and exposures are kept with the 8 decimals of the oTokens, which
+# the strikes of the rysk series are rounded to
+DECIMALS = 10**8
+E18_PER_UNIT = 10**10
+
+SERIES_DTYPE = np.dtype(
+    [
+        ("id", "S20"),
+        ("expiration", "<i8"),
+        ("strike", "<i8"),
+        ("exposure", "<i8"),
+        ("is_put", "?"),
+        ("is_buyable", "?"),
+        ("is_sellable", "?"),
+    ]
+)
+SERIES_ORDER = ["expiration", "is_put", "strike", "id"]
+
+
+def to_address(series_id: bytes) -> str:
+    """Get the address of a series id, which numpy strips of its trailing zeros."""
+    return "0x" + series_id.ljust(20, b"\0").hex()
+
+
+def to_e18(value: Any) -> int:
+    """Get a strike or exposure of the chain with 18 decimals."""
+    return int(value) * E18_PER_UNIT
+
+
+class OptionChain:
+    """
+    The rysk series, as a structured array ordered by expiry, put/call and strike.
+
+    The series of an expiry, of a side of an expiry, and of a strike range of
+    a side are contiguous, so they are sliced as views without copying, and
+    the chain is serialized as its raw buffer, 47 bytes per series.
+    """
+
+    def __init__(self, series: Optional[np.ndarray] = None) -> None:
+        """
+        Initialize the chain.
+
+        :param series: the series, of SERIES_DTYPE, already in SERIES_ORDER.
+        """
+        self.series = np.empty(0, SERIES_DTYPE) if series is None else series
+
+    def __len__(self) -> int:
+        """The number of series."""
+        return len(self.series)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "OptionChain":
+        """Get the chain of series of the subgraph."""
+        series = np.array(
+            [
+                (
+                    bytes.fromhex(row["id"][2:]),
+                    int(row["expiration"]),
+                    int(row["strike"]) // E18_PER_UNIT,
+                    int(row["netDHVExposure"]) // E18_PER_UNIT,
+                    bool(row["isPut"]),
+                    bool(row["isBuyable"]),
+                    bool(row["isSellable"]),
+                )
+                for row in rows
+            ],
+            dtype=SERIES_DTYPE,
+        )
+        return cls(np.sort(series, order=SERIES_ORDER))
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Get the series in the format of the subgraph."""
+        return [
+            {
+                "id": to_address(series["id"]),
+                "expiration": str(series["expiration"]),
+                "strike": str(to_e18(series["strike"])),
+                "netDHVExposure": str(to_e18(series["exposure"])),
+                "isPut": bool(series["is_put"]),
+                "isBuyable": bool(series["is_buyable"]),
+                "isSellable": bool(series["is_sellable"]),
+            }
+            for series in self.series
+        ]
+
+    @property
+    def ids(self) -> List[str]:
+        """The addresses of the series."""
+        return [to_address(series_id) for series_id in self.series["id"].tolist()]
+
+    @property
+    def expirations(self) -> np.ndarray:
+        """The expiries of the chain, in order."""
+        return np.unique(self.series["expiration"])
+
+    def expiry(self, expiration: int) -> "OptionChain":
+        """Get a view of the series of an expiry."""
+        expirations = self.series["expiration"]
+        start = np.searchsorted(expirations, expiration, side="left")
+        stop = np.searchsorted(expirations, expiration, side="right")
+        return OptionChain(self.series[start:stop])
+
+    def side(self, expiration: int, is_put: bool) -> "OptionChain":
+        """Get a view of the puts or calls of an expiry."""
+        series = self.expiry(expiration).series
+        split = np.searchsorted(series["is_put"], True, side="left")
+        return OptionChain(series[split:] if is_put else series[:split])
+
+    def strikes(
+        self,
+        expiration: int,
+        is_put: bool,
+        low: Optional[int] = None,
+        high: Optional[int] = None,
+    ) -> "OptionChain":
+        """
+        Get a view of the puts or calls of an expiry in a strike range.
+
+        :param expiration: the expiry.
+        :param is_put: whether the puts are selected, else the calls.
+        :param low: the lowest strike included, with the chain decimals.
+        :param high: the highest strike excluded, with the chain decimals.
+        :return: the series.
+        """
+        series = self.side(expiration, is_put).series
+        strikes = series["strike"]
+        start = 0 if low is None else np.searchsorted(strikes, low, side="left")
+        stop = len(series) if high is None else np.searchsorted(strikes, high)
+        return OptionChain(series[start:stop])
+
+    def merge(self, changes: "OptionChain") -> "OptionChain":
+        """Get the chain with the series changed since it was synced replaced."""
+        kept = self.series[~np.isin(self.series["id"], changes.series["id"])]
+        series = np.concatenate([kept, changes.series])
+        return OptionChain(np.sort(series, order=SERIES_ORDER))
+
+    def prune(self, timestamp: int) -> "OptionChain":
+        """Get a view of the series which did not expire before a timestamp."""
+        start = np.searchsorted(self.series["expiration"], timestamp, side="left")
+        return OptionChain(self.series[start:])
+
+    def to_bytes(self) -> bytes:
+        """Serialize the chain as the buffer of its series."""
+        return self.series.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OptionChain":
+        """Get a read-only chain over a serialized buffer, without copying it."""
+        return cls(np.frombuffer(data, dtype=SERIES_DTYPE))
+
+    def encode(self) -> str:
+        """Serialize the chain for a json payload."""
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, data: str) -> "OptionChain":
+        """Get the chain of a json payload."""
+        return cls.from_bytes(base64.b64decode(data))
@@ -70,6 +70,13 @@ class PutExpiredPayload(BaseTxPayload):
     """Represent a transaction payload for the PutExpiredRound."""
 
 
+@dataclass(frozen=True)
+class SelectBlockPayload(BaseTxPayload):
+    """Represent a transaction payload for the SelectBlockRound."""
+
+    block_number: int
+
+
 @dataclass(frozen=True)
 class UnderAllocatedPayload(BaseTxPayload):
     """Represent a transaction payload for the UnderAllocatedRound."""
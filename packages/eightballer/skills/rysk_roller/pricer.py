@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the local replica of the Rysk BeyondPricer."""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from packages.eightballer.skills.rysk_roller.option_chain import DECIMALS
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+E18 = 1e18
+
+# the coefficients of the Abramowitz and Stegun 7.1.26 approximation of erf
+ERF_P = 0.3275911
+ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """The standard normal cdf, vectorized, accurate to about 1e-7."""
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + ERF_P * z)
+    poly = np.zeros_like(t)
+    for coefficient in reversed(ERF_A):
+        poly = (poly + coefficient) * t
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+def black_scholes(  # pylint: disable=too-many-arguments
+    spot: float,
+    strike: np.ndarray,
+    time: np.ndarray,
+    vol: np.ndarray,
+    rate: float,
+    is_put: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Price european options and get their delta, vectorized.
+
+    :param spot: the price of the underlying.
+    :param strike: the strikes.
+    :param time: the times to expiry, in years.
+    :param vol: the implied volatilities.
+    :param rate: the risk free rate.
+    :param is_put: whether each option is a put.
+    :return: the prices and the deltas, negative for the puts.
+    """
+    time = np.maximum(time, 1e-9)
+    vol = np.maximum(vol, 1e-9)
+    sqrt_time = np.sqrt(time)
+    d1 = (np.log(spot / strike) + (rate + vol**2 / 2) * time) / (vol * sqrt_time)
+    d2 = d1 - vol * sqrt_time
+    discount = np.exp(-rate * time)
+    call = spot * norm_cdf(d1) - strike * discount * norm_cdf(d2)
+    put = strike * discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    price = np.where(is_put, put, call)
+    delta = np.where(is_put, norm_cdf(d1) - 1, norm_cdf(d1))
+    return np.maximum(price, 0), delta
+
+
+@dataclass(frozen=True)
+class PricerParams:
+    """The parameters of the BeyondPricer, as floats."""
+
+    spot: float
+    risk_free_rate: float
+    slippage_gradient: float
+    delta_band_width: float
+    call_multipliers: np.ndarray
+    put_multipliers: np.ndarray
+    timestamp: int
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "PricerParams":
+        """Get the parameters from the e18 values read on chain."""
+        return cls(
+            spot=state["spot"] / E18,
+            risk_free_rate=state["risk_free_rate"] / E18,
+            slippage_gradient=state["slippage_gradient"] / E18,
+            delta_band_width=state["delta_band_width"] / E18,
+            call_multipliers=np.array(state["call_multipliers"], dtype=float) / E18,
+            put_multipliers=np.array(state["put_multipliers"], dtype=float) / E18,
+            timestamp=state["timestamp"],
+        )
+
+
+def slippage_multiplier(  # pylint: disable=too-many-arguments
+    params: PricerParams,
+    amount: float,
+    delta: np.ndarray,
+    exposure: np.ndarray,
+    is_sell: np.ndarray,
+    is_put: np.ndarray,
+) -> np.ndarray:
+    """
+    Get the slippage multipliers of the premiums, as the BeyondPricer does.
+
+    The premium per contract is scaled by `(1 + g)^-x`, averaged over the
+    net exposure x of the dhv before and after the trade, where the
+    gradient g is the slippage gradient times the multiplier of the delta
+    band of the option.
+
+    :param params: the parameters of the pricer.
+    :param amount: the number of contracts traded.
+    :param delta: the deltas of the options.
+    :param exposure: the net dhv exposures of the options, in contracts.
+    :param is_sell: whether each option is sold to the dhv.
+    :param is_put: whether each option is a put.
+    :return: the multipliers of the premiums.
+    """
+    band = (np.abs(delta) * 100 // params.delta_band_width).astype(int)
+    call_band = np.minimum(band, len(params.call_multipliers) - 1)
+    put_band = np.minimum(band, len(params.put_multipliers) - 1)
+    gradient = params.slippage_gradient * np.where(
+        is_put, params.put_multipliers[put_band], params.call_multipliers[call_band]
+    )
+    new_exposure = np.where(is_sell, exposure + amount, exposure - amount)
+    base = 1 + gradient
+    with np.errstate(divide="ignore", invalid="ignore"):
+        integral = np.abs(base ** (-exposure) - base ** (-new_exposure)) / np.log(base)
+        multiplier = integral / amount
+    return np.where(gradient > 0, multiplier, 1.0)
+
+
+@dataclass(frozen=True)
+class QuoteSet:
+    """The quotes of an option chain, as columns."""
+
+    keys: List[Tuple[bytes, bool]]
+    strike: np.ndarray
+    expiration: np.ndarray
+    is_put: np.ndarray
+    is_sell: np.ndarray
+    exposure: np.ndarray
+
+    @classmethod
+    def from_series(cls, series: np.ndarray, is_sell: np.ndarray) -> "QuoteSet":
+        """
+        Get the quotes of series of the option chain.
+
+        :param series: the series, of the option chain dtype.
+        :param is_sell: whether each option is sold to the dhv.
+        :return: the quotes.
+        """
+        return cls(
+            keys=list(zip(series["id"].tolist(), is_sell.tolist())),
+            strike=series["strike"] / DECIMALS,
+            expiration=series["expiration"],
+            is_put=series["is_put"],
+            is_sell=is_sell,
+            exposure=series["exposure"] / DECIMALS,
+        )
+
+    def __len__(self) -> int:
+        """The number of quotes."""
+        return len(self.keys)
+
+
+class BeyondPricer:  # pylint: disable=too-many-instance-attributes
+    """
+    Quote the option chain locally, as the on-chain BeyondPricer does.
+
+    The premiums are priced with Black-Scholes and the slippage multipliers
+    of the pricer, across the whole chain at once. The implied volatility of
+    each series and side is calibrated against a sample of on-chain quotes
+    every `calibration_interval` periods, and interpolated along the strikes
+    of an expiry for the series which were not sampled. A quote is checked
+    on chain again once it moved by more than `tolerance` since its last
+    on-chain quote.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        tolerance: float = 0.02,
+        calibration_interval: int = 10,
+        sample_size: int = 20,
+        default_vol: float = 0.8,
+        amount: float = 1.0,
+    ) -> None:
+        """
+        Initialize the pricer.
+
+        :param tolerance: the relative move of a quote triggering an on-chain check.
+        :param calibration_interval: the number of periods between calibrations.
+        :param sample_size: the number of on-chain quotes of a calibration.
+        :param default_vol: the volatility of the series before any calibration.
+        :param amount: the number of contracts quoted.
+        """
+        self.tolerance = tolerance
+        self.calibration_interval = calibration_interval
+        self.sample_size = sample_size
+        self.default_vol = default_vol
+        self.amount = amount
+        self.params: Optional[PricerParams] = None
+        self.vols: Dict[Hashable, float] = {}
+        self.anchors: Dict[Hashable, float] = {}
+        self.fee_per_contract = 0.0
+        self.calibrated_period: Optional[int] = None
+
+    def update_params(self, state: Dict[str, Any]) -> None:
+        """Update the parameters with the state of the pricer read on chain."""
+        self.params = PricerParams.from_state(state)
+
+    def is_calibration_due(self, period: int) -> bool:
+        """Whether the vols should be calibrated in a period."""
+        return (
+            self.calibrated_period is None
+            or period - self.calibrated_period >= self.calibration_interval
+        )
+
+    def sample(self, quotes: QuoteSet) -> np.ndarray:
+        """Get the quotes to calibrate on, spread across the expiries and strikes."""
+        order = np.lexsort((quotes.strike, quotes.expiration))
+        count = min(self.sample_size, len(quotes))
+        mask = np.zeros(len(quotes), dtype=bool)
+        if count:
+            mask[order[np.linspace(0, len(quotes) - 1, count).astype(int)]] = True
+        return mask
+
+    def quote_vols(self, quotes: QuoteSet) -> np.ndarray:
+        """
+        Get the volatility of each quote.
+
+        The calibrated vol is used where there is one, otherwise the vols of
+        the same expiry, type and side are interpolated along the strikes.
+        """
+        vols = np.array([self.vols.get(key, np.nan) for key in quotes.keys])
+        missing = np.isnan(vols)
+        if not missing.any() or not self.vols:
+            return np.where(missing, self.default_vol, vols)
+        groups = np.stack([quotes.expiration, quotes.is_put, quotes.is_sell], axis=1)
+        for group in np.unique(groups[missing], axis=0):
+            in_group = (groups == group).all(axis=1)
+            known = in_group & ~missing
+            if known.any():
+                order = np.argsort(quotes.strike[known])
+                vols[in_group & missing] = np.interp(
+                    quotes.strike[in_group & missing],
+                    quotes.strike[known][order],
+                    vols[known][order],
+                )
+        fallback = np.median(list(self.vols.values()))
+        return np.where(np.isnan(vols), fallback, vols)
+
+    def premiums(
+        self, quotes: QuoteSet, vols: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Price the quotes, per contract.
+
+        :param quotes: the quotes.
+        :param vols: the volatilities, the calibrated ones by default.
+        :return: the premiums per contract, and the deltas.
+        """
+        params = self.params
+        if params is None:
+            raise ValueError("The pricer parameters are not known.")
+        if vols is None:
+            vols = self.quote_vols(quotes)
+        time = (quotes.expiration - params.timestamp) / SECONDS_PER_YEAR
+        vanilla, delta = black_scholes(
+            params.spot, quotes.strike, time, vols, params.risk_free_rate, quotes.is_put
+        )
+        multiplier = slippage_multiplier(
+            params, self.amount, delta, quotes.exposure, quotes.is_sell, quotes.is_put
+        )
+        return vanilla * multiplier, delta
+
+    def implied_vols(
+        self, quotes: QuoteSet, premiums: np.ndarray, iterations: int = 60
+    ) -> np.ndarray:
+        """Invert the premiums of the quotes into volatilities, by bisection."""
+        low = np.full(len(quotes), 1e-3)
+        high = np.full(len(quotes), 5.0)
+        for _ in range(iterations):
+            middle = (low + high) / 2
+            priced, _ = self.premiums(quotes, middle)
+            too_high = priced > premiums
+            high = np.where(too_high, middle, high)
+            low = np.where(too_high, low, middle)
+        return (low + high) / 2
+
+    def needs_check(self, quotes: QuoteSet, premiums: np.ndarray) -> np.ndarray:
+        """Whether each quote moved by more than the tolerance since its last check."""
+        anchors = np.array([self.anchors.get(key, np.nan) for key in quotes.keys])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moved = np.abs(premiums / anchors - 1) > self.tolerance
+        return np.isnan(anchors) | moved
+
+    def calibrate(
+        self,
+        quotes: QuoteSet,
+        premiums: np.ndarray,
+        fees: np.ndarray,
+        period: Optional[int] = None,
+    ) -> None:
+        """
+        Fit the vols to on-chain quotes, and remember them as the last checks.
+
+        On a full calibration, the vols of the series which were not sampled
+        are shifted by the median change of the sampled ones.
+
+        :param quotes: the quotes checked on chain.
+        :param premiums: their on-chain premiums per contract, nan if they failed.
+        :param fees: their on-chain fees per contract, nan if they failed.
+        :param period: the period of a full calibration, None for a check.
+        """
+        valid = ~np.isnan(premiums)
+        if valid.any():
+            keys = [key for key, ok in zip(quotes.keys, valid) if ok]
+            subset = QuoteSet(
+                keys,
+                quotes.strike[valid],
+                quotes.expiration[valid],
+                quotes.is_put[valid],
+                quotes.is_sell[valid],
+                quotes.exposure[valid],
+            )
+            vols = self.implied_vols(subset, premiums[valid])
+            previous = [self.vols.get(key) for key in keys]
+            changes = [new - old for new, old in zip(vols, previous) if old is not None]
+            if period is not None and changes:
+                shift = float(np.median(changes))
+                sampled = set(keys)
+                for key in self.vols.keys() - sampled:
+                    self.vols[key] = max(self.vols[key] + shift, 1e-3)
+            self.vols.update(zip(keys, vols.tolist()))
+            self.anchors.update(zip(keys, premiums[valid].tolist()))
+            self.fee_per_contract = float(np.median(fees[valid]))
+        if period is not None:
+            self.calibrated_period = period
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the cache of the on-chain option quotes."""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# a RequestQuoteOptionPrice as a tuple, netDHVExposure last
+QuoteKey = Tuple[Hashable, ...]
+
+
+class QuoteCache:
+    """
+    Keep the on-chain quotes of the option series which did not change.
+
+    The quotes are keyed by the full RequestQuoteOptionPrice tuple, so a
+    change of netDHVExposure is a different key, and replaces the quote of
+    the series and side with the old exposure. A quote expires `max_age`
+    blocks after it was made, and the least recently used quotes are
+    evicted beyond `max_entries`.
+    """
+
+    def __init__(self, max_age: int = 10, max_entries: int = 10_000) -> None:
+        """
+        Initialize the cache.
+
+        :param max_age: the number of blocks a quote is served for.
+        :param max_entries: the maximum number of quotes kept.
+        """
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[QuoteKey, Tuple[int, Any]]" = OrderedDict()
+        self.exposures: Dict[QuoteKey, Hashable] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """The number of quotes kept."""
+        return len(self.entries)
+
+    def get(
+        self, key: QuoteKey, block_number: int, max_age: Optional[int] = None
+    ) -> Optional[Any]:
+        """
+        Get the quote of a request, if it was made in the last `max_age` blocks.
+
+        :param key: the request, as a tuple.
+        :param block_number: the current block.
+        :param max_age: the blocks a quote is served for, `max_age` by default.
+        :return: the quote, or None on a miss.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        entry = self.entries.get(key)
+        if entry is None or block_number - entry[0] > max_age:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: QuoteKey, block_number: int, quote: Any) -> None:
+        """Keep the quote of a request, dropping the one made at another exposure."""
+        series, exposure = key[:-1], key[-1]
+        previous = self.exposures.get(series)
+        if previous is not None and previous != exposure:
+            self.entries.pop(series + (previous,), None)
+        self.exposures[series] = exposure
+        self.entries[key] = (block_number, quote)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            self.exposures.pop(evicted[:-1], None)
+            self.evictions += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        """The counters of the cache, to be logged."""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
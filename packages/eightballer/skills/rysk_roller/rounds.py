@@ -23,6 +23,7 @@ import json
 from enum import Enum
 from typing import Any, Dict, Optional, Set, Tuple, cast
 
+from packages.eightballer.skills.rysk_roller.option_chain import OptionChain
 from packages.eightballer.skills.rysk_roller.payloads import (
     AnalyseDataPayload,
     CallExercisedPayload,
@@ -32,6 +33,7 @@ from packages.eightballer.skills.rysk_roller.payloads import (
     MultiplexerPayload,
     PutExercisedPayload,
     PutExpiredPayload,
+    SelectBlockPayload,
     UnderAllocatedPayload,
 )
 from packages.valory.skills.abstract_round_abci.base import (
@@ -40,6 +42,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     AbstractRound,
     AppState,
     BaseSynchronizedData,
+    CollectDifferentUntilThresholdRound,
     CollectSameUntilAllRound,
     DegenerateRound,
     EventToTimeout,
@@ -72,6 +75,11 @@ class SynchronizedData(BaseSynchronizedData):
     This data is replicated by the tendermint application.
     """
 
+    @property
+    def sync_block(self) -> int:
+        """Get the block the subgraph and the chain are read at in the period."""
+        return cast(int, self.db.get_strict("sync_block"))
+
     @property
     def rysk_data(self) -> Dict[str, Dict[str, Any]]:
         """Return the data as a dictionary."""
@@ -167,7 +175,7 @@ class CollectPriceDataRound(CollectSameUntilAllRound):
             )
             state = self.synchronized_data.update(
                 synchronized_data_class=self.synchronized_data_class,
-                **{get_name(SynchronizedData.price_data): payloads_json}
+                **{get_name(SynchronizedData.price_data): payloads_json},
             )
             return state, Event.DONE
 
@@ -186,9 +194,18 @@ class CollectDataRound(CollectSameUntilAllRound):
             payloads_json = json.loads(
                 self.collection[list(self.collection.keys())[0]].content
             )
+            # the payload only holds the series changed since the previous sync
+            subgraph = payloads_json["subgraph"]
+            subgraph["synced_block"] = self.synchronized_data.sync_block
+            previous = self.synchronized_data.db.get("rysk_data", None)
+            if previous and subgraph["since_block"] is not None:
+                chain = OptionChain.decode(previous["subgraph"]["series"])
+                changes = OptionChain.decode(subgraph["series"])
+                chain = chain.merge(changes).prune(subgraph["timestamp"])
+                subgraph["series"] = chain.encode()
             state = self.synchronized_data.update(
                 synchronized_data_class=self.synchronized_data_class,
-                **{get_name(SynchronizedData.rysk_data): payloads_json}
+                **{get_name(SynchronizedData.rysk_data): payloads_json},
             )
             return state, Event.DONE
 
@@ -208,7 +225,7 @@ class MultiplexerRound(CollectSameUntilAllRound):
             ].strategy_decision
             state = self.synchronized_data.update(
                 synchronized_data_class=self.synchronized_data_class,
-                **{get_name(SynchronizedData.strategy_decision): strategy_decision}
+                **{get_name(SynchronizedData.strategy_decision): strategy_decision},
             )
             return state, Event.DONE
 
@@ -259,6 +276,36 @@ class PutExpiredRound(AbstractRound):
         """Process payload."""
 
 
+class SelectBlockRound(CollectDifferentUntilThresholdRound):
+    """
+    SelectBlockRound
+
+    Every agent proposes the last block indexed by the subgraph, the period
+    reads the subgraph and the chain at the lowest of the proposals.
+    """
+
+    payload_class = SelectBlockPayload
+    synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    collection_key = "participant_to_block"
+
+    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
+        """Process the end of the block, selecting the block of the period."""
+        result = super().end_block()
+        if result is None:
+            return None
+        synchronized_data, event = result
+        sync_block = min(
+            cast(SelectBlockPayload, payload).block_number
+            for payload in self.collection.values()
+        )
+        synchronized_data = synchronized_data.update(
+            synchronized_data_class=self.synchronized_data_class,
+            **{get_name(SynchronizedData.sync_block): sync_block},
+        )
+        return synchronized_data, event
+
+
 class UnderAllocatedRound(AbstractRound):
     """UnderAllocatedRound"""
 
@@ -301,15 +348,16 @@ class SwapFromUSDCtoETHRound(DegenerateRound):
 class FlowchartToFSMAbciApp(AbciApp[Event]):
     """FlowchartToFSMAbciApp"""
 
-    initial_round_cls: AppState = CollectDataRound
-    initial_states: Set[AppState] = {CollectDataRound}
+    initial_round_cls: AppState = SelectBlockRound
+    initial_states: Set[AppState] = {SelectBlockRound}
     transition_function: AbciAppTransitionFunction = {
+        SelectBlockRound: {Event.DONE: CollectDataRound},
         CollectDataRound: {Event.DONE: CollectPriceDataRound},
         CollectPriceDataRound: {Event.DONE: AnalyseDataRound},
         AnalyseDataRound: {Event.DONE: MultiplexerRound},
         MultiplexerRound: {
-            Event.NOT_DONE: CollectDataRound,
-            Event.ERROR: CollectDataRound,
+            Event.NOT_DONE: SelectBlockRound,
+            Event.ERROR: SelectBlockRound,
             Event.PUT_EXPIRED: PutExpiredRound,
             Event.PUT_EXERCISED: PutExercisedRound,
             Event.CALL_EXPIRED: CallExpiredRound,
@@ -317,7 +365,7 @@ class FlowchartToFSMAbciApp(AbciApp[Event]):
             Event.UNDER_ALLOCATED: UnderAllocatedRound,
             Event.SELL_PUT_OPTION: SellPutOptionRound,
             Event.SELL_CALL_OPTION: SellCallOptionRound,
-            Event.DONE: CollectDataRound,
+            Event.DONE: SelectBlockRound,
         },
         PutExpiredRound: {Event.SELL_PUT_OPTION: SellPutOptionRound},
         CallExpiredRound: {Event.SELL_CALL_OPTION: SellCallOptionRound},
@@ -339,9 +387,9 @@ class FlowchartToFSMAbciApp(AbciApp[Event]):
         SwapFromETHtoUSDCRound,
     }
     event_to_timeout: EventToTimeout = {}
-    cross_period_persisted_keys: Set[str] = []
+    cross_period_persisted_keys: Set[str] = ["rysk_data"]
     db_pre_conditions: Dict[AppState, Set[str]] = {
-        CollectDataRound: [],
+        SelectBlockRound: [],
     }
     db_post_conditions: Dict[AppState, Set[str]] = {
         SwapFromUSDCtoETHRound: [],
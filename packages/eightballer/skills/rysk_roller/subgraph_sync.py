@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the incremental sync of the rysk series from the subgraph."""
+
+from typing import Any, Dict, List, Optional
+
+# the series changed at or after a block, as of the agreed block, in pages
+# following the id cursor
+SERIES_QUERY = """query Series($first: Int!, $cursor: String!, $since: Int!, $block: Int!) {
+  series(
+    block: {number: $block}
+    first: $first
+    orderBy: id
+    orderDirection: asc
+    where: {id_gt: $cursor, _change_block: {number_gte: $since}}
+  ) {
+    id
+    expiration
+    netDHVExposure
+    strike
+    isPut
+    isBuyable
+    isSellable
+  }
+}
+"""
+
+# the last block indexed by the subgraph
+META_QUERY = """query Meta {
+  _meta {
+    block {
+      number
+    }
+  }
+}
+"""
+
+
+class SeriesQuery:
+    """
+    Page through the series changed since a block, as of an agreed block.
+
+    A sync only requests the series changed since the block of the last sync,
+    in pages of `page_size` series following an `id_gt` cursor, so the
+    bandwidth of a sync is proportional to the changes, and tables larger
+    than the default page size of the subgraph are read entirely. Every
+    page is read at the same block, so that all the agents read the same
+    series whenever they query.
+    """
+
+    def __init__(self, query: str = SERIES_QUERY, page_size: int = 1000) -> None:
+        """
+        Initialize the query.
+
+        :param query: the paginated series query, taking first, cursor, since and block.
+        :param page_size: the number of series per page.
+        """
+        self.query = query
+        self.page_size = page_size
+
+    def request(
+        self, block: int, cursor: str = "", since_block: Optional[int] = None
+    ) -> dict:
+        """
+        Get the body of the request of a page.
+
+        :param block: the block the series are read at.
+        :param cursor: the id of the last series of the previous page.
+        :param since_block: the series changed at or after this block are
+            requested, all of them if None.
+        :return: the graphql request.
+        """
+        return {
+            "query": self.query,
+            "variables": {
+                "first": self.page_size,
+                "cursor": cursor,
+                "since": since_block or 0,
+                "block": block,
+            },
+        }
+
+    def next_cursor(self, page: List[Dict[str, Any]]) -> Optional[str]:
+        """Get the cursor of the page after a page, None if it was the last one."""
+        if len(page) < self.page_size:
+            return None
+        return page[-1]["id"]
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the fan_out.py module of the FlowchartToFSM."""
+
+from typing import Generator, List
+
+from packages.eightballer.skills.rysk_roller.fan_out import gather
+
+
+def run(generator: Generator) -> tuple:
+    """Run a generator to the end, counting its ticks."""
+    ticks = 0
+    while True:
+        try:
+            next(generator)
+        except StopIteration as stop:
+            return stop.value, ticks
+        ticks += 1
+
+
+def request(log: List[str], name: str, ticks: int) -> Generator:
+    """A request sent at once, answered after some ticks."""
+    log.append(f"send {name}")
+    for _ in range(ticks):
+        yield
+    log.append(f"receive {name}")
+    return name.upper()
+
+
+def test_requests_are_sent_before_responses_are_waited_for() -> None:
+    """Test that all the requests take the time of the slowest one."""
+    log: List[str] = []
+    tasks = [request(log, name, ticks) for name, ticks in (("a", 3), ("b", 1))]
+    results, ticks = run(gather(tasks, max_in_flight=10))
+    assert results == ["A", "B"]
+    assert ticks == 3
+    assert log[:2] == ["send a", "send b"]
+    assert log[2:] == ["receive b", "receive a"]
+
+
+def test_requests_in_flight_are_limited() -> None:
+    """Test that a request is sent once another one is answered."""
+    log: List[str] = []
+    tasks = [request(log, name, 2) for name in "abc"]
+    results, ticks = run(gather(tasks, max_in_flight=2))
+    assert results == ["A", "B", "C"]
+    assert ticks == 4
+    assert log.index("send c") > log.index("receive a")
+    assert run(gather([], max_in_flight=2)) == ([], 0)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the option_chain.py module of the FlowchartToFSM."""
+
+import numpy as np
+
+from packages.eightballer.skills.rysk_roller.option_chain import (
+    OptionChain,
+    SERIES_DTYPE,
+    SERIES_ORDER,
+)
+
+EXPIRIES = (1_700_000_000, 1_700_604_800)
+
+
+def make_row(index: int, strike: int, expiration: int, is_put: bool) -> dict:
+    """Build a subgraph series."""
+    return {
+        "id": f"0x{index:040x}",
+        "expiration": str(expiration),
+        "strike": str(strike * 10**18),
+        "netDHVExposure": str(-index * 10**17),
+        "isPut": is_put,
+        "isBuyable": True,
+        "isSellable": index % 2 == 0,
+    }
+
+
+def make_rows() -> list:
+    """Build a chain of two expiries of puts and calls, out of order."""
+    strikes = (2200, 1800, 2000)
+    combinations = [
+        (strike, expiration, is_put)
+        for expiration in reversed(EXPIRIES)
+        for is_put in (True, False)
+        for strike in strikes
+    ]
+    return [make_row(i, *combination) for i, combination in enumerate(combinations)]
+
+
+def test_round_trip() -> None:
+    """Test that the chain is serialized without losing the subgraph rows."""
+    rows = make_rows()
+    chain = OptionChain.from_rows(rows)
+    assert len(chain.to_bytes()) == len(rows) * SERIES_DTYPE.itemsize
+    decoded = OptionChain.decode(chain.encode())
+    assert sorted(decoded.to_rows(), key=lambda row: row["id"]) == rows
+    assert decoded.ids == chain.ids
+    assert (decoded.series == chain.series).all()
+
+
+def test_slices_are_views() -> None:
+    """Test that the expiries, sides and strikes are sliced without copying."""
+    chain = OptionChain.from_bytes(OptionChain.from_rows(make_rows()).to_bytes())
+    assert chain.expirations.tolist() == list(EXPIRIES)
+
+    expiry = chain.expiry(EXPIRIES[0])
+    assert len(expiry) == 6
+    assert (expiry.series["expiration"] == EXPIRIES[0]).all()
+    assert np.shares_memory(expiry.series, chain.series)
+
+    puts = chain.side(EXPIRIES[1], is_put=True)
+    assert puts.series["is_put"].all()
+    assert puts.series["strike"].tolist() == [
+        18 * 10**10,
+        20 * 10**10,
+        22 * 10**10,
+    ]
+    calls = chain.strikes(EXPIRIES[1], False, low=19 * 10**10, high=22 * 10**10)
+    assert calls.series["strike"].tolist() == [20 * 10**10]
+    assert not calls.series["is_put"].any()
+    assert np.shares_memory(calls.series, chain.series)
+    assert len(chain.expiry(0)) == 0
+
+
+def test_merge_replaces_the_changed_series() -> None:
+    """Test that the changes replace the series they update, and are added."""
+    rows = make_rows()
+    chain = OptionChain.from_rows(rows[:-1])
+    changed = dict(rows[0], netDHVExposure=str(5 * 10**18), isBuyable=False)
+    merged = chain.merge(OptionChain.from_rows([changed, rows[-1]]))
+    assert len(merged) == len(rows)
+    assert sorted(merged.to_rows(), key=lambda row: row["id"]) == [changed] + rows[1:]
+    assert (np.sort(merged.series, order=SERIES_ORDER) == merged.series).all()
+
+
+def test_prune_drops_the_expired_series() -> None:
+    """Test that the series which expired before a timestamp are dropped."""
+    chain = OptionChain.from_rows(make_rows())
+    assert len(chain.prune(EXPIRIES[0])) == len(chain)
+    pruned = chain.prune(EXPIRIES[0] + 1)
+    assert pruned.expirations.tolist() == [EXPIRIES[1]]
+    assert np.shares_memory(pruned.series, chain.series)
+    assert len(chain.prune(EXPIRIES[1] + 1)) == 0
@@ -19,12 +19,20 @@
 
 """This package contains payload tests for the FlowchartToFSMAbciApp."""
 
+import json
 from dataclasses import dataclass
-from typing import Hashable, Type
+from typing import Any, Dict, Type
 
 import pytest
 
-from packages.eightballer.skills.rysk_roller.payloads import BaseTxPayload
+from packages.eightballer.skills.rysk_roller.payloads import (
+    AnalyseDataPayload,
+    BaseTxPayload,
+    CollectDataPayload,
+    CollectPriceDataPayload,
+    MultiplexerPayload,
+    SelectBlockPayload,
+)
 
 
 @dataclass
@@ -33,14 +41,45 @@ class PayloadTestCase:
 
     name: str
     payload_cls: Type[BaseTxPayload]
-    content: Hashable
+    kwargs: Dict[str, Any]
 
 
-# TODO: provide test cases
-@pytest.mark.parametrize("test_case", [])
+@pytest.mark.parametrize(
+    "test_case",
+    [
+        PayloadTestCase(
+            name="AnalyseDataPayload",
+            payload_cls=AnalyseDataPayload,
+            kwargs={},
+        ),
+        PayloadTestCase(
+            name="CollectDataPayload",
+            payload_cls=CollectDataPayload,
+            kwargs={
+                "content": json.dumps({"subgraph": {"series": "", "since_block": None}})
+            },
+        ),
+        PayloadTestCase(
+            name="CollectPriceDataPayload",
+            payload_cls=CollectPriceDataPayload,
+            kwargs={"content": json.dumps({"price_data": {}})},
+        ),
+        PayloadTestCase(
+            name="MultiplexerPayload",
+            payload_cls=MultiplexerPayload,
+            kwargs={"strategy_decision": 1},
+        ),
+        PayloadTestCase(
+            name="SelectBlockPayload",
+            payload_cls=SelectBlockPayload,
+            kwargs={"block_number": 103},
+        ),
+    ],
+    ids=lambda test_case: test_case.name,
+)
 def test_payloads(test_case: PayloadTestCase) -> None:
     """Tests for FlowchartToFSMAbciApp payloads"""
 
-    payload = test_case.payload_cls(sender="sender", content=test_case.content)
+    payload = test_case.payload_cls(sender="sender", **test_case.kwargs)
     assert payload.sender == "sender"
     assert payload.from_json(payload.json) == payload
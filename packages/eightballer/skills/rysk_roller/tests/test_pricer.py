@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the pricer.py module of the FlowchartToFSM."""
+
+import math
+
+import numpy as np
+import pytest
+
+from packages.eightballer.skills.rysk_roller.option_chain import OptionChain
+from packages.eightballer.skills.rysk_roller.pricer import (
+    BeyondPricer,
+    E18,
+    QuoteSet,
+    black_scholes,
+    norm_cdf,
+    slippage_multiplier,
+)
+
+NOW = 1_700_000_000
+STATE = {
+    "spot": int(2000 * E18),
+    "risk_free_rate": 0,
+    "slippage_gradient": int(0.001 * E18),
+    "delta_band_width": int(5 * E18),
+    "call_multipliers": [int(E18)] * 20,
+    "put_multipliers": [int(2 * E18)] * 20,
+    "timestamp": NOW,
+}
+
+
+def make_row(series_id: str, strike: int, days: int, is_put: bool = False) -> dict:
+    """Build a subgraph series."""
+    return {
+        "id": series_id,
+        "strike": str(strike * 10**18),
+        "expiration": str(NOW + days * 24 * 60 * 60),
+        "isPut": is_put,
+        "isBuyable": True,
+        "isSellable": False,
+        "netDHVExposure": str(-10 * 10**18),
+    }
+
+
+def test_black_scholes() -> None:
+    """Test the vectorized prices against the put call parity."""
+    x = np.linspace(-4, 4, 81)
+    expected = [0.5 * (1 + math.erf(v / math.sqrt(2))) for v in x]
+    assert norm_cdf(x) == pytest.approx(expected, abs=1e-6)
+
+    strike = np.array([1800.0, 2000.0, 2200.0])
+    price, delta = black_scholes(
+        spot=2000.0,
+        strike=np.tile(strike, 2),
+        time=np.full(6, 0.25),
+        vol=np.full(6, 0.8),
+        rate=0.05,
+        is_put=np.repeat([False, True], 3),
+    )
+    parity = 2000.0 - strike * math.exp(-0.05 * 0.25)
+    assert price[:3] - price[3:] == pytest.approx(parity, abs=1e-3)
+    assert delta[:3] - delta[3:] == pytest.approx(np.ones(3), abs=1e-6)
+
+
+def test_slippage_multiplier() -> None:
+    """Test that buying from the dhv costs more than selling to it."""
+    pricer = BeyondPricer()
+    pricer.update_params(STATE)
+    delta = np.array([0.5, 0.5, -0.5])
+    exposure = np.zeros(3)
+    multiplier = slippage_multiplier(
+        pricer.params,
+        1.0,
+        delta,
+        exposure,
+        np.array([False, True, False]),
+        np.array([False, False, True]),
+    )
+    gradient = 0.001
+    assert multiplier[0] == pytest.approx(gradient / math.log(1 + gradient))
+    assert multiplier[1] < 1 < multiplier[0] < multiplier[2]
+
+
+def test_calibration_recovers_the_vols() -> None:
+    """Test that the on-chain quotes are reproduced, and moves are checked."""
+    chain = OptionChain.from_rows(
+        make_row(f"0x{strike:040x}", strike, 30) for strike in range(1500, 2600, 100)
+    )
+    quotes = QuoteSet.from_series(chain.series, np.zeros(len(chain), dtype=bool))
+    pricer = BeyondPricer(sample_size=4, tolerance=0.01)
+    pricer.update_params(STATE)
+    # a smile, as the volatility feed would return
+    smile = 0.6 + 0.5 * (quotes.strike / 2000 - 1) ** 2
+    onchain, _ = pricer.premiums(quotes, smile)
+
+    assert pricer.is_calibration_due(period=0)
+    sample = pricer.sample(quotes)
+    assert sample.sum() == 4 and sample[0] and sample[-1]
+    premiums = np.where(sample, onchain, np.nan)
+    pricer.calibrate(quotes, premiums, np.full(len(quotes), 0.5), period=0)
+    assert not pricer.is_calibration_due(period=9)
+    assert pricer.quote_vols(quotes)[sample] == pytest.approx(smile[sample], rel=1e-6)
+    # the vols of the other strikes are interpolated along the smile
+    local, _ = pricer.premiums(quotes)
+    assert local == pytest.approx(onchain, rel=0.05)
+
+    checks = pricer.needs_check(quotes, local)
+    assert (checks == ~sample).all()
+    pricer.calibrate(quotes, np.where(checks, onchain, np.nan), np.full(11, 0.5))
+    local, _ = pricer.premiums(quotes)
+    assert not pricer.needs_check(quotes, local).any()
+
+    pricer.update_params({**STATE, "spot": int(2100 * E18)})
+    moved, _ = pricer.premiums(quotes)
+    assert pricer.needs_check(quotes, moved).all()
+    assert pricer.fee_per_contract == 0.5
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the quote_cache.py module of the FlowchartToFSM."""
+
+from packages.eightballer.skills.rysk_roller.quote_cache import QuoteCache
+
+SERIES = ((1700000000, 2000 * 10**18, False, "0xu", "0xs", "0xc"), 10**18, False)
+
+
+def test_quotes_expire_after_max_age() -> None:
+    """Test that a quote is served for max_age blocks."""
+    quote_cache = QuoteCache(max_age=2)
+    key = SERIES + (-10,)
+    assert quote_cache.get(key, 100) is None
+    quote_cache.put(key, 100, {"total_premium": 1})
+    assert quote_cache.get(key, 102) == {"total_premium": 1}
+    assert quote_cache.get(key, 103) is None
+    assert quote_cache.as_dict()["hits"] == 1
+    assert quote_cache.get(key, 100, max_age=0) == {"total_premium": 1}
+    assert quote_cache.get(key, 101, max_age=0) is None
+
+
+def test_exposure_change_replaces_the_quote() -> None:
+    """Test that a quote at an old exposure is dropped."""
+    quote_cache = QuoteCache()
+    quote_cache.put(SERIES + (-10,), 100, {"total_premium": 1})
+    quote_cache.put(SERIES + (-11,), 101, {"total_premium": 2})
+    assert len(quote_cache) == 1
+    assert quote_cache.get(SERIES + (-10,), 101) is None
+    assert quote_cache.get(SERIES + (-11,), 101) == {"total_premium": 2}
+
+
+def test_least_recently_used_quotes_are_evicted() -> None:
+    """Test that the cache is bounded."""
+    quote_cache = QuoteCache(max_entries=2)
+    keys = [SERIES[:2] + (is_sell, 0) for is_sell in (False, True)]
+    other = (SERIES[0], 2 * 10**18, False, 0)
+    for key in keys:
+        quote_cache.put(key, 100, key)
+    quote_cache.get(keys[0], 100)
+    quote_cache.put(other, 100, other)
+    assert quote_cache.get(keys[1], 100) is None
+    assert quote_cache.get(keys[0], 100) == keys[0]
+    assert quote_cache.evictions == 1
@@ -19,21 +19,26 @@
 
 """This package contains the tests for rounds of FlowchartToFSM."""
 
+import json
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, Hashable, List, Mapping, Type
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Type, cast
 
 import pytest
 
+from packages.eightballer.skills.rysk_roller.option_chain import OptionChain
 from packages.eightballer.skills.rysk_roller.rounds import (
     AbstractRound,
     AnalyseDataRound,
     CallExercisedRound,
     CallExpiredRound,
+    CollectDataPayload,
     CollectDataRound,
     Event,
     MultiplexerRound,
     PutExercisedRound,
     PutExpiredRound,
+    SelectBlockPayload,
+    SelectBlockRound,
     SynchronizedData,
     UnderAllocatedRound,
 )
@@ -67,6 +72,10 @@ class BaseFlowchartToFSMRoundTest(BaseRoundTestClass):
     _synchronized_data_class = SynchronizedData
     _event_class = Event
 
+    def setup_method(self) -> None:
+        """Set up the synchronized data before each test."""
+        self.setup()
+
     def run_test(self, test_case: RoundTestCase) -> None:
         """Run the test"""
 
@@ -129,17 +138,75 @@ class TestCallExpiredRound(BaseFlowchartToFSMRoundTest):
         self.run_test(test_case)
 
 
+def make_series(index: int, expiration: int, exposure: int = 0) -> Dict[str, Any]:
+    """Build a subgraph series."""
+    return {
+        "id": f"0x{index:040x}",
+        "expiration": str(expiration),
+        "strike": str(2000 * 10**18),
+        "netDHVExposure": str(exposure * 10**18),
+        "isPut": True,
+        "isBuyable": True,
+        "isSellable": True,
+    }
+
+
 class TestCollectDataRound(BaseFlowchartToFSMRoundTest):
     """Tests for CollectDataRound."""
 
     round_class = CollectDataRound
 
-    # TODO: provide test cases
-    @pytest.mark.parametrize("test_case", [])
-    def test_run(self, test_case: RoundTestCase) -> None:
-        """Run tests."""
-
-        self.run_test(test_case)
+    def collect(
+        self, series: List[Dict[str, Any]], since_block: Optional[int], timestamp: int
+    ) -> SynchronizedData:
+        """Collect the same subgraph changes from every agent."""
+        subgraph = dict(
+            series=OptionChain.from_rows(series).encode(),
+            since_block=since_block,
+            timestamp=timestamp,
+        )
+        content = json.dumps({"balances": {}, "subgraph": subgraph})
+        test_round = CollectDataRound(synchronized_data=self.synchronized_data)
+        participants = sorted(self.participants)
+        for sender in participants[:-1]:
+            test_round.process_payload(CollectDataPayload(sender, content))
+        assert test_round.end_block() is None
+
+        test_round.process_payload(CollectDataPayload(participants[-1], content))
+        synchronized_data, event = test_round.end_block()
+        assert event == Event.DONE
+        return cast(SynchronizedData, synchronized_data)
+
+    def test_full_sync(self) -> None:
+        """Test that the first sync stores the series at the agreed block."""
+        self.synchronized_data.update(sync_block=100)
+        series = [make_series(1, 2000), make_series(2, 3000)]
+
+        synchronized_data = self.collect(series, None, 1000)
+        subgraph = synchronized_data.db.get("rysk_data")["subgraph"]
+        assert subgraph["synced_block"] == 100
+        chain = OptionChain.decode(subgraph["series"])
+        assert chain.to_rows() == OptionChain.from_rows(series).to_rows()
+
+    def test_delta_sync(self) -> None:
+        """Test that the changes are merged into the agreed series and pruned."""
+        previous = [make_series(1, 2000), make_series(2, 3000), make_series(3, 3000)]
+        rysk_data = {
+            "subgraph": {
+                "series": OptionChain.from_rows(previous).encode(),
+                "synced_block": 100,
+            }
+        }
+        self.synchronized_data.update(sync_block=110, rysk_data=rysk_data)
+        changes = [make_series(2, 3000, exposure=5), make_series(4, 4000)]
+
+        synchronized_data = self.collect(changes, 100, 2500)
+        subgraph = synchronized_data.db.get("rysk_data")["subgraph"]
+        assert subgraph["synced_block"] == 110
+        chain = OptionChain.decode(subgraph["series"])
+        expected = [make_series(2, 3000, exposure=5), make_series(3, 3000)]
+        expected.append(make_series(4, 4000))
+        assert chain.to_rows() == OptionChain.from_rows(expected).to_rows()
 
 
 class TestMultiplexerRound(BaseFlowchartToFSMRoundTest):
@@ -192,3 +259,22 @@ class TestUnderAllocatedRound(BaseFlowchartToFSMRoundTest):
         """Run tests."""
 
         self.run_test(test_case)
+
+
+class TestSelectBlockRound(BaseFlowchartToFSMRoundTest):
+    """Tests for SelectBlockRound."""
+
+    round_class = SelectBlockRound
+
+    def test_run(self) -> None:
+        """Test that the period syncs at the lowest proposed block."""
+        test_round = SelectBlockRound(synchronized_data=self.synchronized_data)
+        participants = sorted(self.participants)
+        for sender, block_number in zip(participants, (105, 103)):
+            test_round.process_payload(SelectBlockPayload(sender, block_number))
+        assert test_round.end_block() is None
+
+        test_round.process_payload(SelectBlockPayload(participants[2], 104))
+        synchronized_data, event = test_round.end_block()
+        assert event == Event.DONE
+        assert cast(SynchronizedData, synchronized_data).sync_block == 103
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the subgraph_sync.py module of the FlowchartToFSM."""
+
+from packages.eightballer.skills.rysk_roller.subgraph_sync import SeriesQuery
+
+
+def make_series(series_id: str) -> dict:
+    """Build a subgraph series."""
+    return {"id": series_id, "netDHVExposure": "0", "expiration": 100}
+
+
+def test_pages_follow_the_id_cursor() -> None:
+    """Test that the pages are requested at the same block until a partial one."""
+    query = SeriesQuery(page_size=2)
+    request = query.request(20)
+    assert request["variables"] == {"first": 2, "cursor": "", "since": 0, "block": 20}
+    page = [make_series("0x1"), make_series("0x2")]
+    assert query.next_cursor(page) == "0x2"
+    variables = query.request(20, "0x2", 10)["variables"]
+    assert (variables["cursor"], variables["since"], variables["block"]) == (
+        "0x2",
+        10,
+        20,
+    )
+    assert query.next_cursor([make_series("0x3")]) is None
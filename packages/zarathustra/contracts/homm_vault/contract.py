@@ -21,16 +21,46 @@
 
 from dataclasses import astuple, dataclass
 from enum import Enum
-from typing import Any, List
+from typing import Any, Dict, List
 
 from aea.common import Address, JSONLike
 from aea.configurations.base import PublicId
 from aea.contracts.base import Contract
 from aea.crypto.base import LedgerApi
 
+from packages.zarathustra.contracts.multicall3.contract import (
+    MULTICALL3_ADDRESS,
+    aggregate,
+)
+
 Shares = Assets = int
 
 
+def _view(name: str, inputs: List[str], output: str) -> Dict[str, Any]:
+    """Get the abi of a view function."""
+    return {
+        "inputs": [{"name": "", "type": type_} for type_ in inputs],
+        "name": name,
+        "outputs": [{"name": "", "type": output}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+
+
+# the parts of the BeyondPricer, protocol and price feed interfaces used to
+# replicate the quotes
+BEYOND_PRICER_ABI = [
+    _view("protocol", [], "address"),
+    _view("riskFreeRate", [], "uint256"),
+    _view("slippageGradient", [], "uint256"),
+    _view("deltaBandWidth", [], "uint256"),
+    _view("getCallSlippageGradientMultipliers", [], "uint256[]"),
+    _view("getPutSlippageGradientMultipliers", [], "uint256[]"),
+]
+PROTOCOL_ABI = [_view("priceFeed", [], "address")]
+PRICE_FEED_ABI = [_view("getNormalizedRate", ["address", "address"], "uint256")]
+
+
 class ActionType(Enum):
     """ActionType"""
 
@@ -90,6 +120,16 @@ class RequestQuoteOptionPrice:
     is_sell: bool
     net_dhv_exposure: int
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RequestQuoteOptionPrice":
+        """Rebuild a request sent as a dict by the skills."""
+        return cls(
+            _option_series=OptionSeries(**data["_option_series"]),
+            _amount=int(data["_amount"]),
+            is_sell=bool(data["is_sell"]),
+            net_dhv_exposure=int(data["net_dhv_exposure"]),
+        )
+
 
 @dataclass
 class QuoteOptionPrice:
@@ -447,20 +487,78 @@ class HOMMVaultContract(Contract):
         return QuoteOptionPrice(total_premium, total_delta, total_fees)
 
     @classmethod
-    def get_call_slippage_gradient_multipliers(
+    def quote_option_prices(  # pylint: disable=too-many-arguments
         cls,
         ledger_api: LedgerApi,
         contract: Address,
-        _series: Address,
-    ) -> Assets:
-        """getCallSlippageGradientMultipliers"""
+        requests: List[Dict[str, Any]],
+        batch_size: int = 500,
+        multicall_address: Address = MULTICALL3_ADDRESS,
+        block_identifier: Any = "latest",
+    ) -> JSONLike:
+        """
+        Get the quotes of many options with one eth_call per batch.
+
+        The quoteOptionPrice calls are packed into Multicall3 aggregate3 calls
+        of at most `batch_size` quotes, all evaluated at the same block.
+        Quotes which revert are reported as None.
+
+        :param requests: the RequestQuoteOptionPrice of each quote, as dicts.
+        :param batch_size: the maximum number of quotes per eth_call.
+        :param multicall_address: the address of Multicall3.
+        :param block_identifier: the block the quotes are made at.
+        :return: the block number, and the QuoteOptionPrice of each request,
+            as dicts, in the order of the requests.
+        """
 
         contract_interface = cls.get_instance(
             ledger_api=ledger_api,
             contract_address=contract,
         )
+        calls = [
+            (
+                contract_interface.address,
+                contract_interface.encodeABI(
+                    fn_name="quoteOptionPrice",
+                    args=list(astuple(RequestQuoteOptionPrice.from_dict(request))),
+                ),
+            )
+            for request in requests
+        ]
+        block_identifier, responses = aggregate(
+            ledger_api, calls, batch_size, multicall_address, block_identifier
+        )
 
-        return contract_interface.functions.getCallSlippageGradientMultipliers().call()
+        codec = ledger_api.api.codec
+        quotes: List[Any] = []
+        for return_data in responses:
+            if return_data is None:
+                quotes.append(None)
+                continue
+            total_premium, total_delta, total_fees = codec.decode(
+                ["uint256", "int256", "uint256"], return_data
+            )
+            quotes.append(
+                dict(
+                    total_premium=total_premium,
+                    total_delta=total_delta,
+                    total_fees=total_fees,
+                )
+            )
+
+        return dict(block_number=block_identifier, quote_option_prices=quotes)
+
+    @classmethod
+    def get_call_slippage_gradient_multipliers(
+        cls,
+        ledger_api: LedgerApi,
+        contract: Address,
+        _series: Address,
+    ) -> List[int]:
+        """getCallSlippageGradientMultipliers of the BeyondPricer of the vault"""
+
+        beyond_pricer = cls.get_beyond_pricer(ledger_api, contract)
+        return beyond_pricer.functions.getCallSlippageGradientMultipliers().call()
 
     @classmethod
     def get_put_slippage_gradient_multipliers(
@@ -468,12 +566,92 @@ class HOMMVaultContract(Contract):
         ledger_api: LedgerApi,
         contract: Address,
         _series: Address,
-    ) -> Assets:
-        """getPutSlippageGradientMultipliers"""
+    ) -> List[int]:
+        """getPutSlippageGradientMultipliers of the BeyondPricer of the vault"""
+
+        beyond_pricer = cls.get_beyond_pricer(ledger_api, contract)
+        return beyond_pricer.functions.getPutSlippageGradientMultipliers().call()
+
+    @classmethod
+    def get_beyond_pricer(cls, ledger_api: LedgerApi, contract: Address) -> Any:
+        """Get the BeyondPricer quoting the options of the vault."""
 
         contract_interface = cls.get_instance(
             ledger_api=ledger_api,
             contract_address=contract,
         )
+        return ledger_api.api.eth.contract(
+            address=contract_interface.functions.beyondPricer().call(),
+            abi=BEYOND_PRICER_ABI,
+        )
+
+    @classmethod
+    def get_pricer_state(  # pylint: disable=too-many-arguments,too-many-locals
+        cls,
+        ledger_api: LedgerApi,
+        contract: Address,
+        underlying: Address,
+        strike_asset: Address,
+        multicall_address: Address = MULTICALL3_ADDRESS,
+        block_identifier: Any = "latest",
+    ) -> JSONLike:
+        """
+        Read what the BeyondPricer needs to quote options, at a single block.
+
+        :param underlying: the underlying of the options.
+        :param strike_asset: the strike asset of the options.
+        :param multicall_address: the address of Multicall3.
+        :param block_identifier: the block the state is read at.
+        :return: the spot price, risk free rate, slippage gradient, delta band
+            width and slippage gradient multipliers, e18, and the timestamp and
+            number of the block.
+        """
 
-        return contract_interface.functions.getPutSlippageGradientMultipliers().call()
+        beyond_pricer = cls.get_beyond_pricer(ledger_api, contract)
+        protocol = ledger_api.api.eth.contract(
+            address=beyond_pricer.functions.protocol().call(), abi=PROTOCOL_ABI
+        )
+        price_feed = ledger_api.api.eth.contract(
+            address=protocol.functions.priceFeed().call(), abi=PRICE_FEED_ABI
+        )
+        names = [
+            "riskFreeRate",
+            "slippageGradient",
+            "deltaBandWidth",
+            "getCallSlippageGradientMultipliers",
+            "getPutSlippageGradientMultipliers",
+        ]
+        calls = [
+            (beyond_pricer.address, beyond_pricer.encodeABI(fn_name=name))
+            for name in names
+        ]
+        calls.append(
+            (
+                price_feed.address,
+                price_feed.encodeABI(
+                    fn_name="getNormalizedRate", args=[underlying, strike_asset]
+                ),
+            )
+        )
+        block_identifier, responses = aggregate(
+            ledger_api,
+            calls,
+            multicall_address=multicall_address,
+            block_identifier=block_identifier,
+        )
+        if any(response is None for response in responses):
+            raise ValueError(f"Could not read the state of {beyond_pricer.address}")
+
+        codec = ledger_api.api.codec
+        rate, gradient, band_width, calls_data, puts_data, spot = responses
+        block = ledger_api.api.eth.get_block(block_identifier)
+        return dict(
+            block_number=block_identifier,
+            timestamp=block["timestamp"],
+            spot=codec.decode(["uint256"], spot)[0],
+            risk_free_rate=codec.decode(["uint256"], rate)[0],
+            slippage_gradient=codec.decode(["uint256"], gradient)[0],
+            delta_band_width=codec.decode(["uint256"], band_width)[0],
+            call_multipliers=list(codec.decode(["uint256[]"], calls_data)[0]),
+            put_multipliers=list(codec.decode(["uint256[]"], puts_data)[0]),
+        )
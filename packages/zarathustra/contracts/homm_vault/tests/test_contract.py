@@ -1,7 +1,7 @@
 """
 Test HOMMVaultContract.
 """
-from dataclasses import astuple
+from dataclasses import asdict, astuple
 from pathlib import Path
 from typing import Dict
 from unittest import mock
@@ -44,6 +44,7 @@ def test_dataclass_conversion():
         net_dhv_exposure=4,
     )
     assert astuple(request_params) == expected
+    assert RequestQuoteOptionPrice.from_dict(asdict(request_params)) == request_params
 
 
 class TestHOMMVaultContract(BaseContractTestCase):
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module contains the Multicall3 contract, which batches read calls."""
+
+import json
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from aea.common import Address
+from aea.configurations.base import PublicId
+from aea.contracts.base import Contract
+from aea.crypto.base import LedgerApi
+
+PUBLIC_ID = PublicId.from_str("zarathustra/multicall3:0.1.0")
+
+# Multicall3 is deployed at the same address on every supported chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = json.loads(
+    (Path(__file__).parent / "build" / "multicall3.json").read_text()
+)["abi"]
+
+
+def aggregate(  # pylint: disable=too-many-arguments
+    ledger_api: LedgerApi,
+    calls: Sequence[Tuple[Address, str]],
+    batch_size: int = 500,
+    multicall_address: Address = MULTICALL3_ADDRESS,
+    block_identifier: Any = "latest",
+) -> Tuple[int, List[Optional[bytes]]]:
+    """
+    Run read calls through Multicall3 aggregate3, `batch_size` calls per eth_call.
+
+    Every batch is evaluated at the same block.
+
+    :param ledger_api: the ledger api.
+    :param calls: the target and calldata of each call.
+    :param batch_size: the maximum number of calls per eth_call.
+    :param multicall_address: the address of Multicall3.
+    :param block_identifier: the block the calls are made at, the latest by default.
+    :return: the block number and the return data of each call, None where it reverted.
+    """
+    multicall = ledger_api.api.eth.contract(
+        address=ledger_api.api.to_checksum_address(multicall_address),
+        abi=MULTICALL3_ABI,
+    )
+    if block_identifier == "latest":
+        block_identifier = ledger_api.api.eth.block_number
+
+    results: List[Optional[bytes]] = []
+    for start in range(0, len(calls), batch_size):
+        batch = [
+            (target, True, call_data)
+            for target, call_data in calls[start : start + batch_size]
+        ]
+        responses = multicall.functions.aggregate3(batch).call(
+            block_identifier=block_identifier
+        )
+        results.extend(
+            return_data if success else None for success, return_data in responses
+        )
+    return block_identifier, results
+
+
+class Multicall3(Contract):
+    """Multicall3, which runs many read calls in a single eth_call."""
+
+    contract_id = PUBLIC_ID
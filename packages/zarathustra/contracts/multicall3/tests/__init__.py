@@ -0,0 +1,3 @@
+"""
+Module init file.
+"""
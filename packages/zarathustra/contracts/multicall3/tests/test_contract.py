@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Test the Multicall3 contract."""
+
+from types import SimpleNamespace
+from typing import Any, List, Tuple
+
+from packages.zarathustra.contracts.multicall3.contract import (
+    MULTICALL3_ADDRESS,
+    aggregate,
+)
+
+
+class FakeMulticall:
+    """Answer aggregate3 calls, failing the calls to the zero address."""
+
+    def __init__(self) -> None:
+        """Initialize the contract."""
+        self.batches: List[Tuple[Any, int]] = []
+        self.functions = SimpleNamespace(aggregate3=self.aggregate3)
+
+    def aggregate3(self, batch: List[Tuple[str, bool, bytes]]) -> SimpleNamespace:
+        """Get the call of a batch."""
+
+        def call(block_identifier: int) -> List[Tuple[bool, bytes]]:
+            self.batches.append((batch, block_identifier))
+            return [(target != "0x0", data) for target, _, data in batch]
+
+        return SimpleNamespace(call=call)
+
+
+def test_aggregate() -> None:
+    """Test that the calls are batched at a single block."""
+    multicall = FakeMulticall()
+    eth = SimpleNamespace(contract=lambda address, abi: multicall, block_number=123)
+    ledger_api = SimpleNamespace(
+        api=SimpleNamespace(eth=eth, to_checksum_address=lambda address: address)
+    )
+    calls = [("0x1", b"\x01"), ("0x0", b"\x02"), ("0x1", b"\x03")]
+
+    block_number, results = aggregate(ledger_api, calls, batch_size=2)
+    assert block_number == 123
+    assert results == [b"\x01", None, b"\x03"]
+    assert [len(batch) for batch, _ in multicall.batches] == [2, 1]
+    assert {block for _, block in multicall.batches} == {123}
+    assert all(
+        allow_failure for batch, _ in multicall.batches for _, allow_failure, _ in batch
+    )
+
+    _, results = aggregate(
+        ledger_api,
+        calls[:1],
+        multicall_address=MULTICALL3_ADDRESS,
+        block_identifier=100,
+    )
+    assert multicall.batches[-1][1] == 100
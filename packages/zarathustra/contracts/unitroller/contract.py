@@ -21,13 +21,18 @@
 import logging
 from collections import namedtuple
 from enum import IntEnum, auto
-from typing import Any, NamedTuple
+from typing import Any, Dict, List, NamedTuple
 
 from aea.common import JSONLike
 from aea.configurations.base import PublicId
 from aea.contracts.base import Contract
 from aea.crypto.base import LedgerApi
 
+from packages.zarathustra.contracts.multicall3.contract import (
+    MULTICALL3_ADDRESS,
+    aggregate,
+)
+
 
 class Error(IntEnum):
     def _generate_next_value_(name, start, count, last_values):
@@ -59,6 +64,38 @@ Wei = int
 
 PUBLIC_ID = PublicId.from_str("zarathustra/unitroller:0.1.0")
 
+# the parts of the oToken and price oracle interfaces needed to value positions
+O_TOKEN_ABI = [
+    {
+        "inputs": [{"internalType": "address", "name": "account", "type": "address"}],
+        "name": "getAccountSnapshot",
+        "outputs": [
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "exchangeRateStored",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+PRICE_ORACLE_ABI = [
+    {
+        "inputs": [{"internalType": "address", "name": "oToken", "type": "address"}],
+        "name": "getUnderlyingPrice",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
 _logger = logging.getLogger(
     f"aea.packages.{PUBLIC_ID.author}.contracts.{PUBLIC_ID.name}.contract"
 )
@@ -130,9 +167,20 @@ class Unitroller(Contract):
         """
         del ledger_api, contract, kwargs
 
-    def get_account_liquidity(self, account: Address) -> NamedTuple:
+    @classmethod
+    def get_account_liquidity(
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
+        account: Address,
+    ) -> NamedTuple:
         """Determine the current account liquidity wrt collateral requirements."""
 
+        contract_interface = cls.get_instance(
+            ledger_api=ledger_api,
+            contract_address=contract_address,
+        )
+
         result = contract_interface.functions.getAccountLiquidity(account).call()
 
         error_code, liquidity, shortfall = result
@@ -142,8 +190,196 @@ class Unitroller(Contract):
             shortfall=shortfall,
         )
 
-    def liquidate_borrow_allowed(
-        self,
+    @classmethod
+    def get_accounts_liquidity(  # pylint: disable=too-many-arguments
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
+        accounts: List[Address],
+        batch_size: int = 500,
+        multicall_address: Address = MULTICALL3_ADDRESS,
+        block_identifier: Any = "latest",
+    ) -> JSONLike:
+        """Determine the liquidity of many accounts with one eth_call per batch.
+
+        The getAccountLiquidity calls are packed into Multicall3 aggregate3
+        calls of at most `batch_size` accounts, all evaluated at the same block.
+        Calls which revert are reported with a `None` result.
+
+        returns: mapping of account to its (error, liquidity, shortfall).
+        """
+
+        contract_interface = cls.get_instance(
+            ledger_api=ledger_api,
+            contract_address=contract_address,
+        )
+        target = contract_interface.address
+        calls = [
+            (
+                target,
+                contract_interface.encodeABI(
+                    fn_name="getAccountLiquidity", args=[account]
+                ),
+            )
+            for account in accounts
+        ]
+        block_identifier, responses = aggregate(
+            ledger_api, calls, batch_size, multicall_address, block_identifier
+        )
+
+        codec = ledger_api.api.codec
+        results: Dict[Address, Any] = {}
+        for account, return_data in zip(accounts, responses):
+            if return_data is None:
+                _logger.warning(f"getAccountLiquidity reverted for {account}")
+                results[account] = None
+                continue
+            results[account] = list(
+                codec.decode(["uint256", "uint256", "uint256"], return_data)
+            )
+
+        return dict(block_number=block_identifier, accounts_liquidity=results)
+
+    @classmethod
+    def get_markets_state(  # pylint: disable=too-many-arguments,too-many-locals
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
+        markets: List[Address],
+        multicall_address: Address = MULTICALL3_ADDRESS,
+        block_identifier: Any = "latest",
+    ) -> JSONLike:
+        """Read the collateral factor, exchange rate and oracle price of markets.
+
+        returns: mapping of market to its collateral_factor, exchange_rate and
+            price mantissas, None where one of the calls reverted.
+        """
+
+        contract_interface = cls.get_instance(
+            ledger_api=ledger_api,
+            contract_address=contract_address,
+        )
+        oracle = ledger_api.api.eth.contract(
+            address=contract_interface.functions.oracle().call(),
+            abi=PRICE_ORACLE_ABI,
+        )
+        o_token = ledger_api.api.eth.contract(abi=O_TOKEN_ABI)
+
+        calls = []
+        for market in markets:
+            calls.append(
+                (
+                    contract_interface.address,
+                    contract_interface.encodeABI(fn_name="markets", args=[market]),
+                )
+            )
+            calls.append((market, o_token.encodeABI(fn_name="exchangeRateStored")))
+            calls.append(
+                (
+                    oracle.address,
+                    oracle.encodeABI(fn_name="getUnderlyingPrice", args=[market]),
+                )
+            )
+        block_identifier, responses = aggregate(
+            ledger_api,
+            calls,
+            multicall_address=multicall_address,
+            block_identifier=block_identifier,
+        )
+
+        codec = ledger_api.api.codec
+        results: Dict[Address, Any] = {}
+        for i, market in enumerate(markets):
+            market_data, exchange_rate, price = responses[3 * i : 3 * i + 3]
+            if market_data is None or exchange_rate is None or price is None:
+                _logger.warning(f"Could not read the state of market {market}")
+                results[market] = None
+                continue
+            _, _, collateral_factor = codec.decode(
+                ["bool", "bool", "uint256"], market_data
+            )
+            results[market] = dict(
+                collateral_factor=collateral_factor,
+                exchange_rate=codec.decode(["uint256"], exchange_rate)[0],
+                price=codec.decode(["uint256"], price)[0],
+            )
+
+        return dict(block_number=block_identifier, markets=results)
+
+    @classmethod
+    def get_account_snapshots(  # pylint: disable=too-many-arguments
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
+        positions: Dict[Address, List[Address]],
+        batch_size: int = 500,
+        multicall_address: Address = MULTICALL3_ADDRESS,
+        block_identifier: Any = "latest",
+    ) -> JSONLike:
+        """Read the oToken and borrow balances of accounts in the markets they entered.
+
+        returns: mapping of account to market to (oToken balance, borrow balance).
+        """
+        del contract_address
+
+        o_token = ledger_api.api.eth.contract(abi=O_TOKEN_ABI)
+        pairs = [
+            (account, market)
+            for account, markets in positions.items()
+            for market in markets
+        ]
+        calls = [
+            (market, o_token.encodeABI(fn_name="getAccountSnapshot", args=[account]))
+            for account, market in pairs
+        ]
+        block_identifier, responses = aggregate(
+            ledger_api, calls, batch_size, multicall_address, block_identifier
+        )
+
+        codec = ledger_api.api.codec
+        results: Dict[Address, Dict[Address, Any]] = {
+            account: {} for account in positions
+        }
+        for (account, market), return_data in zip(pairs, responses):
+            if return_data is None:
+                continue
+            error, o_token_balance, borrow_balance, _ = codec.decode(
+                ["uint256", "uint256", "uint256", "uint256"], return_data
+            )
+            if error != Error.NO_ERROR:
+                continue
+            results[account][market] = [o_token_balance, borrow_balance]
+
+        return dict(block_number=block_identifier, snapshots=results)
+
+    @classmethod
+    def get_liquidation_params(
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
+        block_identifier: Any = "latest",
+    ) -> JSONLike:
+        """Read the close factor and liquidation incentive mantissas."""
+
+        contract_interface = cls.get_instance(
+            ledger_api=ledger_api,
+            contract_address=contract_address,
+        )
+        functions = contract_interface.functions
+        return dict(
+            close_factor=functions.closeFactorMantissa().call(
+                block_identifier=block_identifier
+            ),
+            liquidation_incentive=functions.liquidationIncentiveMantissa().call(
+                block_identifier=block_identifier
+            ),
+        )
+
+    @classmethod
+    def liquidate_borrow_allowed(  # pylint: disable=too-many-arguments
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
         o_token_borrowed: Address,
         o_token_collateral: Address,
         liquidator: Address,
@@ -167,12 +403,15 @@ class Unitroller(Contract):
 
         return to_named_tuple(error_code)
 
-    def liquidate_calculate_seize_tokens(
-        self,
+    @classmethod
+    def liquidate_calculate_seize_tokens(  # pylint: disable=too-many-arguments
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: Address,
         o_token_borrowed: Address,
         o_token_collateral: Address,
         actual_borrow_amount: Wei,
-    ):
+    ) -> NamedTuple:
         """Calculate number of tokens of collateral asset to seize given an underlying amount.
 
         1. Read oracle prices for borrowed and collateral markets
@@ -183,6 +422,11 @@ class Unitroller(Contract):
         returns: number of oTokenCollateral tokens to be seized in a liquidation.
         """
 
+        contract_interface = cls.get_instance(
+            ledger_api=ledger_api,
+            contract_address=contract_address,
+        )
+
         result = contract_interface.functions.liquidateCalculateSeizeTokens(
             o_token_borrowed,
             o_token_collateral,